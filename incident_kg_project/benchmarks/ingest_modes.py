@@ -0,0 +1,69 @@
+"""
+Compare ingestion modes of src/builder.py against the same data file.
+
+Each mode starts from an empty database, so this is destructive.
+Run from the project root:
+    python -m benchmarks.ingest_modes --modes single phased
+"""
+import argparse
+import time
+from src.builder import (
+    DATABASE, get_driver, clear_database, create_constraints,
+    ingest_data, create_issue_links, ingest_batched, ingest_phased,
+)
+from src.config import DATA_FILE, INGEST_BATCH_SIZE, INGEST_WORKERS
+from src.data_io import load_incidents
+from src.passages import chunk_rows
+
+
+def graph_shape(driver):
+    with driver.session(database=DATABASE) as session:
+        nodes = session.run("MATCH (n) RETURN count(n) AS c").single()["c"]
+        rels = session.run("MATCH ()-[r]->() RETURN count(r) AS c").single()["c"]
+    return nodes, rels
+
+
+def run_mode(driver, mode, data, batch_size, workers):
+    with driver.session(database=DATABASE) as session:
+        session.execute_write(clear_database)
+        session.execute_write(create_constraints)
+
+    start = time.perf_counter()
+    if mode == "single":
+        with driver.session(database=DATABASE) as session:
+            session.execute_write(ingest_data, chunk_rows(data))
+            session.execute_write(create_issue_links, data)
+    elif mode == "batched":
+        ingest_batched(driver, data, batch_size, workers)
+    else:
+        ingest_phased(driver, data, batch_size, workers)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--file", default=DATA_FILE)
+    parser.add_argument("--modes", nargs="+", default=["single", "batched", "phased"])
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    args = parser.parse_args()
+
+    data = load_incidents(args.file)
+
+    driver = get_driver()
+    results = []
+    for mode in args.modes:
+        print(f"Running {mode}...")
+        seconds = run_mode(driver, mode, data, args.batch_size, args.workers)
+        nodes, rels = graph_shape(driver)
+        results.append((mode, seconds, nodes, rels))
+
+    print(f"\n{'mode':<10}{'seconds':>10}{'issues/s':>12}{'nodes':>10}{'rels':>10}")
+    for mode, seconds, nodes, rels in results:
+        print(f"{mode:<10}{seconds:>10.2f}{len(data) / seconds:>12,.0f}{nodes:>10}{rels:>10}")
+    if len({(n, r) for _, _, n, r in results}) > 1:
+        print("Warning: modes produced different graph shapes.")
+
+
+if __name__ == "__main__":
+    main()
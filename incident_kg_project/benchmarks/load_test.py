@@ -0,0 +1,134 @@
+"""
+Load-test the query server and report latency percentiles and throughput.
+
+By default an in-process server is started with the stub LLM and fake embeddings
+(LLM_PROVIDER=fake, EMBEDDING_PROVIDER=fake); Neo4j is still queried. Pass --url
+to load an already running server instead. The in-process server runs with the
+answer cache off, since the few questions below would otherwise almost all be
+cache hits after the first round; --answer-cache turns it on.
+    python -m benchmarks.load_test --requests 500 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from src.stats import percentile
+
+QUESTIONS = [
+    "How many issues are there?",
+    "How many Sev1 incidents are open?",
+    "How many Sev2 incidents are open?",
+    "List Sev1 issues for Component-1",
+    "List Sev1 issues for Component-3",
+    "How many issues for Product-2?",
+    "What components are affected by incident INC-1234?",
+    "Show open issues for Product-4",
+]
+
+
+async def _post(reader, writer, host, question):
+    body = json.dumps({"question": question}).encode("utf-8")
+    writer.write(
+        f"POST /query HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def _get_json(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    return json.loads(raw.split(b"\r\n\r\n", 1)[1])
+
+
+async def run_load(host, port, total, concurrency, seed):
+    rng = random.Random(seed)
+    questions = [rng.choice(QUESTIONS) for _ in range(total)]
+    latencies, statuses = [], {}
+
+    async def worker(worker_questions):
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for question in worker_questions:
+                start = time.perf_counter()
+                status = await _post(reader, writer, host, question)
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(questions[i::concurrency]) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return latencies, statuses, elapsed
+
+
+async def main(args):
+    server = None
+    if args.url:
+        host, _, port = args.url.split("://", 1)[-1].rstrip("/").partition(":")
+        port = int(port or 80)
+    else:
+        from src.pipeline import RAGPipeline
+        from src.server import QueryServer
+
+        pipeline = RAGPipeline()
+        pipeline.wait_until_ready()
+        host, port = "127.0.0.1", args.port
+        server = await QueryServer(pipeline, max_concurrency=args.server_concurrency).start(host, port)
+
+    try:
+        latencies, statuses, elapsed = await run_load(host, port, args.requests, args.concurrency, args.seed)
+        stats = await _get_json(host, port, "/stats")
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+    print(f"requests:    {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:,.1f} QPS)")
+    print(f"status:      {statuses}")
+    print(f"latency p50: {percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"latency p99: {percentile(latencies, 99) * 1000:.1f} ms")
+    cache = stats.get("answer_cache")
+    print(f"answer cache: {cache['hit_rate']:.0%} hit rate" if cache else "answer cache: off")
+    print(f"server:      {json.dumps(stats)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="load an existing server, e.g. http://127.0.0.1:8080")
+    parser.add_argument("--port", type=int, default=8181, help="port for the in-process server")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--server-concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency-ms", type=float, default=200,
+                        help="simulated stub LLM latency per call")
+    parser.add_argument("--answer-cache", action="store_true",
+                        help="keep the in-process server's answer cache on (off by default so "
+                             "the pipeline is measured, not cache lookups)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if not args.url:
+        # Must be set before src.config is imported
+        os.environ.setdefault("LLM_PROVIDER", "fake")
+        os.environ.setdefault("EMBEDDING_PROVIDER", "fake")
+        os.environ.setdefault("STUB_LLM_LATENCY_MS", str(args.llm_latency_ms))
+        os.environ["ANSWER_CACHE_ENABLED"] = "1" if args.answer_cache else "0"
+    asyncio.run(main(args))
@@ -0,0 +1,50 @@
+"""
+Time passage chunking (src/passages.py) on seeded generator data across worker
+counts, and report how many chunks deduplication saves from storing and
+embedding, without Neo4j.
+
+Run from the project root:
+    python -m benchmarks.passage_chunking --issues 20000 --workers 1 2 4 8
+"""
+import argparse
+import time
+from datetime import datetime
+from src.config import CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS
+from src.generator import generate_reference_data, iter_issues, seed_all
+from src.passages import PassageChunker, passage_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--issues", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--max-tokens", type=int, default=CHUNK_TOKENS)
+    parser.add_argument("--overlap-tokens", type=int, default=CHUNK_OVERLAP_TOKENS)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    seed_all(args.seed)
+    start = time.perf_counter()
+    rows = list(iter_issues(args.issues, *generate_reference_data(), end_date=datetime(2026, 1, 1)))
+    print(f"Generated {len(rows)} issues in {time.perf_counter() - start:.1f}s")
+
+    baseline, chunked = None, None
+    for workers in args.workers:
+        with PassageChunker(workers, args.max_tokens, args.overlap_tokens) as chunker:
+            start = time.perf_counter()
+            chunked = list(chunker.iter_rows(rows))
+            seconds = time.perf_counter() - start
+        baseline = baseline or seconds
+        print(f"{workers:>3} workers: {seconds:.2f}s ({len(rows) / seconds:,.0f} issues/s, "
+              f"{baseline / seconds:.1f}x)")
+
+    stats = passage_stats(chunked)
+    print(f"\n{stats['sources']:,} sources ({stats['source_tokens']:,} tokens) -> "
+          f"{stats['chunks']:,} chunks ({stats['chunk_tokens']:,} tokens incl. overlap)")
+    saved = 1 - stats["distinct_tokens"] / stats["chunk_tokens"] if stats["chunk_tokens"] else 0.0
+    print(f"{stats['distinct_chunks']:,} distinct chunks stored and embedded "
+          f"({stats['distinct_tokens']:,} tokens, {saved:.0%} fewer)")
+
+
+if __name__ == "__main__":
+    main()
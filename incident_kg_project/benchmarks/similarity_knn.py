@@ -0,0 +1,61 @@
+"""
+Time the blocked top-k search behind SIMILAR_TO edges (src/similarity.py) on
+synthetic issue vectors, without Neo4j.
+
+Run from the project root:
+    python -m benchmarks.similarity_knn --issues 100000 --dim 1024 --k 10
+Pass --sample to score only that many rows and extrapolate to all issues.
+"""
+import argparse
+import time
+import numpy as np
+from src.config import SIMILARITY_TOP_K, SIMILARITY_BLOCK_SIZE
+from src.similarity import _normalize, top_k_neighbours
+
+
+def synthetic_vectors(issues, dim, seed=0):
+    # Clustered rather than uniform, so neighbours are meaningful
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(issues // 50, 1), dim), dtype=np.float32)
+    labels = rng.integers(0, len(centers), issues)
+    noise = rng.standard_normal((issues, dim), dtype=np.float32)
+    return _normalize(centers[labels] + 0.5 * noise)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--issues", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--k", type=int, default=SIMILARITY_TOP_K)
+    parser.add_argument("--block-size", type=int, default=SIMILARITY_BLOCK_SIZE)
+    parser.add_argument("--sample", type=int, default=0, help="rows to score (0 = all)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    matrix = synthetic_vectors(args.issues, args.dim)
+    print(f"Generated {args.issues} x {args.dim} vectors in {time.perf_counter() - start:.1f}s "
+          f"({matrix.nbytes / 2**20:.0f} MiB)")
+
+    rows = range(min(args.sample, args.issues)) if args.sample else range(args.issues)
+    start = time.perf_counter()
+    found = sum(1 for _ in top_k_neighbours(matrix, rows, args.k, args.block_size))
+    seconds = time.perf_counter() - start
+    estimate = seconds * args.issues / found
+    print(f"top-{args.k} for {found} issues: {seconds:.2f}s ({found / seconds:,.0f} issues/s); "
+          f"all {args.issues} issues: ~{estimate:.1f}s")
+
+    try:
+        import faiss
+    except ImportError:
+        return
+    index = faiss.IndexFlatIP(args.dim)
+    index.add(matrix)
+    queries = matrix[np.asarray(rows)]
+    start = time.perf_counter()
+    index.search(queries, args.k + 1)  # +1: each row finds itself first
+    seconds = time.perf_counter() - start
+    print(f"faiss IndexFlatIP for {len(queries)} issues: {seconds:.2f}s (~{seconds * args.issues / len(queries):.1f}s for all)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+End-to-end benchmark: generate -> build -> query, at a configurable scale, with
+deterministic offline stubs (LLM_PROVIDER=fake, EMBEDDING_PROVIDER=fake).
+
+Results are written to benchmarks/results/<timestamp>-<commit>.json so runs can be
+compared across commits (--baseline prints the change per metric).
+
+    python -m benchmarks.suite --issues 10000 --modes batched phased sync
+    python -m benchmarks.suite --issues 1000 --graph stand-in   # no Neo4j needed
+
+Ingestion modes clear the database, so point NEO4J_URI at a scratch instance.
+With --graph stand-in, ingestion is skipped and queries run against an in-memory
+graph returning canned rows: that measures the pipeline's own overhead (prompting,
+caches, stub LLM) rather than Neo4j.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from src.stats import percentile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "benchmarks", "results")
+DATASET_DIR = os.path.join(PROJECT_ROOT, "data", "bench")
+# Fixed so the same --issues/--seed always produce the same dataset
+DATASET_END_DATE = datetime(2025, 1, 1)
+
+# Fixed question set: (category, question)
+QUESTIONS = [
+    ("count", "How many issues are there?"),
+    ("count", "How many Sev1 incidents are open?"),
+    ("count", "How many issues for Product-2?"),
+    ("filter", "List Sev1 issues for Component-1"),
+    ("filter", "Show open issues for Product-4"),
+    ("lookup", "What components are affected by incident INC-1234?"),
+    ("rollup", "What is the average event duration for Sev1 in Product-2?"),
+    ("timeline", "Which incidents overlapped with INC-1234?"),
+    ("timeline", "List Sev1 incidents from the last week"),
+    ("vector", "Find passages similar to database connection timeout"),
+]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latency_stats(seconds):
+    return {
+        "count": len(seconds),
+        "p50_ms": percentile(seconds, 50) * 1000,
+        "p95_ms": percentile(seconds, 95) * 1000,
+        "p99_ms": percentile(seconds, 99) * 1000,
+        "mean_ms": sum(seconds) / len(seconds) * 1000 if seconds else 0.0,
+    }
+
+
+def dataset(args):
+    """
+    Path of the dataset for these parameters, generated on first use.
+    """
+    from src import generator
+
+    name = (f"incidents-{args.issues}-s{args.seed}-p{args.passages[0]}_{args.passages[1]}"
+            f"-l{args.max_labels}-c{args.clone_rate}.jsonl.gz")
+    path = os.path.join(DATASET_DIR, name)
+    result = {"path": path, "generated": False}
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        generator.main(output_file=path, num_issues=args.issues, seed=args.seed,
+                       passages=tuple(args.passages), max_labels=args.max_labels,
+                       clone_rate=args.clone_rate, end_date=DATASET_END_DATE)
+        seconds = time.perf_counter() - start
+        result.update(generated=True, seconds=seconds, issues_per_second=args.issues / seconds)
+    return result
+
+
+def bench_ingest(args, path):
+    from benchmarks.ingest_modes import run_mode, graph_shape
+    from src.builder import DATABASE, get_driver, create_indexes, generate_embeddings
+    from src.data_io import IncidentStream, load_incidents
+    from src.sync import sync_data
+
+    data = IncidentStream(path)
+    results = {}
+    driver = get_driver()
+    for mode in [m for m in args.modes if m != "sync"]:
+        print(f"Ingesting with {mode}...")
+        rows = load_incidents(path) if mode == "single" else data
+        seconds = run_mode(driver, mode, rows, args.batch_size, args.workers)
+        nodes, rels = graph_shape(driver)
+        results[mode] = {"seconds": seconds, "issues_per_second": args.issues / seconds,
+                         "nodes": nodes, "relationships": rels}
+    if "sync" in args.modes:
+        # Re-sync of an unchanged export on top of the last build: the hashing/diff cost alone
+        print("Re-syncing unchanged data...")
+        start = time.perf_counter()
+        sync_data(driver, data, args.batch_size, args.workers)
+        seconds = time.perf_counter() - start
+        results["sync"] = {"seconds": seconds, "issues_per_second": args.issues / seconds}
+    if args.embed:
+        with driver.session(database=DATABASE) as session:
+            session.execute_write(create_indexes)
+        start = time.perf_counter()
+        generate_embeddings(driver)
+        results["embeddings"] = {"seconds": time.perf_counter() - start}
+    return results
+
+
+def stand_in_graph():
+    """
+    In-memory GraphStore answering every query with a few canned rows. Its schema
+    mirrors the builder's node and relationship tables, so prompt sizes are realistic.
+    """
+    from langchain_community.graphs.graph_store import GraphStore
+    from src.builder import ISSUE_FIELDS, SOURCE_FIELDS, PASSAGE_FIELDS, RELATIONSHIPS, TEMPORAL_FIELDS
+    from src.bulk_export import DIMENSION_COLUMNS
+    from src.rollups import ROLLUP_DIMENSIONS
+    from src.schema_select import render
+
+    def prop_type(name):
+        if name in TEMPORAL_FIELDS or name == "start":
+            return "LOCAL_DATE_TIME"
+        if name == "date":
+            return "DATE"
+        return "INTEGER" if name.endswith(("_ms", "_count")) else "STRING"
+
+    def props(names):
+        return [{"property": n, "type": prop_type(n)} for n in names]
+
+    node_props = {"Issue": props(ISSUE_FIELDS), "Source": props(SOURCE_FIELDS), "Passage": props(PASSAGE_FIELDS)}
+    node_props.update({label: props(columns) for label, columns in DIMENSION_COLUMNS.items()})
+    node_props["Rollup"] = props(["id", "dimension", "name", "severity", "month", "issue_count",
+                                  "open_count", "total_duration_ms", "avg_duration_ms"])
+    node_props["Hour"] = props(["start", "date"])
+    node_props["Day"] = props(["date"])
+    relationships = [{"start": "Issue", "type": rel_type, "end": end_label}
+                     for rel_type, _, _, end_label, _, _ in RELATIONSHIPS]
+    relationships += [{"start": "Passage", "type": "FROM", "end": "Issue"},
+                      {"start": "Passage", "type": "CHUNK_OF", "end": "Source"},
+                      {"start": "Issue", "type": "CLONES", "end": "Issue"},
+                      {"start": "Issue", "type": "SIMILAR_TO", "end": "Issue"}]
+    relationships += [{"start": label, "type": "HAS_ROLLUP", "end": "Rollup"} for _, label, _ in ROLLUP_DIMENSIONS]
+    relationships += [{"start": "Issue", "type": "OCCURRED_IN", "end": "Hour"},
+                      {"start": "Day", "type": "HAS_HOUR", "end": "Hour"}]
+    rel_props = {"SIMILAR_TO": [{"property": "score", "type": "FLOAT"}],
+                 "CHUNK_OF": [{"property": p, "type": "INTEGER"} for p in ("index", "start", "end")]}
+    structured_schema = {"node_props": node_props, "rel_props": rel_props,
+                         "relationships": relationships, "metadata": {}}
+
+    class StandInGraph(GraphStore):
+        def __init__(self):
+            self.schema = render(node_props, structured_schema["rel_props"], relationships)
+            self.structured_schema = structured_schema
+
+        @property
+        def get_schema(self):
+            return self.schema
+
+        @property
+        def get_structured_schema(self):
+            return self.structured_schema
+
+        def query(self, query, params={}):
+            if "GraphMeta" in query:
+                return [{"version": 1}]
+            return [{"key": f"INC-{1000 + i}", "summary": "Stand-in issue", "count": 3} for i in range(3)]
+
+        def refresh_schema(self):
+            pass
+
+        def add_graph_documents(self, graph_documents, include_source=False):
+            pass
+
+    return StandInGraph()
+
+
+def bench_queries(args):
+    from src import pipeline as pipeline_module
+
+    if args.graph == "stand-in":
+        pipeline_module.get_graph = stand_in_graph
+        pipeline_module.get_vector_store = lambda embeddings=None: None
+
+    start = time.perf_counter()
+    pipeline = pipeline_module.RAGPipeline()
+    startup = pipeline.wait_until_ready()
+    startup_seconds = time.perf_counter() - start
+
+    by_category, errors = {}, 0
+    for _ in range(args.rounds):
+        for category, question in QUESTIONS:
+            start = time.perf_counter()
+            response = pipeline.query(question)
+            by_category.setdefault(category, []).append(time.perf_counter() - start)
+            if pipeline_module.is_error_response(response):
+                errors += 1
+
+    results = {
+        "startup_seconds": startup_seconds,
+        "startup": dict(startup),
+        "errors": errors,
+        "all": latency_stats([s for values in by_category.values() for s in values]),
+        "by_category": {category: latency_stats(values) for category, values in by_category.items()},
+    }
+    if pipeline.cypher_cache is not None:
+        results["cypher_cache"] = pipeline.cypher_cache.stats()
+    if pipeline.schema_selector is not None:
+        results["schema_pruning"] = pipeline.schema_selector.stats()
+    if args.graph == "neo4j":
+        from src.connection import pool_metrics
+        results["neo4j_pool"] = pool_metrics()
+    return results
+
+
+def _flatten(value, prefix=""):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(item, f"{prefix}{key}.")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix[:-1], value
+
+
+def compare(current, baseline):
+    """
+    Print numeric metrics present in both runs with their relative change.
+    """
+    old = dict(_flatten(baseline["results"]))
+    print(f"\nChange vs {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}):")
+    for name, value in _flatten(current["results"]):
+        if name in old and old[name]:
+            change = (value - old[name]) / old[name] * 100
+            print(f"  {name:<50}{old[name]:>14.2f}{value:>14.2f}{change:>+9.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--issues", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--passages", type=int, nargs=2, default=(1, 3), metavar=("MIN", "MAX"))
+    parser.add_argument("--max-labels", type=int, default=3)
+    parser.add_argument("--clone-rate", type=float, default=0.2)
+    parser.add_argument("--modes", nargs="*", default=["batched", "phased", "sync"],
+                        choices=["single", "batched", "phased", "sync"])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--embed", action="store_true", help="also time embedding generation (fake embeddings)")
+    parser.add_argument("--graph", choices=["neo4j", "stand-in"], default="neo4j",
+                        help="stand-in: skip ingestion and query an in-memory graph")
+    parser.add_argument("--rounds", type=int, default=5, help="passes over the question set")
+    parser.add_argument("--llm-latency-ms", type=float, default=0, help="simulated stub LLM latency")
+    parser.add_argument("--answer-cache", action="store_true",
+                        help="keep the answer cache on (off by default so repeats are measured)")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    # Deterministic offline stubs; must be set before src.config is imported
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["EMBEDDING_PROVIDER"] = "fake"
+    os.environ["STUB_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["ANSWER_CACHE_ENABLED"] = "1" if args.answer_cache else "0"
+    os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+    os.environ.setdefault("SCHEMA_SNAPSHOT_FILE", "")
+    os.environ.setdefault("CYPHER_LOG_PATH", "")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": {},
+    }
+    results = report["results"]
+    results["dataset"] = dataset(args)
+    if args.graph == "neo4j" and args.modes:
+        results["ingest"] = bench_ingest(args, results["dataset"]["path"])
+    results["queries"] = bench_queries(args)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    out = os.path.join(args.output_dir, f"{stamp}-{report['meta']['commit'] or 'nogit'}.json")
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+
+    ingest = results.get("ingest", {})
+    for mode, stats in ingest.items():
+        if "issues_per_second" in stats:
+            print(f"ingest {mode:<10}{stats['seconds']:>9.2f}s{stats['issues_per_second']:>12,.0f} issues/s")
+    for category, stats in results["queries"]["by_category"].items():
+        print(f"query  {category:<10}p50 {stats['p50_ms']:8.1f} ms  p95 {stats['p95_ms']:8.1f} ms")
+    print(f"Results written to {out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Time-range and overlap queries before and after the timeline (src/timeline.py).
+
+Runs against the current graph, which must have been built with the timeline.
+Three layouts answer the same questions:
+  strings   event_start / event_end as ISO strings with a range index on event_start,
+            as the builder stored them before (a scratch copy on :LegacyIssue nodes,
+            removed afterwards)
+  native    LocalDateTime properties on Issue, filtered directly
+  buckets   hour-bucket seek through (:Hour)<-[:OCCURRED_IN]-(:Issue)
+Each layout must return the same issue keys. Run from the project root:
+    python -m benchmarks.timeline_range --queries 20
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+from src.builder import DATABASE
+from src.config import INGEST_BATCH_SIZE, INGEST_WORKERS
+from src.connection import get_driver, read_query
+from src.index_advisor import db_hits
+from src.ingest import run_batched
+from src.stats import percentile
+from src.timeline import RANGE_QUERY, OVERLAP_QUERY
+
+WINDOWS = {"1 hour": timedelta(hours=1), "1 day": timedelta(days=1), "1 week": timedelta(days=7)}
+
+QUERIES = {
+    "range": {
+        "strings": """
+        MATCH (i:LegacyIssue) WHERE i.event_start < $end AND i.event_end >= $start
+        RETURN i.key AS key""",
+        "native": """
+        MATCH (i:Issue) WHERE i.event_start < $end AND coalesce(i.event_end, i.event_start) >= $start
+        RETURN i.key AS key""",
+        "buckets": RANGE_QUERY,
+    },
+    "overlap": {
+        "strings": """
+        MATCH (x:LegacyIssue {key: $key})
+        MATCH (i:LegacyIssue) WHERE i <> x AND i.event_start < x.event_end AND i.event_end > x.event_start
+        RETURN i.key AS key""",
+        "native": """
+        MATCH (x:Issue {key: $key})
+        MATCH (i:Issue)
+        WHERE i <> x AND i.event_start < coalesce(x.event_end, x.event_start)
+          AND coalesce(i.event_end, i.event_start) > x.event_start
+        RETURN i.key AS key""",
+        "buckets": OVERLAP_QUERY,
+    },
+}
+
+
+def create_legacy_copy(driver):
+    """
+    Copy every issue's key and event bounds onto :LegacyIssue nodes with ISO string
+    values, indexed as the builder indexed them before. Returns the copied rows.
+    """
+    rows, _ = read_query("""
+    MATCH (i:Issue) WHERE i.event_start IS NOT NULL
+    RETURN i.key AS key, i.event_start AS event_start, i.event_end AS event_end
+    """)
+    for row in rows:
+        row["event_start"] = row["event_start"].to_native()
+        row["event_end"] = row["event_end"].to_native() if row["event_end"] is not None else row["event_start"]
+    legacy = [{"key": r["key"], "event_start": r["event_start"].isoformat(),
+               "event_end": r["event_end"].isoformat()} for r in rows]
+
+    with driver.session(database=DATABASE) as session:
+        session.run("CREATE INDEX legacy_issue_key IF NOT EXISTS FOR (i:LegacyIssue) ON (i.key)")
+        session.run("CREATE INDEX legacy_issue_event_start IF NOT EXISTS FOR (i:LegacyIssue) ON (i.event_start)")
+    run_batched(driver, lambda tx, batch: tx.run("UNWIND $rows AS row CREATE (i:LegacyIssue) SET i = row",
+                                                 rows=batch),
+                legacy, INGEST_BATCH_SIZE, INGEST_WORKERS, label="legacy copies", total=len(legacy))
+    with driver.session(database=DATABASE) as session:
+        session.run("CALL db.awaitIndexes(600)")
+    return rows
+
+
+def drop_legacy_copy(driver):
+    with driver.session(database=DATABASE) as session:
+        session.run("MATCH (i:LegacyIssue) CALL { WITH i DETACH DELETE i } IN TRANSACTIONS OF 10000 ROWS")
+        session.run("DROP INDEX legacy_issue_key IF EXISTS")
+        session.run("DROP INDEX legacy_issue_event_start IF EXISTS")
+
+
+def parameters(layout, params):
+    # The string layout compares ISO text, the others LocalDateTime values
+    if layout != "strings":
+        return params
+    return {k: v.isoformat() if hasattr(v, "isoformat") else v for k, v in params.items()}
+
+
+def profile_hits(driver, cypher, params):
+    from neo4j import Query
+
+    with driver.session(database=DATABASE) as session:
+        summary = session.run(Query("PROFILE " + cypher), params).consume()
+    return db_hits(summary.profile) if summary.profile else 0
+
+
+def run_case(driver, query, params_list):
+    """
+    Time every layout of `query` over `params_list`. Returns ({layout: stats}, mismatches).
+    """
+    results, keys = {}, {}
+    for layout, cypher in QUERIES[query].items():
+        seconds, rows = [], 0
+        for params in params_list:
+            start = time.perf_counter()
+            records, _ = read_query(cypher, parameters(layout, params))
+            seconds.append(time.perf_counter() - start)
+            rows += len(records)
+            keys.setdefault(layout, []).append({r["key"] for r in records})
+        results[layout] = {
+            "mean_ms": sum(seconds) / len(seconds) * 1000,
+            "p95_ms": percentile(seconds, 95) * 1000,
+            "rows": rows / len(params_list),
+            "db_hits": profile_hits(driver, cypher, parameters(layout, params_list[0])),
+        }
+    reference = keys["buckets"]
+    mismatches = sum(1 for layout, found in keys.items() for a, b in zip(found, reference) if a != b)
+    return results, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=20, help="windows / issues sampled per case")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    driver = get_driver()
+    hours, _ = read_query("MATCH (h:Hour) RETURN count(h) AS n")
+    if not hours[0]["n"]:
+        print("No timeline in the graph; build it first (python3 src/builder.py).")
+        return
+
+    print("Copying event bounds to string-valued :LegacyIssue nodes...")
+    try:
+        issues = create_legacy_copy(driver)
+        first = min(r["event_start"] for r in issues)
+        last = max(r["event_end"] for r in issues)
+        print(f"{len(issues)} issues with events from {first} to {last}\n")
+
+        cases = []
+        for name, width in WINDOWS.items():
+            span = max((last - first - width).total_seconds(), 0)
+            starts = [first + timedelta(seconds=rng.uniform(0, span)) for _ in range(args.queries)]
+            cases.append((f"range {name}", "range", [{"start": s, "end": s + width} for s in starts]))
+        cases.append(("overlap", "overlap",
+                      [{"key": r["key"]} for r in rng.sample(issues, min(args.queries, len(issues)))]))
+
+        print(f"{'case':<16}{'layout':<10}{'mean ms':>10}{'p95 ms':>10}{'rows':>10}{'db hits':>12}")
+        for label, query, params_list in cases:
+            results, mismatches = run_case(driver, query, params_list)
+            for layout, r in results.items():
+                print(f"{label:<16}{layout:<10}{r['mean_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+                      f"{r['rows']:>10.1f}{r['db_hits']:>12,}")
+            if mismatches:
+                print(f"Warning: {mismatches} {label} results differ between layouts.")
+    finally:
+        drop_legacy_copy(driver)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,79 @@
+import json
 import os
 import sys
 from src.pipeline import RAGPipeline
 from src.config import PROJECT_ROOT
 
+def render(events):
+    """
+    Print stream_query events as they arrive: the Cypher, each result row, then
+    the answer token by token.
+    """
+    answering = False
+    for kind, value in events:
+        if kind == "cypher":
+            print(f"Cypher: {' '.join(value.split())}")
+        elif kind == "row":
+            print(f"  {json.dumps(value, default=str)[:200]}")
+        elif kind == "token":
+            if not answering:
+                print("Answer: ", end="")
+                answering = True
+            print(value, end="", flush=True)
+        elif kind == "answer":
+            if answering:
+                print()
+            else:
+                # Cached and vector-route answers arrive whole
+                print(f"Answer: {value.get('result', value) if isinstance(value, dict) else value}")
+        elif kind == "error":
+            print(value)
+
 def main():
     print("Initializing RAG Pipeline...")
     try:
+        # Returns immediately; the LLM, graph schema and vector store finish
+        # loading in the background while the first question is typed.
         pipeline = RAGPipeline()
-        print("RAG Pipeline Ready!")
+        startup_reported = False
+        if pipeline.ready() and not pipeline.startup_errors():
+            print("RAG Pipeline Ready!")
+        else:
+            print("RAG Pipeline starting (the LLM, graph schema and vector store load in the background).")
         print("Type 'exit' or 'quit' to stop.")
         
         while True:
+            if pipeline.startup_errors():
+                # The failed step was reported when it failed; no question can be answered
+                print("RAG Pipeline failed to start.")
+                print("Please check your .env file and OCI configuration.")
+                break
+
             question = input("\nAsk a question: ")
             if question.lower() in ["exit", "quit"]:
+                if pipeline.answer_cache is not None:
+                    stats = pipeline.answer_cache.stats()
+                    print(f"Answer cache: {stats['hits']} hits ({stats['semantic_hits']} by similarity), "
+                          f"{stats['misses']} misses, {stats['saved_seconds']:.1f}s saved")
+                if pipeline.schema_selector is not None:
+                    stats = pipeline.schema_selector.stats()
+                    print(f"Schema pruning: {stats['avg_selected_tokens']:.0f} of {stats['full_tokens']} "
+                          f"schema tokens per prompt on average, {stats['saved_pct']:.0f}% saved")
                 break
             
             if not question.strip():
                 continue
                 
             print("\nThinking...")
-            response = pipeline.query(question)
-            
-            # Handle response format (it might be a dict or string depending on chain)
-            if isinstance(response, dict):
-                print(f"Answer: {response.get('result', response)}")
-            else:
-                print(f"Answer: {response}")
+            try:
+                render(pipeline.stream_query(question))
+                if not startup_reported and pipeline.ready() and not pipeline.startup_errors():
+                    timings = pipeline.wait_until_ready()
+                    print("Startup: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+                    startup_reported = True
+            except Exception as e:
+                # One failed question (e.g. a startup step that just failed) must not end the session
+                print(f"Error processing query: {e}")
                 
     except Exception as e:
         print(f"Failed to initialize pipeline: {e}")
@@ -0,0 +1,120 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERAL = re.compile(r"\S*\d\S*")
+
+
+def normalize_question(question):
+    """
+    Case- and whitespace-insensitive form of a question, without trailing punctuation.
+    """
+    return _WHITESPACE.sub(" ", question.strip().lower()).rstrip("?.! ")
+
+
+def _literals(question):
+    # Tokens containing digits (Sev1, INC-1234, 2024-05) must match exactly for a
+    # paraphrase hit; embeddings barely distinguish them.
+    return frozenset(_LITERAL.findall(question))
+
+
+class AnswerCache:
+    """
+    LRU cache of RAGPipeline answers with a TTL.
+
+    Entries are tagged with the graph version they were computed against and are
+    ignored once the builder has written a newer version. With `embeddings`, a
+    question that misses on its normalized text can still hit an entry whose
+    question embedding has cosine similarity >= `similarity_threshold`.
+    """
+
+    def __init__(self, max_entries=1000, ttl_seconds=600, embeddings=None, similarity_threshold=0.95):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    def _expired(self, entry, graph_version):
+        return (time.time() - entry["created"] > self.ttl_seconds
+                or entry["graph_version"] != graph_version)
+
+    def _vector(self, question):
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, question, graph_version=None):
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, graph_version):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += entry["latency"]
+                return entry["answer"]
+            candidates = [
+                (k, e) for k, e in self._entries.items()
+                if e["vector"] is not None and not self._expired(e, graph_version)
+                and e["literals"] == _literals(key)
+            ] if self.embeddings is not None else []
+
+        if candidates:
+            vector = self._vector(question)
+            scores = np.stack([e["vector"] for _, e in candidates]) @ vector
+            best = int(np.argmax(scores))
+            if scores[best] >= self.similarity_threshold:
+                best_key, entry = candidates[best]
+                with self._lock:
+                    if best_key in self._entries:
+                        self._entries.move_to_end(best_key)
+                    self.hits += 1
+                    self.semantic_hits += 1
+                    self.saved_seconds += entry["latency"]
+                return entry["answer"]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, question, answer, latency, graph_version=None):
+        key = normalize_question(question)
+        vector = self._vector(question) if self.embeddings is not None else None
+        with self._lock:
+            self._entries[key] = {
+                "answer": answer,
+                "latency": latency,
+                "created": time.time(),
+                "graph_version": graph_version,
+                "vector": vector,
+                "literals": _literals(key),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "entries": len(self._entries),
+        }
@@ -1,17 +1,17 @@
-import json
+import argparse
 import os
+from datetime import datetime
 import time
-from neo4j import GraphDatabase
-from src.config import NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD, NEO4J_DATABASE, DATA_FILE
+from concurrent.futures import ThreadPoolExecutor
+from src.config import NEO4J_DATABASE, DATA_FILE
+from src.config import INGEST_BATCH_SIZE, INGEST_WORKERS, INGEST_MAX_RETRIES, VECTOR_BACKEND
+from src.connection import get_driver
+from src.ingest import run_batched
+from src.passages import PassageChunker
+from src.data_io import IncidentStream, content_hash
 
-URI = NEO4J_URI
-USERNAME = NEO4J_USERNAME
-PASSWORD = NEO4J_PASSWORD
 DATABASE = NEO4J_DATABASE
 
-def get_driver():
-    return GraphDatabase.driver(URI, auth=(USERNAME, PASSWORD))
-
 def clear_database(tx):
     tx.run("MATCH (n) DETACH DELETE n")
 
@@ -26,12 +26,39 @@ def create_constraints(tx):
         "CREATE CONSTRAINT IF NOT EXISTS FOR (per:Person) REQUIRE per.account_id IS UNIQUE",
         "CREATE CONSTRAINT IF NOT EXISTS FOR (l:Label) REQUIRE l.id IS UNIQUE",
         "CREATE CONSTRAINT IF NOT EXISTS FOR (s:SlackChannel) REQUIRE s.id IS UNIQUE",
-        "CREATE CONSTRAINT IF NOT EXISTS FOR (pas:Passage) REQUIRE pas.id IS UNIQUE"
+        "CREATE CONSTRAINT IF NOT EXISTS FOR (pas:Passage) REQUIRE pas.id IS UNIQUE",
+        "CREATE CONSTRAINT IF NOT EXISTS FOR (src:Source) REQUIRE src.id IS UNIQUE",
+        "CREATE CONSTRAINT IF NOT EXISTS FOR (r:Rollup) REQUIRE r.id IS UNIQUE",
+        "CREATE CONSTRAINT IF NOT EXISTS FOR (h:Hour) REQUIRE h.start IS UNIQUE",
+        "CREATE CONSTRAINT IF NOT EXISTS FOR (d:Day) REQUIRE d.date IS UNIQUE"
     ]
     for constraint in constraints:
         tx.run(constraint)
 
+def create_indexes(tx):
+    # Properties generated Cypher filters on most; without these every such query is a label scan.
+    # python -m src.index_advisor recommends more from the queries actually run.
+    indexes = [
+        "CREATE INDEX issue_status IF NOT EXISTS FOR (i:Issue) ON (i.status)",
+        "CREATE INDEX issue_severity IF NOT EXISTS FOR (i:Issue) ON (i.severity)",
+        "CREATE INDEX issue_env_type IF NOT EXISTS FOR (i:Issue) ON (i.env_type)",
+        "CREATE INDEX issue_created IF NOT EXISTS FOR (i:Issue) ON (i.created)",
+        "CREATE INDEX issue_event_start IF NOT EXISTS FOR (i:Issue) ON (i.event_start)",
+        "CREATE INDEX component_name IF NOT EXISTS FOR (c:Component) ON (c.name)",
+        "CREATE INDEX product_name IF NOT EXISTS FOR (p:Product) ON (p.name)",
+        "CREATE INDEX category_name IF NOT EXISTS FOR (cat:Category) ON (cat.name)",
+        "CREATE INDEX person_display_name IF NOT EXISTS FOR (per:Person) ON (per.display_name)",
+        "CREATE INDEX rollup_lookup IF NOT EXISTS FOR (r:Rollup) ON (r.dimension, r.name, r.severity)",
+        # CONTAINS / ENDS WITH on summaries
+        "CREATE TEXT INDEX issue_summary_text IF NOT EXISTS FOR (i:Issue) ON (i.summary)",
+        # Keyword search: CALL db.index.fulltext.queryNodes('incident_text', 'timeout')
+        "CREATE FULLTEXT INDEX incident_text IF NOT EXISTS FOR (n:Issue|Passage) ON EACH [n.summary, n.text]",
+    ]
+    for index in indexes:
+        tx.run(index)
+
 def ingest_data(tx, data):
+    # Rows must have been through src.passages (each passage source carries its chunks)
     query = """
     UNWIND $data AS row
     
@@ -45,13 +72,14 @@ def ingest_data(tx, data):
         i.impact = row.impact,
         i.env_type = row.env_type,
         i.customer_env = row.customer_env,
-        i.event_start = row.event_start,
-        i.event_end = row.event_end,
+        i.event_start = localdatetime(row.event_start),
+        i.event_end = localdatetime(row.event_end),
         i.event_duration_ms = row.event_duration_ms,
         i.summary = row.summary,
-        i.created = row.created,
-        i.updated = row.updated,
-        i.url = row.url
+        i.created = localdatetime(row.created),
+        i.updated = localdatetime(row.updated),
+        i.url = row.url,
+        i.content_hash = row.content_hash
         
     // Create Product
     MERGE (p:Product {id: row.product.id})
@@ -96,15 +124,21 @@ def ingest_data(tx, data):
         MERGE (i)-[:HAS_LABEL]->(l)
     )
     
-    // Create Passages
-    FOREACH (pas IN row.passages |
-        MERGE (p:Passage {id: pas.id})
-        SET p.source_type = pas.source_type,
-            p.source_id = pas.source_id,
-            p.text = pas.text,
-            p.created = pas.created,
-            p.url = pas.url
-        MERGE (p)-[:FROM]->(i)
+    // Create Sources and their Passage chunks; identical chunks share one Passage
+    FOREACH (src IN row.passages |
+        MERGE (s:Source {id: src.id})
+        SET s.source_type = src.source_type,
+            s.source_id = src.source_id,
+            s.created = localdatetime(src.created),
+            s.url = src.url
+        MERGE (i)-[:HAS_SOURCE]->(s)
+        FOREACH (chunk IN src.chunks |
+            MERGE (p:Passage {id: chunk.id})
+            ON CREATE SET p.text = chunk.text, p.token_count = chunk.token_count
+            MERGE (p)-[c:CHUNK_OF]->(s)
+            SET c.index = chunk.index, c.start = chunk.start, c.end = chunk.end
+            MERGE (p)-[:FROM]->(i)
+        )
     )
     """
     tx.run(query, data=data)
@@ -120,13 +154,258 @@ def create_issue_links(tx, data):
     """
     tx.run(query, data=data)
 
-def main():
+def with_content_hash(rows):
+    # Stamp each row with the hash --mode sync compares, taken before chunking
+    for row in rows:
+        yield dict(row, content_hash=content_hash(row))
+
+def bump_graph_version(tx):
+    # Version stamp read by RAGPipeline to invalidate cached answers after a build.
+    tx.run("MERGE (m:GraphMeta {id: 'graph'}) SET m.version = timestamp()")
+
+def ingest_batched(driver, data, batch_size=INGEST_BATCH_SIZE, workers=INGEST_WORKERS,
+                   max_retries=INGEST_MAX_RETRIES):
+    """
+    Batched, parallel equivalent of ingest_data + create_issue_links.
+    Issues are written first; CLONES links only once every batch has committed,
+    since a link target may live in any other batch. Each batch's passages are
+    chunked on the process pool before its transaction.
+
+    `data` is read once, so a one-shot generator works: the (id, clones) pairs
+    are kept from that pass for the link phase.
+    """
+    total = len(data) if hasattr(data, "__len__") else None
+    links = []
+
+    def issues():
+        # Consumed by run_batched on this thread, so appending needs no lock
+        for row in data:
+            if row.get("clones"):
+                links.append({"id": row["id"], "clones": row["clones"]})
+            yield dict(row, content_hash=content_hash(row))
+
+    with PassageChunker() as chunker:
+        issue_stats = run_batched(driver, ingest_data, issues(), batch_size, workers, max_retries,
+                                  label="issues", total=total, prepare=chunker)
+    link_stats = run_batched(driver, create_issue_links, links, batch_size, workers, max_retries,
+                             label="issue links", total=len(links))
+    return {"issues": issue_stats, "links": link_stats}
+
+# Phased loader: reference ("dimension") nodes are de-duplicated in Python and
+# written once per label, then Issue/Passage nodes, then one UNWIND per
+# relationship type. (label, key property, row field)
+DIMENSIONS = [
+    ("Product", "id", "product"),
+    ("Category", "id", "category"),
+    ("Person", "account_id", "reporter"),
+    ("Person", "account_id", "assignee"),
+    ("SlackChannel", "id", "slack_channel"),
+    ("Component", "id", "components"),
+    ("Label", "id", "labels"),
+]
+
+ISSUE_FIELDS = [
+    "id", "key", "type", "status", "resolution", "severity", "impact", "env_type",
+    "customer_env", "event_start", "event_end", "event_duration_ms", "summary",
+    "created", "updated", "url",
+]
+
+# Passage sources (comments, Slack threads, postmortems) and their deduplicated chunks
+SOURCE_FIELDS = ["id", "source_type", "source_id", "created", "url"]
+PASSAGE_FIELDS = ["id", "text", "token_count"]
+CHUNK_FIELDS = ["index", "start", "end"]
+
+# ISO strings in the data, stored as native LocalDateTime values so range filters
+# compare (and use indexes) as time rather than text
+TEMPORAL_FIELDS = ("event_start", "event_end", "created", "updated")
+
+# (relationship type, start label, start key, end label, end key, row field)
+RELATIONSHIPS = [
+    ("HAS_PRODUCT", "Issue", "id", "Product", "id", "product"),
+    ("HAS_CATEGORY", "Issue", "id", "Category", "id", "category"),
+    ("REPORTED_BY", "Issue", "id", "Person", "account_id", "reporter"),
+    ("ASSIGNED_TO", "Issue", "id", "Person", "account_id", "assignee"),
+    ("HAS_SLACK_CHANNEL", "Issue", "id", "SlackChannel", "id", "slack_channel"),
+    ("HAS_COMPONENT", "Issue", "id", "Component", "id", "components"),
+    ("HAS_LABEL", "Issue", "id", "Label", "id", "labels"),
+    ("HAS_SOURCE", "Issue", "id", "Source", "id", "passages"),
+]
+
+def _temporal(row):
+    return {f: datetime.fromisoformat(v) if f in TEMPORAL_FIELDS and isinstance(v, str) else v
+            for f, v in row.items()}
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def collect_phases(data):
+    """
+    Split chunked incident rows into per-entity node rows and per-type relationship
+    rows, plus the (id, clones) rows for CLONES links. Dimension nodes and Passage
+    chunks are keyed by their id, so each one is written exactly once. Everything
+    is held in memory: phases need all rows of a kind before they start.
+    """
+    dimensions = {}
+    for label, key, _ in DIMENSIONS:
+        dimensions.setdefault((label, key), {})
+    issues, sources, passages, links = [], [], {}, []
+    relationships = {rel[0]: [] for rel in RELATIONSHIPS}
+    relationships["FROM"] = []
+    relationships["CHUNK_OF"] = []
+
+    for row in data:
+        issues.append(_temporal({f: row.get(f) for f in ISSUE_FIELDS + ["content_hash"]}))
+        for label, key, field in DIMENSIONS:
+            for entity in _as_list(row.get(field)):
+                dimensions[(label, key)][entity[key]] = entity
+        for rel_type, _, _, _, end_key, field in RELATIONSHIPS:
+            for entity in _as_list(row.get(field)):
+                relationships[rel_type].append({"start": row["id"], "end": entity[end_key]})
+        passage_ids = set()
+        for src in row.get("passages") or []:
+            sources.append(_temporal({f: src.get(f) for f in SOURCE_FIELDS}))
+            for chunk in src["chunks"]:
+                passages[chunk["id"]] = {f: chunk[f] for f in PASSAGE_FIELDS}
+                passage_ids.add(chunk["id"])
+                relationships["CHUNK_OF"].append({"start": chunk["id"], "end": src["id"],
+                                                  "properties": {f: chunk[f] for f in CHUNK_FIELDS}})
+        relationships["FROM"] += [{"start": pid, "end": row["id"]} for pid in passage_ids]
+        if row.get("clones"):
+            links.append({"id": row["id"], "clones": row["clones"]})
+
+    return {
+        "dimensions": {k: list(v.values()) for k, v in dimensions.items()},
+        "issues": issues,
+        "sources": sources,
+        "passages": list(passages.values()),
+        "relationships": relationships,
+        "links": links,
+    }
+
+def _merge_nodes(label, key):
+    # Labels/keys come from the fixed tables above, never from input data.
+    query = f"UNWIND $data AS row MERGE (n:{label} {{{key}: row.{key}}}) SET n += row"
+    def tx_func(tx, data):
+        tx.run(query, data=data)
+    return tx_func
+
+def _merge_relationships(rel_type, start_label, start_key, end_label, end_key, properties=False):
+    # With `properties`, each row's `properties` map is set on the relationship
+    query = f"""
+    UNWIND $data AS row
+    MATCH (a:{start_label} {{{start_key}: row.start}})
+    MATCH (b:{end_label} {{{end_key}: row.end}})
+    MERGE (a)-[r:{rel_type}]->(b)
+    {"SET r += row.properties" if properties else ""}
+    """
+    def tx_func(tx, data):
+        tx.run(query, data=data)
+    return tx_func
+
+def relationship_batches(rows, batch_size):
+    """
+    Pack relationship rows into batches of at most `batch_size` such that no node
+    is in two batches (rows are grouped into connected components of their
+    start/end nodes), so concurrent batches never wait on each other's locks.
+    Returns None when a component is larger than a batch: a hot node such as a
+    popular Component that every batch would lock.
+    """
+    parent = {}
+
+    def find(node):
+        root = node
+        while parent.setdefault(root, root) != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    for row in rows:
+        a, b = find(("start", row["start"])), find(("end", row["end"]))
+        if a != b:
+            parent[a] = b
+    groups = {}
+    for row in rows:
+        groups.setdefault(find(("start", row["start"])), []).append(row)
+    if any(len(group) > batch_size for group in groups.values()):
+        return None
+    batches, batch = [], []
+    for group in groups.values():
+        if batch and len(batch) + len(group) > batch_size:
+            batches.append(batch)
+            batch = []
+        batch += group
+    if batch:
+        batches.append(batch)
+    return batches
+
+def ingest_phased(driver, data, batch_size=INGEST_BATCH_SIZE, workers=INGEST_WORKERS,
+                  max_retries=INGEST_MAX_RETRIES):
+    """
+    Phased bulk load producing the same graph as ingest_data + create_issue_links.
+    `data` is read once, but unlike the batched loader every node and relationship
+    row is collected in memory first (collect_phases); use batched or bulk import
+    when that does not fit.
+
+    0. Passages are chunked on the process pool while the rows are collected.
+    1. Node phases (one per label) run concurrently: they never touch the same nodes.
+    2. Relationship phases run one type at a time, since every type locks Issue nodes.
+       Within a type, batches that share no node commit in parallel; a type whose
+       end nodes are hot (a few Products, Categories, Components) runs with one
+       worker rather than have every batch contend for the same locks.
+    3. CLONES links last.
+    """
+    with PassageChunker() as chunker:
+        phases = collect_phases(chunker.iter_rows(with_content_hash(data)))
+    stats = {}
+
+    node_jobs = [
+        (f"{label} nodes", _merge_nodes(label, key), rows)
+        for (label, key), rows in phases["dimensions"].items() if rows
+    ]
+    node_jobs.append(("Issue nodes", _merge_nodes("Issue", "id"), phases["issues"]))
+    node_jobs.append(("Source nodes", _merge_nodes("Source", "id"), phases["sources"]))
+    node_jobs.append(("Passage nodes", _merge_nodes("Passage", "id"), phases["passages"]))
+
+    with ThreadPoolExecutor(max_workers=len(node_jobs)) as pool:
+        futures = {
+            name: pool.submit(run_batched, driver, tx_func, rows, batch_size, workers,
+                              max_retries, name, len(rows))
+            for name, tx_func, rows in node_jobs
+        }
+        for name, future in futures.items():
+            stats[name] = future.result()
+
+    rel_jobs = [(rel[0], _merge_relationships(*rel[:5])) for rel in RELATIONSHIPS]
+    rel_jobs.append(("FROM", _merge_relationships("FROM", "Passage", "id", "Issue", "id")))
+    rel_jobs.append(("CHUNK_OF", _merge_relationships("CHUNK_OF", "Passage", "id", "Source", "id", properties=True)))
+    for rel_type, tx_func in rel_jobs:
+        rows = phases["relationships"][rel_type]
+        if not rows:
+            continue
+        batches = relationship_batches(rows, batch_size)
+        if batches is None:
+            stats[rel_type] = run_batched(driver, tx_func, rows, batch_size, 1,
+                                          max_retries, rel_type, len(rows))
+        else:
+            stats[rel_type] = run_batched(driver, tx_func, batches, batch_size, workers,
+                                          max_retries, rel_type, len(rows), batched=True)
+
+    stats["CLONES"] = run_batched(driver, create_issue_links, phases["links"], batch_size, workers,
+                                  max_retries, "CLONES", len(phases["links"]))
+    return stats
+
+def main(mode="batched", batch_size=INGEST_BATCH_SIZE, workers=INGEST_WORKERS, prune=False):
     if not os.path.exists(DATA_FILE):
         print(f"Data file {DATA_FILE} not found. Run generate_data.py first.")
         return
 
-    with open(DATA_FILE, "r") as f:
-        data = json.load(f)
+    # Streamed in bounded-memory chunks (except by the phased and single loaders,
+    # which hold the whole dataset); each pass re-reads the file.
+    data = IncidentStream(DATA_FILE)
+    print(f"Reading incidents from {DATA_FILE} ({data.format})")
 
     driver = get_driver()
     try:
@@ -134,17 +413,52 @@ def main():
         print("Connected to Neo4j")
         
         with driver.session(database=DATABASE) as session:
-            print("Clearing database...")
-            session.execute_write(clear_database)
+            if mode != "sync":
+                print("Clearing database...")
+                session.execute_write(clear_database)
             
             print("Creating constraints...")
             session.execute_write(create_constraints)
+            session.execute_write(create_indexes)
             
-            print(f"Ingesting {len(data)} incidents...")
-            session.execute_write(ingest_data, data)
+            if mode == "sync":
+                from src.sync import sync_data
+                print("Syncing incidents incrementally...")
+                stats = sync_data(driver, data, batch_size, workers, prune=prune)
+                failed = sum(s["failed_rows"] for s in (stats.get("issues"), stats.get("links"), stats.get("prune")) if s)
+                if failed:
+                    print(f"Warning: {failed} rows failed to sync.")
+            elif mode == "phased":
+                print(f"Ingesting incidents in phases (batch size {batch_size}, {workers} workers)...")
+                stats = ingest_phased(driver, data, batch_size, workers)
+                failed = sum(s["failed_rows"] for s in stats.values())
+                if failed:
+                    print(f"Warning: {failed} rows failed to ingest.")
+            elif mode == "single":
+                data = list(data)
+                print(f"Ingesting {len(data)} incidents...")
+                with PassageChunker() as chunker:
+                    session.execute_write(ingest_data, chunker(list(with_content_hash(data))))
+                
+                print("Creating issue links...")
+                session.execute_write(create_issue_links, data)
+            else:
+                print(f"Ingesting incidents in batches of {batch_size} ({workers} workers)...")
+                stats = ingest_batched(driver, data, batch_size, workers)
+                failed = stats["issues"]["failed_rows"] + stats["links"]["failed_rows"]
+                if failed:
+                    print(f"Warning: {failed} rows failed to ingest.")
+
+            if mode != "sync":
+                # sync_data refreshes only the rollups and timeline links its changes touched
+                from src.rollups import refresh_rollups
+                from src.timeline import refresh_timeline
+                print("Building rollups...")
+                refresh_rollups(driver, batch_size=batch_size, workers=workers)
+                print("Building timeline...")
+                refresh_timeline(driver, batch_size=batch_size, workers=workers)
             
-            print("Creating issue links...")
-            session.execute_write(create_issue_links, data)
+            session.execute_write(bump_graph_version)
             
             # Verification count
             result = session.run("MATCH (n) RETURN count(n) as count")
@@ -153,68 +467,60 @@ def main():
             
     except Exception as e:
         print(f"Error: {e}")
-    finally:
-        driver.close()
 
-def generate_embeddings(driver):
+def generate_embeddings(driver, embeddings_model=None, only_missing=True):
+    """
+    Embed Passage text (by default only passages without an embedding yet) and
+    create the vector index. `embeddings_model` defaults to the configured provider.
+    """
     print("Generating embeddings for Passages...")
-    from langchain_community.embeddings import OCIGenAIEmbeddings
-    from src.config import OCI_CONFIG_PROFILE, OCI_COMPARTMENT_ID, OCI_GENAI_ENDPOINT
-
-    embeddings_model = OCIGenAIEmbeddings(
-        model_id="cohere.embed-english-v3.0",
-        service_endpoint=OCI_GENAI_ENDPOINT,
-        compartment_id=OCI_COMPARTMENT_ID,
-        auth_profile=OCI_CONFIG_PROFILE
-    )
+    from src.embeddings import get_embeddings_model, embed_passages, create_vector_index
 
-    with driver.session(database=DATABASE) as session:
-        # Fetch all passages
-        result = session.run("MATCH (p:Passage) RETURN p.id AS id, p.text AS text")
-        passages = [{"id": record["id"], "text": record["text"]} for record in result]
-        
-        if not passages:
-            print("No passages found.")
-            return
+    if embeddings_model is None:
+        embeddings_model = get_embeddings_model()
 
-        print(f"Found {len(passages)} passages. Generating embeddings...")
-        
-        # Batch process (optional, but good for large data)
-        texts = [p["text"] for p in passages]
-        try:
-            embeddings = embeddings_model.embed_documents(texts)
-            
-            # Update graph
-            for i, passage in enumerate(passages):
-                session.run(
-                    "MATCH (p:Passage {id: $id}) CALL db.create.setNodeVectorProperty(p, 'embedding', $embedding)",
-                    id=passage["id"],
-                    embedding=embeddings[i]
-                )
-            
-            # Create Vector Index
-            session.run("""
-                CREATE VECTOR INDEX passage_embeddings IF NOT EXISTS
-                FOR (p:Passage) ON (p.embedding)
-                OPTIONS {indexConfig: {
-                 `vector.dimensions`: 1024,
-                 `vector.similarity_function`: 'cosine'
-                }}
-            """)
-            print("Embeddings generated and vector index created.")
-            
-        except Exception as e:
-            print(f"Failed to generate embeddings: {e}")
+    try:
+        stats = embed_passages(driver, embeddings_model, only_missing=only_missing)
+        if not stats["rows"] and not stats["failed_rows"]:
+            print("No passages to embed.")
+        if hasattr(embeddings_model, "stats"):
+            cache = embeddings_model.stats()
+            print(f"Embedding cache: {cache['hits']} hits, {cache['misses']} misses "
+                  f"({cache['hit_rate']:.0%} hit rate), {cache['entries']} entries")
+        if stats["failed_rows"]:
+            print(f"Warning: {stats['failed_rows']} passages could not be embedded.")
+
+        # Create Vector Index
+        with driver.session(database=DATABASE) as session:
+            session.execute_write(create_vector_index)
+            if stats["rows"]:
+                session.execute_write(bump_graph_version)
+        print("Embeddings generated and vector index created.")
+
+    except Exception as e:
+        print(f"Failed to generate embeddings: {e}")
 
 if __name__ == "__main__":
-    main()
-    # Re-open driver or pass it if we want to run this as part of main
-    # For now, let's just run it separately or call it at the end of main if we refactor main to return driver or take a flag
-    # But simpler: just create a new driver instance here or call it inside main
-    
-    # Refactoring main to call generate_embeddings
+    parser = argparse.ArgumentParser(description="Build the incident knowledge graph.")
+    parser.add_argument("--mode", choices=["single", "batched", "phased", "sync"], default="batched",
+                        help="single: one UNWIND transaction; batched: parallel batched transactions; "
+                             "phased: de-duplicated node phases, then one phase per relationship type; "
+                             "sync: keep the graph and upsert only new or changed issues")
+    parser.add_argument("--prune", action="store_true",
+                        help="with --mode sync, delete issues that are no longer in the data file")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    parser.add_argument("--skip-similarity", action="store_true",
+                        help="don't (re)compute SIMILAR_TO edges after embedding")
+    args = parser.parse_args()
+
+    main(mode=args.mode, batch_size=args.batch_size, workers=args.workers, prune=args.prune)
+    # Same shared driver (and connection pool) main() used
     driver = get_driver()
-    try:
-        generate_embeddings(driver)
-    finally:
-        driver.close()
+    generate_embeddings(driver)
+    if VECTOR_BACKEND == "local":
+        from src.vector_index import LocalVectorIndex
+        LocalVectorIndex().refresh(driver)
+    if not args.skip_similarity:
+        from src.similarity import compute_similarity
+        compute_similarity(driver)
@@ -0,0 +1,235 @@
+"""
+Cold-start path for large graphs: export the incidents as neo4j-admin import CSVs
+instead of MERGE-ing them transactionally.
+
+    python -m src.bulk_export export --output data/import
+    neo4j-admin database import full ...        # command printed by the export
+    python -m src.bulk_export finalize           # constraints, indexes, rollups, timeline, embeddings
+
+The export is one streaming pass over the data file (or shard directory).
+Reference entities (Product, Person, ...) are deduplicated by id with a seen-set
+that spills to SQLite past a fixed size, so memory stays bounded at any scale.
+Issues use their key as import ID so CLONES links need no key -> id lookup.
+Passages are chunked on the process pool as in the transactional path; chunk ids
+are content hashes, so a chunk shared by several issues is written once, with one
+FROM link per issue and one CHUNK_OF link per source. Issue rows carry the same content_hash that `--mode sync`
+computes, so later syncs only write real deltas.
+"""
+import argparse
+import csv
+import os
+import shlex
+import sqlite3
+import tempfile
+from src.builder import (
+    DIMENSIONS, ISSUE_FIELDS, SOURCE_FIELDS, PASSAGE_FIELDS, CHUNK_FIELDS, RELATIONSHIPS, TEMPORAL_FIELDS, _as_list,
+)
+from src.config import DATA_FILE, DATA_DIR, NEO4J_DATABASE
+from src.data_io import IncidentStream
+from src.passages import PassageChunker
+from src.sync import content_hash
+
+EXPORT_DIR = os.path.join(DATA_DIR, "import")
+# Distinct ids per label kept in memory before the seen-set spills to SQLite
+SEEN_MEMORY_KEYS = 1_000_000
+
+# Property columns of each reference label; the key column becomes the import ID
+DIMENSION_COLUMNS = {
+    "Product": ["id", "name"],
+    "Category": ["id", "name"],
+    "Person": ["account_id", "display_name", "email"],
+    "SlackChannel": ["id", "url"],
+    "Component": ["id", "name"],
+    "Label": ["id", "name"],
+}
+_TYPES = {"event_duration_ms": "long", "token_count": "long", "index": "int", "start": "int", "end": "int"}
+_TYPES.update({field: "localdatetime" for field in TEMPORAL_FIELDS})
+
+
+class SeenKeys:
+    """
+    Set of strings bounded in memory: the first `memory_keys` live in a Python
+    set, the rest in a temporary SQLite table.
+    """
+
+    def __init__(self, memory_keys=SEEN_MEMORY_KEYS):
+        self.memory_keys = memory_keys
+        self._memory = set()
+        self._db = None
+        self._path = None
+
+    def add(self, key):
+        """
+        Add `key`; returns False if it was already present.
+        """
+        if key in self._memory:
+            return False
+        if len(self._memory) < self.memory_keys:
+            self._memory.add(key)
+            return True
+        if self._db is None:
+            fd, self._path = tempfile.mkstemp(suffix=".sqlite")
+            os.close(fd)
+            self._db = sqlite3.connect(self._path)
+            self._db.execute("PRAGMA journal_mode = OFF")
+            self._db.execute("CREATE TABLE seen (key TEXT PRIMARY KEY)")
+        return self._db.execute("INSERT OR IGNORE INTO seen VALUES (?)", (key,)).rowcount == 1
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            os.remove(self._path)
+
+
+def _header(columns, id_column, id_space):
+    return [f"{c}:ID({id_space})" if c == id_column else (f"{c}:{_TYPES[c]}" if c in _TYPES else c)
+            for c in columns]
+
+
+def _value(value):
+    # neo4j-admin reads an empty field as "no property"
+    return "" if value is None else value
+
+
+def export_csv(data, output_dir=EXPORT_DIR, memory_keys=SEEN_MEMORY_KEYS):
+    """
+    Write nodes/<Label>.csv and relationships/<TYPE>.csv for neo4j-admin import.
+    Returns {"nodes": {label: (path, rows)}, "relationships": {type: (path, rows)}}.
+    """
+    os.makedirs(os.path.join(output_dir, "nodes"), exist_ok=True)
+    os.makedirs(os.path.join(output_dir, "relationships"), exist_ok=True)
+    files, writers, counts = [], {}, {}
+
+    def open_writer(kind, name, header):
+        path = os.path.join(output_dir, kind, f"{name}.csv")
+        f = open(path, "w", newline="", encoding="utf-8")
+        files.append(f)
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writers[(kind, name)] = writer
+        counts[(kind, name)] = [path, 0]
+
+    def write(kind, name, row):
+        writers[(kind, name)].writerow(row)
+        counts[(kind, name)][1] += 1
+
+    issue_columns = [c for c in ISSUE_FIELDS if c != "key"] + ["content_hash"]
+    open_writer("nodes", "Issue", ["key:ID(Issue)"] + _header(issue_columns, None, None))
+    open_writer("nodes", "Source", _header(SOURCE_FIELDS, "id", "Source"))
+    open_writer("nodes", "Passage", _header(PASSAGE_FIELDS, "id", "Passage"))
+    for label, key, _ in DIMENSIONS:
+        if ("nodes", label) not in writers:
+            open_writer("nodes", label, _header(DIMENSION_COLUMNS[label], key, label))
+    for rel_type, _, _, end_label, _, _ in RELATIONSHIPS:
+        open_writer("relationships", rel_type, [":START_ID(Issue)", f":END_ID({end_label})"])
+    open_writer("relationships", "FROM", [":START_ID(Passage)", ":END_ID(Issue)"])
+    open_writer("relationships", "CHUNK_OF",
+                [":START_ID(Passage)", ":END_ID(Source)"] + _header(CHUNK_FIELDS, None, None))
+    open_writer("relationships", "CLONES", [":START_ID(Issue)", ":END_ID(Issue)"])
+
+    seen = {label: SeenKeys(memory_keys) for label in list(DIMENSION_COLUMNS) + ["Passage"]}
+    chunker = PassageChunker()
+    try:
+        # Hashed before chunking, like sync_data hashes the rows as read
+        for row in chunker.iter_rows(dict(row, content_hash=content_hash(row)) for row in data):
+            issue_key = row["key"]
+            write("nodes", "Issue", [issue_key] + [_value(row.get(c)) for c in issue_columns])
+            for label, key, field in DIMENSIONS:
+                for entity in _as_list(row.get(field)):
+                    if seen[label].add(str(entity[key])):
+                        write("nodes", label, [_value(entity.get(c)) for c in DIMENSION_COLUMNS[label]])
+            for rel_type, _, _, _, end_key, field in RELATIONSHIPS:
+                for entity in _as_list(row.get(field)):
+                    write("relationships", rel_type, [issue_key, entity[end_key]])
+            passage_ids = set()
+            for src in row.get("passages") or []:
+                write("nodes", "Source", [_value(src.get(c)) for c in SOURCE_FIELDS])
+                # A chunk repeated within one source is one CHUNK_OF link, as MERGE
+                # makes it on the transactional path; the first occurrence is kept
+                chunk_ids = set()
+                for chunk in src["chunks"]:
+                    if seen["Passage"].add(chunk["id"]):
+                        write("nodes", "Passage", [chunk[c] for c in PASSAGE_FIELDS])
+                    if chunk["id"] not in chunk_ids:
+                        chunk_ids.add(chunk["id"])
+                        write("relationships", "CHUNK_OF",
+                              [chunk["id"], src["id"]] + [chunk[c] for c in CHUNK_FIELDS])
+                    if chunk["id"] not in passage_ids:
+                        passage_ids.add(chunk["id"])
+                        write("relationships", "FROM", [chunk["id"], issue_key])
+            if row.get("clones"):
+                write("relationships", "CLONES", [issue_key, row["clones"]])
+    finally:
+        chunker.close()
+        for f in files:
+            f.close()
+        for s in seen.values():
+            s.close()
+
+    result = {"nodes": {}, "relationships": {}}
+    for (kind, name), (path, rows) in counts.items():
+        result[kind][name] = (path, rows)
+    return result
+
+
+def import_command(export, database=NEO4J_DATABASE):
+    """
+    neo4j-admin command line importing `export` into an empty `database`.
+    """
+    args = ["neo4j-admin", "database", "import", "full", "--overwrite-destination",
+            "--id-type=string", "--multiline-fields=true",
+            # like the transactional path: duplicate rows are merged, CLONES to unknown keys dropped
+            "--skip-duplicate-nodes=true", "--skip-bad-relationships=true"]
+    for label, (path, _) in export["nodes"].items():
+        args.append(f"--nodes={label}={path}")
+    for rel_type, (path, _) in export["relationships"].items():
+        args.append(f"--relationships={rel_type}={path}")
+    args.append(database)
+    return " ".join(shlex.quote(a) for a in args)
+
+
+def finalize(driver):
+    """
+    Everything the transactional build does besides writing rows: constraints,
+    indexes, rollups, timeline, graph version, embeddings and SIMILAR_TO edges.
+    """
+    from src.builder import DATABASE, create_constraints, create_indexes, bump_graph_version, generate_embeddings
+    from src.rollups import refresh_rollups
+    from src.similarity import compute_similarity
+    from src.timeline import refresh_timeline
+
+    with driver.session(database=DATABASE) as session:
+        session.execute_write(create_constraints)
+        session.execute_write(create_indexes)
+        session.run("CALL db.awaitIndexes(600)")
+    refresh_rollups(driver)
+    refresh_timeline(driver)
+    with driver.session(database=DATABASE) as session:
+        session.execute_write(bump_graph_version)
+    generate_embeddings(driver)
+    compute_similarity(driver)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-import path: neo4j-admin CSV export and post-import steps.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="write neo4j-admin import CSVs")
+    export_parser.add_argument("--input", default=DATA_FILE, help="incidents file or shard directory")
+    export_parser.add_argument("--output", default=EXPORT_DIR)
+    export_parser.add_argument("--memory-keys", type=int, default=SEEN_MEMORY_KEYS,
+                               help="distinct ids per label kept in memory while deduplicating")
+    commands.add_parser("finalize", help="constraints, indexes, rollups, timeline and embeddings after the import")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export = export_csv(IncidentStream(args.input), args.output, args.memory_keys)
+        for kind, entries in export.items():
+            for name, (path, rows) in entries.items():
+                print(f"{kind[:-1]:<13} {name:<18} {rows:>10} rows  {path}")
+        print("\nStop the database, then import with:\n")
+        print(import_command(export))
+        print("\nStart it again and run: python -m src.bulk_export finalize")
+    else:
+        from src.connection import get_driver
+
+        finalize(get_driver())
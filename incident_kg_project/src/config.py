@@ -1,4 +1,5 @@
 import os
+import threading
 from dotenv import load_dotenv
 
 # Load environment variables from .env file in the project root
@@ -25,32 +26,14 @@ OCI_CONFIG_PROFILE = os.getenv("OCI_CONFIG_PROFILE", "DEFAULT")
 # Default to the user's standard OCI config path; resolves to /Users/chirabs/.oci/config on this machine
 OCI_CONFIG_FILE = os.getenv("OCI_CONFIG_FILE", os.path.expanduser("~/.oci/config"))
 
-# Defaults
-OCI_CONFIG = {}
-OCI_REGION = None
-OCI_TENANCY = None
-OCI_USER = None
-OCI_FINGERPRINT = None
-OCI_KEY_FILE = None
-
-try:
-    import oci  # type: ignore
-
-    # Load from ~/.oci/config (DEFAULT profile by default)
-    OCI_CONFIG = oci.config.from_file(
-        file_location=OCI_CONFIG_FILE, profile_name=OCI_CONFIG_PROFILE
-    )
-
-    # Commonly used fields
-    OCI_REGION = OCI_CONFIG.get("region")
-    OCI_TENANCY = OCI_CONFIG.get("tenancy")
-    OCI_USER = OCI_CONFIG.get("user")
-    OCI_FINGERPRINT = OCI_CONFIG.get("fingerprint")
-    OCI_KEY_FILE = OCI_CONFIG.get("key_file")
-except Exception:
-    # Leave OCI_* defaults as None if loading fails; LangChain/OCI clients may still
-    # work with alt auth methods or explicit env vars.
-    pass
+# The OCI SDK is slow to import, so the profile is only parsed the first time one of
+# the OCI_* values below is accessed (module __getattr__), not when config is imported.
+_OCI_LAZY_NAMES = (
+    "OCI_CONFIG", "OCI_REGION", "OCI_TENANCY", "OCI_USER", "OCI_FINGERPRINT",
+    "OCI_KEY_FILE", "OCI_COMPARTMENT_ID", "OCI_GENAI_ENDPOINT",
+)
+_oci_values = None
+_oci_lock = threading.Lock()
 
 
 def _genai_endpoint_from_region(region: str | None) -> str | None:
@@ -60,12 +43,171 @@ def _genai_endpoint_from_region(region: str | None) -> str | None:
     return f"https://inference.generativeai.us-chicago-1.oci.oraclecloud.com"
 
 
-# Compartment OCID: prefer env, else optional nonstandard key in ~/.oci/config
-OCI_COMPARTMENT_ID = os.getenv("OCI_COMPARTMENT_ID") or OCI_CONFIG.get("compartment_id")
+def _load_oci_profile():
+    # Defaults
+    config = {}
+    try:
+        import oci  # type: ignore
+
+        # Load from ~/.oci/config (DEFAULT profile by default)
+        config = oci.config.from_file(
+            file_location=OCI_CONFIG_FILE, profile_name=OCI_CONFIG_PROFILE
+        )
+    except Exception:
+        # Leave OCI_* defaults as None if loading fails; LangChain/OCI clients may still
+        # work with alt auth methods or explicit env vars.
+        pass
+    return config
+
+
+def _oci_value(name):
+    global _oci_values
+    # Env overrides don't need the profile at all
+    if name == "OCI_COMPARTMENT_ID" and os.getenv("OCI_COMPARTMENT_ID"):
+        return os.getenv("OCI_COMPARTMENT_ID")
+    if name == "OCI_GENAI_ENDPOINT" and os.getenv("OCI_GENAI_ENDPOINT"):
+        return os.getenv("OCI_GENAI_ENDPOINT")
+    with _oci_lock:
+        if _oci_values is None:
+            config = _load_oci_profile()
+            _oci_values = {
+                "OCI_CONFIG": config,
+                # Commonly used fields
+                "OCI_REGION": config.get("region"),
+                "OCI_TENANCY": config.get("tenancy"),
+                "OCI_USER": config.get("user"),
+                "OCI_FINGERPRINT": config.get("fingerprint"),
+                "OCI_KEY_FILE": config.get("key_file"),
+                # Compartment OCID: prefer env, else optional nonstandard key in ~/.oci/config
+                "OCI_COMPARTMENT_ID": os.getenv("OCI_COMPARTMENT_ID") or config.get("compartment_id"),
+                # GenAI endpoint: prefer env override, else derive from region in OCI profile
+                "OCI_GENAI_ENDPOINT": os.getenv("OCI_GENAI_ENDPOINT")
+                or _genai_endpoint_from_region(config.get("region")),
+            }
+    return _oci_values[name]
+
+
+def __getattr__(name):
+    if name in _OCI_LAZY_NAMES:
+        return _oci_value(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# GenAI endpoint: prefer env override, else derive from region in OCI profile
-OCI_GENAI_ENDPOINT = os.getenv("OCI_GENAI_ENDPOINT") or _genai_endpoint_from_region(OCI_REGION)
 
 # Paths
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
-DATA_FILE = os.path.join(DATA_DIR, "incidents.json")
+# incidents.json (JSON array), incidents.jsonl or incidents.jsonl.gz; the format is detected on read
+DATA_FILE = os.getenv("DATA_FILE") or os.path.join(DATA_DIR, "incidents.json")
+
+# Graph schema snapshot loaded at pipeline startup instead of introspecting, as long as
+# the graph version stamp has not changed since it was taken ("" disables)
+SCHEMA_SNAPSHOT_FILE = os.getenv("SCHEMA_SNAPSHOT_FILE", os.path.join(DATA_DIR, "schema_snapshot.json"))
+
+# Ingestion tuning
+# Rows per UNWIND transaction and number of concurrent writer sessions.
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "1000"))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "3"))
+
+# Passage chunking (src/passages.py): source texts are split into chunks of at most
+# CHUNK_TOKENS estimated tokens, consecutive chunks overlapping by CHUNK_OVERLAP_TOKENS,
+# on CHUNK_WORKERS processes. Identical chunks are stored (and embedded) once.
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "256"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", str(min(os.cpu_count() or 1, 8))))
+
+# Embeddings
+# EMBEDDING_PROVIDER: "oci" (OCI Gen AI) or "fake" (deterministic, offline; for tests and benchmarks)
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "oci")
+EMBEDDING_MODEL_ID = os.getenv("EMBEDDING_MODEL_ID", "cohere.embed-english-v3.0")
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "1024"))
+# Cohere accepts at most 96 texts per embed call
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "96"))
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "4"))
+# Persistent embedding cache shared by the builder and the RAG pipeline; set to "" to disable
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(PROJECT_ROOT, "data", "embedding_cache.sqlite"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "1000000"))
+
+# Vector search backend for RAGPipeline: "neo4j" (Neo4jVector) or "local" (in-process index
+# exported from the graph, see src/vector_index.py)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "neo4j")
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", os.path.join(PROJECT_ROOT, "data", "vector_index"))
+# Search the local index with a FAISS flat index instead of scanning the memory-mapped file;
+# faster per query, but FAISS keeps its own in-memory copy of every vector
+VECTOR_INDEX_FAISS = os.getenv("VECTOR_INDEX_FAISS", "0") == "1"
+
+# Answer cache for RAGPipeline.query. Entries expire after the TTL or when the builder
+# stamps a new graph version. ANSWER_CACHE_SEMANTIC=1 also lets paraphrases hit
+# (question embedding cosine similarity >= ANSWER_CACHE_SIMILARITY).
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "1") == "1"
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "600"))
+ANSWER_CACHE_SEMANTIC = os.getenv("ANSWER_CACHE_SEMANTIC", "0") == "1"
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+# How often the pipeline re-reads the graph version stamp
+GRAPH_VERSION_CHECK_SECONDS = float(os.getenv("GRAPH_VERSION_CHECK_SECONDS", "5"))
+
+# Chat model for the RAG pipeline: "oci" (OCI Gen AI) or "fake" (deterministic offline
+# stand-in from src/stub_llm.py; STUB_LLM_LATENCY_MS simulates model latency)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "oci")
+STUB_LLM_LATENCY_MS = float(os.getenv("STUB_LLM_LATENCY_MS", "0"))
+
+# Cache of parameterized Cypher per question template, so questions that differ only
+# by a literal (Component-3 vs Component-7) skip the Cypher-generation LLM call
+CYPHER_CACHE_ENABLED = os.getenv("CYPHER_CACHE_ENABLED", "1") == "1"
+CYPHER_CACHE_MAX_ENTRIES = int(os.getenv("CYPHER_CACHE_MAX_ENTRIES", "500"))
+
+# Query server (python -m src.server)
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8080"))
+# Pipeline queries running at once; further distinct questions queue up to SERVER_MAX_PENDING
+SERVER_MAX_CONCURRENCY = int(os.getenv("SERVER_MAX_CONCURRENCY", "8"))
+SERVER_MAX_PENDING = int(os.getenv("SERVER_MAX_PENDING", "64"))
+
+# Retrieval for "similar"/"passage" questions: "hybrid" expands vector hits through the
+# incident graph in one query; "passages" returns only the matching passage texts
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+HYBRID_TOP_K = int(os.getenv("HYBRID_TOP_K", "3"))
+# CLONES hops to follow from each hit (0 disables) and max items per neighbour list
+HYBRID_HOP_DEPTH = int(os.getenv("HYBRID_HOP_DEPTH", "2"))
+HYBRID_FANOUT = int(os.getenv("HYBRID_FANOUT", "5"))
+
+# SIMILAR_TO edges between issues (src/similarity.py): neighbours per issue and rows
+# scored per block (block x issues float32 scores are held in memory at a time)
+SIMILARITY_TOP_K = int(os.getenv("SIMILARITY_TOP_K", "10"))
+SIMILARITY_BLOCK_SIZE = int(os.getenv("SIMILARITY_BLOCK_SIZE", "256"))
+
+# Every Text2Cypher query the pipeline executes is appended here (JSONL) for the index
+# advisor, python -m src.index_advisor ("" disables)
+CYPHER_LOG_PATH = os.getenv("CYPHER_LOG_PATH", os.path.join(DATA_DIR, "cypher_log.jsonl"))
+# Once the log exceeds this size it is rotated to CYPHER_LOG_PATH + ".1" (one old file is kept)
+CYPHER_LOG_MAX_BYTES = int(os.getenv("CYPHER_LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Per-stage tracing of RAGPipeline.query (src/tracing.py): "" (off, no overhead),
+# "jsonl" (one span per line) or "otlp" (OpenTelemetry OTLP/JSON, one trace per line)
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "")
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join(DATA_DIR, "traces.jsonl"))
+
+# Shared Neo4j driver (src/connection.py) used by the builder, the pipeline and the tools.
+# The pool must cover INGEST_WORKERS writer sessions plus SERVER_MAX_CONCURRENCY queries
+# when both run in one process; connections older than the lifetime are replaced so
+# load balancers / firewalls never cut them mid-query.
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+NEO4J_CONNECTION_LIFETIME_SECONDS = float(os.getenv("NEO4J_CONNECTION_LIFETIME_SECONDS", "1800"))
+NEO4J_ACQUISITION_TIMEOUT_SECONDS = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT_SECONDS", "60"))
+# Time budget for retrying transient errors (deadlocks, leader switches, lost connections)
+NEO4J_MAX_RETRY_SECONDS = float(os.getenv("NEO4J_MAX_RETRY_SECONDS", "30"))
+
+# Text2Cypher prompt: only the labels, relationships and properties a question refers to
+# go into the schema section (src/schema_select.py), within this many estimated tokens
+SCHEMA_PRUNING_ENABLED = os.getenv("SCHEMA_PRUNING_ENABLED", "1") == "1"
+SCHEMA_TOKEN_BUDGET = int(os.getenv("SCHEMA_TOKEN_BUDGET", "600"))
+
+# Guard for LLM-generated Cypher (src/cypher_guard.py): write clauses are rejected,
+# variable-length patterns capped at GUARD_MAX_HOPS, a LIMIT added where missing, and
+# plans estimated above GUARD_MAX_ESTIMATED_ROWS rows refused. Queries still running
+# after GUARD_TIMEOUT_SECONDS are cancelled by the server.
+GUARD_ENABLED = os.getenv("GUARD_ENABLED", "1") == "1"
+GUARD_MAX_ROWS = int(os.getenv("GUARD_MAX_ROWS", "1000"))
+GUARD_MAX_HOPS = int(os.getenv("GUARD_MAX_HOPS", "5"))
+GUARD_MAX_ESTIMATED_ROWS = float(os.getenv("GUARD_MAX_ESTIMATED_ROWS", "1000000"))
+GUARD_TIMEOUT_SECONDS = float(os.getenv("GUARD_TIMEOUT_SECONDS", "10"))
@@ -0,0 +1,191 @@
+"""
+One Neo4j driver per process, shared by the builder, the RAG pipeline and the
+command line tools, so they draw on a single tuned connection pool instead of
+each opening their own.
+
+- get_driver() builds the driver on first use with the NEO4J_* pool settings
+  from src/config.py and closes it at interpreter exit. Callers must not close
+  it themselves.
+- read_query() / write_query() run one statement as a managed transaction via
+  driver.execute_query: transient errors are retried for up to
+  NEO4J_MAX_RETRY_SECONDS, and with a neo4j:// URI reads are routed to
+  followers / read replicas while writes go to the leader.
+- stream_read() yields rows as they arrive, for progressive display.
+- get_graph() is a LangChain Neo4jGraph on the shared driver whose queries are
+  routed as reads. Besides query(), it exposes its `database` and `driver` and
+  read() / stream() with a per-query timeout; is_shared_graph() tells it apart
+  from other GraphStores (benchmark stand-ins).
+- pool_metrics() reports how many pooled connections are in use.
+"""
+import atexit
+import threading
+from src.config import (
+    NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD, NEO4J_DATABASE,
+    NEO4J_MAX_POOL_SIZE, NEO4J_CONNECTION_LIFETIME_SECONDS,
+    NEO4J_ACQUISITION_TIMEOUT_SECONDS, NEO4J_MAX_RETRY_SECONDS,
+)
+
+DATABASE = NEO4J_DATABASE
+
+_driver = None
+_driver_lock = threading.Lock()
+_graph_class = None
+
+
+def get_driver():
+    """
+    The process-wide driver, created on first call.
+    """
+    global _driver
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                from neo4j import GraphDatabase
+
+                _driver = GraphDatabase.driver(
+                    NEO4J_URI,
+                    auth=(NEO4J_USERNAME, NEO4J_PASSWORD),
+                    max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+                    max_connection_lifetime=NEO4J_CONNECTION_LIFETIME_SECONDS,
+                    connection_acquisition_timeout=NEO4J_ACQUISITION_TIMEOUT_SECONDS,
+                    max_transaction_retry_time=NEO4J_MAX_RETRY_SECONDS,
+                )
+    return _driver
+
+
+def close_driver():
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
+
+
+atexit.register(close_driver)
+
+
+def _execute(cypher, params, routing, database, timeout):
+    from neo4j import Query
+
+    records, summary, _ = get_driver().execute_query(
+        Query(cypher, timeout=timeout), params or {}, routing_=routing, database_=database,
+    )
+    return [record.data() for record in records], summary
+
+
+def read_query(cypher, params=None, database=DATABASE, timeout=None):
+    """
+    Run a read-only statement on a reader. Returns (rows as dicts, result summary).
+    """
+    from neo4j import RoutingControl
+    return _execute(cypher, params, RoutingControl.READ, database, timeout)
+
+
+def write_query(cypher, params=None, database=DATABASE, timeout=None):
+    """
+    Run a statement on the leader. Returns (rows as dicts, result summary).
+    """
+    from neo4j import RoutingControl
+    return _execute(cypher, params, RoutingControl.WRITE, database, timeout)
+
+
+def stream_read(cypher, params=None, database=DATABASE, timeout=None, fetch_size=100):
+    """
+    Yield the rows of a read-only statement as dicts while the server streams
+    them, `fetch_size` records per round trip. Not retried, since rows already
+    handed out cannot be taken back; closing the generator early discards the
+    rest of the result.
+    """
+    from neo4j import Query, READ_ACCESS
+
+    with get_driver().session(database=database, default_access_mode=READ_ACCESS,
+                              fetch_size=fetch_size) as session:
+        for record in session.run(Query(cypher, timeout=timeout), params or {}):
+            yield record.data()
+
+
+def get_graph(database=DATABASE, timeout=None):
+    """
+    LangChain Neo4jGraph backed by the shared driver. The schema is not loaded;
+    call refresh_schema() (or the pipeline's load_schema) for that.
+    """
+    global _graph_class
+    if _graph_class is None:
+        from langchain_community.graphs import Neo4jGraph
+
+        class SharedNeo4jGraph(Neo4jGraph):
+            # Neo4jGraph.__init__ would open a driver of its own; set its state directly
+            def __init__(self, database, timeout=None):
+                self._driver = get_driver()
+                self._database = database
+                self.timeout = timeout
+                self.sanitize = False
+                self._enhanced_schema = False
+                self.schema = ""
+                self.structured_schema = {}
+
+            @property
+            def database(self):
+                return self._database
+
+            @property
+            def driver(self):
+                return self._driver
+
+            def query(self, query, params={}):
+                return read_query(query, params, self._database, self.timeout)[0]
+
+            def read(self, query, params=None, timeout=None):
+                # (rows, result summary), cancelled server-side after `timeout` seconds
+                return read_query(query, params, self._database, timeout or self.timeout)
+
+            def stream(self, query, params=None, timeout=None, fetch_size=100):
+                return stream_read(query, params, self._database, timeout or self.timeout, fetch_size)
+
+        _graph_class = SharedNeo4jGraph
+    return _graph_class(database, timeout)
+
+
+def is_shared_graph(graph):
+    """
+    Whether `graph` came from get_graph() (and so has read(), stream(), driver).
+    """
+    return _graph_class is not None and isinstance(graph, _graph_class)
+
+
+def adopt_shared_driver(store):
+    """
+    Point a LangChain Neo4j store that opened its own driver (Neo4jVector) at the
+    shared one, closing the private driver. Returns `store`.
+    """
+    own = getattr(store, "_driver", None)
+    store._driver = get_driver()
+    if own is not None and own is not store._driver:
+        own.close()
+    return store
+
+
+def pool_metrics():
+    """
+    Connection pool usage of the shared driver: {"max_size", "in_use", "idle",
+    "utilization", "addresses": {address: {"in_use", "idle"}}}. Reads the
+    driver's internal pool, so it degrades to the configured size alone if that
+    layout changes; empty before the driver is first used.
+    """
+    if _driver is None:
+        return {}
+    metrics = {"max_size": NEO4J_MAX_POOL_SIZE, "in_use": 0, "idle": 0,
+               "utilization": 0.0, "addresses": {}}
+    connections = getattr(getattr(_driver, "_pool", None), "connections", None)
+    if connections is None:
+        return metrics
+    for address, pooled in list(connections.items()):
+        pooled = list(pooled)
+        in_use = sum(1 for c in pooled if getattr(c, "in_use", False))
+        metrics["addresses"][str(address)] = {"in_use": in_use, "idle": len(pooled) - in_use}
+        metrics["in_use"] += in_use
+        metrics["idle"] += len(pooled) - in_use
+    # The pool size limit applies per server address
+    busiest = max((a["in_use"] for a in metrics["addresses"].values()), default=0)
+    metrics["utilization"] = busiest / NEO4J_MAX_POOL_SIZE
+    return metrics
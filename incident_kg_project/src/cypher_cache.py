@@ -0,0 +1,147 @@
+import re
+import threading
+from collections import OrderedDict
+from src.answer_cache import normalize_question
+
+# Literals that vary between otherwise identical questions: quoted strings,
+# dates, identifiers carrying a number (Component-3, INC-1234, Sev1) and numbers.
+_LITERAL = re.compile(
+    r"'([^']+)'"
+    r'|"([^"]+)"'
+    r"|\b(\d{4}-\d{2}-\d{2})\b"
+    r"|\b([A-Za-z][\w]*-\d+|[A-Za-z]+\d+)\b"
+    r"|\b(\d+(?:\.\d+)?)\b"
+)
+_NUMBER = re.compile(r"^\d+(?:\.\d+)?$")
+# Kind of an identifier literal: "Component-" in Component-3, "Sev" in Sev1
+_PREFIX = re.compile(r"\D+")
+_CYPHER_STRING = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+
+
+def _coerce(value):
+    if _NUMBER.match(value):
+        return float(value) if "." in value else int(value)
+    return value
+
+
+def templatize(question):
+    """
+    Split a question into a template and its literals:
+    "Issues for Component-3?" -> ("issues for component-<p0>", {"p0": "Component-3"})
+    An identifier's alphabetic prefix stays in the template, so questions about
+    Component-3, Product-2 and INC-1234 never share (and reuse) one plan.
+    """
+    params = {}
+
+    def replace(match):
+        name = f"p{len(params)}"
+        params[name] = _coerce(next(g for g in match.groups() if g is not None))
+        prefix = _PREFIX.match(match.group(4)).group(0) if match.group(4) else ""
+        return f"{prefix}<{name}>"
+
+    template = _LITERAL.sub(replace, question)
+    return normalize_question(template), params
+
+
+def parameterize(cypher, params):
+    """
+    Replace each question literal in generated Cypher with its $parameter.
+    Returns None when that can't be done unambiguously (a literal is missing,
+    was rewritten by the model, or two literals share a value), in which case
+    the Cypher is used once and not cached.
+    """
+    values = [str(v) for v in params.values()]
+    if len(set(values)) != len(values):
+        return None
+
+    # Work on string literals and bare tokens separately so a number is never
+    # substituted inside an unrelated string.
+    pieces = []
+    last = 0
+    for match in _CYPHER_STRING.finditer(cypher):
+        pieces.append(("code", cypher[last:match.start()]))
+        pieces.append(("string", match.group(0)))
+        last = match.end()
+    pieces.append(("code", cypher[last:]))
+
+    for name, value in params.items():
+        text = str(value)
+        found = 0
+        for i, (kind, piece) in enumerate(pieces):
+            if kind == "string" and piece[1:-1] == text:
+                pieces[i] = ("param", f"${name}")
+                found += 1
+            elif kind == "string" and text in piece:
+                return None
+            elif kind == "code" and isinstance(value, str) and text in piece:
+                return None
+            elif kind == "code" and isinstance(value, (int, float)):
+                pattern = re.compile(rf"(?<![\w.$]){re.escape(text)}(?![\w.])")
+                piece, count = pattern.subn(f"${name}", piece)
+                pieces[i] = (kind, piece)
+                found += count
+        if not found:
+            return None
+    return "".join(piece for _, piece in pieces)
+
+
+def is_stale_plan(error):
+    """
+    Whether a failed cached plan should be dropped and regenerated: the server
+    refused the statement itself (syntax, semantics, unknown names after a schema
+    change). Guard rejections, timeouts and connection errors say nothing about
+    the plan and are raised as they are.
+    """
+    from neo4j.exceptions import ClientError
+    from src.cypher_guard import QueryRejected, is_timeout
+
+    if isinstance(error, QueryRejected) or is_timeout(error):
+        return False
+    # Neo4jGraph.query reports Cypher syntax errors as ValueError
+    return isinstance(error, (ClientError, ValueError))
+
+
+class CypherPlanCache:
+    """
+    LRU map of question template -> parameterized Cypher. Only Cypher that has
+    executed successfully with its parameters is stored.
+    """
+
+    def __init__(self, max_entries=500):
+        self.max_entries = max_entries
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+
+    def get(self, template):
+        with self._lock:
+            cypher = self._plans.get(template)
+            if cypher is None:
+                self.misses += 1
+                return None
+            self._plans.move_to_end(template)
+            self.hits += 1
+            return cypher
+
+    def put(self, template, cypher):
+        with self._lock:
+            self._plans[template] = cypher
+            self._plans.move_to_end(template)
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+
+    def discard(self, template):
+        with self._lock:
+            self._plans.pop(template, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "uncacheable": self.uncacheable,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._plans),
+        }
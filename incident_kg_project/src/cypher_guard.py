@@ -0,0 +1,240 @@
+"""
+Execution guard for LLM-generated Cypher.
+
+GraphCypherQAChain has to be built with allow_dangerous_requests=True, so the
+pipeline runs every generated statement through CypherGuard.check() first:
+
+1. Write clauses (CREATE, MERGE, SET, DELETE, REMOVE, DROP, LOAD CSV, ...) and
+   procedures outside an allow-list are rejected.
+2. Unbounded variable-length patterns ([:CLONES*], [*2..]) are capped at
+   GUARD_MAX_HOPS hops; longer explicit bounds are lowered to it.
+3. A final RETURN without LIMIT gets `LIMIT GUARD_MAX_ROWS`.
+4. With a driver, the statement is EXPLAINed: anything the planner does not
+   classify as read-only is rejected, as is a plan whose largest estimated
+   row count exceeds GUARD_MAX_ESTIMATED_ROWS (Cartesian products, unanchored
+   traversals).
+
+Checked statements are cached, so a repeated plan costs no extra EXPLAIN.
+The pipeline runs the result with a server-side transaction timeout of
+GUARD_TIMEOUT_SECONDS (the server cancels the transaction when it expires) and
+stops streaming rows at the same deadline. Per-transaction memory is capped by
+the server's db.memory.transaction.max setting, which clients cannot raise.
+"""
+import re
+import threading
+from collections import OrderedDict
+from src.config import (
+    NEO4J_DATABASE, GUARD_MAX_ROWS, GUARD_MAX_HOPS, GUARD_MAX_ESTIMATED_ROWS, GUARD_TIMEOUT_SECONDS,
+)
+from src.index_advisor import plan_arguments
+
+DATABASE = NEO4J_DATABASE
+
+_CHECKED_CACHE_SIZE = 1000
+_STRINGS_AND_COMMENTS = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`|//[^\n]*|/\*.*?\*/", re.S)
+_WRITE_CLAUSE = re.compile(
+    r"\b(CREATE|MERGE|SET|DELETE|DETACH|REMOVE|DROP|FOREACH|LOAD\s+CSV|IN\s+TRANSACTIONS|"
+    r"GRANT|DENY|REVOKE|ALTER|RENAME|START\s+DATABASE|STOP\s+DATABASE|TERMINATE)\b",
+    re.IGNORECASE,
+)
+_PROCEDURE_CALL = re.compile(r"\bCALL\s+([\w.]+)\s*\(", re.IGNORECASE)
+# Read-only procedures generated Cypher may call
+ALLOWED_PROCEDURES = ("db.index.fulltext.querynodes", "db.index.vector.querynodes", "db.labels",
+                      "db.relationshiptypes", "db.propertykeys")
+# `*`, `*3`, `*2..`, `*..5`, `*1..4` inside a relationship pattern
+_VAR_LENGTH = re.compile(r"(\[[^\[\]]*?)\*\s*(\d*)\s*(\.\.)?\s*(\d*)(\s*[\]{])")
+_RETURN = re.compile(r"\bRETURN\b", re.IGNORECASE)
+_LIMIT = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+
+
+class QueryRejected(Exception):
+    """
+    Generated Cypher the guard refused to run.
+    """
+
+
+class QueryTimedOut(QueryRejected):
+    """
+    Generated Cypher cancelled after GUARD_TIMEOUT_SECONDS.
+    """
+
+
+def _mask(cypher):
+    # Same length as `cypher`, with string literals, quoted names and comments blanked,
+    # so keyword searches and offsets only see code
+    return _STRINGS_AND_COMMENTS.sub(lambda m: " " * len(m.group(0)), cypher)
+
+
+def write_clauses(cypher):
+    """
+    Write clauses and disallowed procedure calls in `cypher`, upper-cased.
+    """
+    code = _mask(cypher)
+    found = [" ".join(m.group(1).upper().split()) for m in _WRITE_CLAUSE.finditer(code)]
+    found += [f"CALL {name}" for name in _PROCEDURE_CALL.findall(code)
+              if name.lower() not in ALLOWED_PROCEDURES]
+    return found
+
+
+def cap_var_length(cypher, max_hops=GUARD_MAX_HOPS):
+    """
+    Give every variable-length relationship pattern an upper bound of at most
+    `max_hops`. Returns (cypher, number of patterns changed).
+    """
+    code = _mask(cypher)
+    pieces, last, changed = [], 0, 0
+    for match in _VAR_LENGTH.finditer(code):
+        low, dots, high = match.group(2), match.group(3), match.group(4)
+        if dots:
+            upper = int(high) if high else None
+        else:
+            # `*3` is exactly three hops; a bare `*` is unbounded
+            upper = int(low) if low else None
+            low = low or "1"
+        if upper is not None and upper <= max_hops:
+            continue
+        start, end = match.end(1), match.start(5)
+        pieces.append(cypher[last:start])
+        pieces.append(f"*{min(int(low or 1), max_hops)}..{max_hops}")
+        last = end
+        changed += 1
+    pieces.append(cypher[last:])
+    return "".join(pieces), changed
+
+
+def _strip_trailing_comments(cypher):
+    # `cypher` without the comments (and whitespace) after its last code token
+    end = len(cypher)
+    for match in reversed(list(_STRINGS_AND_COMMENTS.finditer(cypher))):
+        if cypher[match.end():end].strip() or not match.group(0).startswith(("//", "/*")):
+            break
+        end = match.start()
+    return cypher[:end]
+
+
+def ensure_limit(cypher, max_rows=GUARD_MAX_ROWS):
+    """
+    Append `LIMIT max_rows` when the final RETURN has none. Returns (cypher, added).
+    Trailing comments are dropped and the LIMIT goes on its own line, so a `//`
+    comment can never swallow it.
+    """
+    code = _mask(cypher)
+    returns = list(_RETURN.finditer(code))
+    if not returns or _LIMIT.search(code, returns[-1].end()) or re.search(r"\bUNION\b", code, re.I):
+        return cypher, False
+    statement = _strip_trailing_comments(cypher).rstrip().rstrip(";").rstrip()
+    return f"{statement}\nLIMIT {max_rows}", True
+
+
+def _operators(plan):
+    yield plan
+    for child in plan.get("children", []):
+        yield from _operators(child)
+
+
+def estimated_rows(plan):
+    """
+    Largest planner row estimate over the operators of an EXPLAIN plan.
+    """
+    return max((float(plan_arguments(op).get("EstimatedRows", 0)) for op in _operators(plan)), default=0.0)
+
+
+class CypherGuard:
+    """
+    Checks (and where safe, rewrites) generated Cypher before it runs. `driver`
+    is optional: without one, only the static checks apply.
+    """
+
+    def __init__(self, driver=None, database=DATABASE, max_rows=GUARD_MAX_ROWS, max_hops=GUARD_MAX_HOPS,
+                 max_estimated_rows=GUARD_MAX_ESTIMATED_ROWS, timeout_seconds=GUARD_TIMEOUT_SECONDS):
+        self.driver = driver
+        self.database = database
+        self.max_rows = max_rows
+        self.max_hops = max_hops
+        self.max_estimated_rows = max_estimated_rows
+        self.timeout_seconds = timeout_seconds
+        self._checked = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.rewritten = 0
+        self.timed_out = 0
+
+    def check(self, cypher, params=None):
+        """
+        Cypher safe to run: `cypher` itself or a rewrite with capped traversals
+        and a LIMIT. Raises QueryRejected. Returns (cypher, {"rewrites": [...],
+        "estimated_rows": float or None}).
+        """
+        with self._lock:
+            cached = self._checked.get(cypher)
+            if cached is not None:
+                self._checked.move_to_end(cypher)
+        if cached is not None:
+            if isinstance(cached, QueryRejected):
+                self.rejected += 1
+                raise cached
+            return cached
+
+        try:
+            result = self._check(cypher, params)
+        except QueryRejected as e:
+            self.rejected += 1
+            self._remember(cypher, e)
+            raise
+        if result[1]["rewrites"]:
+            self.rewritten += 1
+        self._remember(cypher, result)
+        return result
+
+    def _remember(self, cypher, result):
+        with self._lock:
+            self._checked[cypher] = result
+            while len(self._checked) > _CHECKED_CACHE_SIZE:
+                self._checked.popitem(last=False)
+
+    def _check(self, cypher, params):
+        writes = write_clauses(cypher)
+        if writes:
+            raise QueryRejected(f"write clause not allowed: {', '.join(sorted(set(writes)))}")
+        rewrites = []
+        guarded, capped = cap_var_length(cypher, self.max_hops)
+        if capped:
+            rewrites.append(f"capped {capped} variable-length pattern(s) at {self.max_hops} hops")
+        guarded, limited = ensure_limit(guarded, self.max_rows)
+        if limited:
+            rewrites.append(f"added LIMIT {self.max_rows}")
+
+        estimate = None
+        if self.driver is not None:
+            summary = self._explain(guarded, params)
+            if summary.query_type not in (None, "r"):
+                raise QueryRejected(f"planner classifies the query as {summary.query_type!r}, not read-only")
+            if summary.plan:
+                estimate = estimated_rows(summary.plan)
+                if estimate > self.max_estimated_rows:
+                    raise QueryRejected(f"estimated {estimate:,.0f} rows exceeds the limit of "
+                                        f"{self.max_estimated_rows:,.0f}")
+        return guarded, {"rewrites": rewrites, "estimated_rows": estimate}
+
+    def _explain(self, cypher, params):
+        from neo4j import unit_of_work
+
+        # Transaction functions take the timeout from unit_of_work; tx.run
+        # rejects Query objects
+        @unit_of_work(timeout=self.timeout_seconds)
+        def run(tx):
+            return tx.run("EXPLAIN " + cypher, params or {}).consume()
+
+        with self.driver.session(database=self.database) as session:
+            return session.execute_read(run)
+
+    def stats(self):
+        return {"rejected": self.rejected, "rewritten": self.rewritten, "timed_out": self.timed_out}
+
+
+def is_timeout(error):
+    """
+    Whether a driver error is the server cancelling a transaction for its timeout.
+    """
+    code = getattr(error, "code", None) or ""
+    return "TransactionTimedOut" in code or "Terminated" in code
@@ -0,0 +1,147 @@
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+
+# Incident files come in three shapes, detected from content rather than name:
+#   - a JSON array (the original pretty-printed incidents.json)
+#   - JSON Lines, one incident per line
+#   - either of the above gzip-compressed
+# A directory stands for all the *.json* files in it, read in name order (the
+# shards written by src/sharded_generator.py).
+GZIP_MAGIC = b"\x1f\x8b"
+READ_CHUNK_SIZE = 1 << 16
+_SEPARATORS = re.compile(r"[\s,]*")
+
+
+def content_hash(value):
+    """
+    Stable SHA-256 of any JSON-serializable value (an incident row: what
+    `--mode sync` compares to find changed issues).
+    """
+    payload = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _open_text(path, mode="r", compresslevel=9):
+    if "r" in mode:
+        with open(path, "rb") as f:
+            compressed = f.read(2) == GZIP_MAGIC
+    else:
+        compressed = path.endswith(".gz")
+    if compressed:
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=compresslevel)
+    return open(path, mode, encoding="utf-8")
+
+
+def incident_files(path):
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "*.json*")))
+    return [path]
+
+
+def detect_format(path):
+    """
+    Return "json" for a JSON array file or "jsonl" for JSON Lines (gzip or not).
+    For a directory, the format of its first file.
+    """
+    files = incident_files(path)
+    if not files:
+        raise ValueError(f"No incident files in {path}")
+    with _open_text(files[0]) as f:
+        while True:
+            ch = f.read(1)
+            if not ch:
+                return "jsonl"
+            if not ch.isspace():
+                return "json" if ch == "[" else "jsonl"
+
+
+def _iter_json_array(f):
+    # Incrementally decode the elements of a top-level JSON array so that only
+    # one element (plus a read chunk) is held in memory at a time. `pos` walks
+    # the buffer; consumed text is only dropped when the next chunk is read.
+    decoder = json.JSONDecoder()
+    buf = f.read(READ_CHUNK_SIZE).lstrip()
+    if not buf.startswith("["):
+        raise ValueError("Expected a JSON array")
+    pos, eof = 1, False
+    while True:
+        pos = _SEPARATORS.match(buf, pos).end()
+        if pos == len(buf):
+            if eof:
+                raise ValueError("Unterminated JSON array")
+            buf, pos = f.read(READ_CHUNK_SIZE), 0
+            eof = not buf
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            obj, pos = decoder.raw_decode(buf, pos)
+        except ValueError:
+            if eof:
+                raise
+            chunk = f.read(READ_CHUNK_SIZE)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        yield obj
+
+
+def iter_incidents(path):
+    """
+    Yield incident dicts one at a time from any supported file format, or from
+    every file in a directory of shards.
+    """
+    for file in incident_files(path):
+        fmt = detect_format(file)
+        with _open_text(file) as f:
+            if fmt == "json":
+                yield from _iter_json_array(f)
+            else:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield json.loads(line)
+
+
+class IncidentStream:
+    """
+    Re-iterable view over an incidents file. Every iteration re-opens the file,
+    so multi-pass loaders (issues, then links) never hold the whole file in memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = detect_format(path)
+
+    def __iter__(self):
+        return iter_incidents(self.path)
+
+
+def load_incidents(path):
+    return list(iter_incidents(path))
+
+
+def write_incidents(path, issues, compresslevel=9):
+    """
+    Write incidents to `path`. `.jsonl` / `.jsonl.gz` produce JSON Lines and are
+    written row by row, so `issues` may be a generator; anything else is written
+    as an indented JSON array like the original incidents.json.
+    `compresslevel` applies to .gz paths. Returns the number of incidents written.
+    """
+    count = 0
+    name = path[:-3] if path.endswith(".gz") else path
+    with _open_text(path, "w", compresslevel) as f:
+        if name.endswith(".jsonl"):
+            for issue in issues:
+                f.write(json.dumps(issue, separators=(",", ":")))
+                f.write("\n")
+                count += 1
+        else:
+            issues = list(issues)
+            json.dump(issues, f, indent=2)
+            count = len(issues)
+    return count
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from langchain_core.embeddings import Embeddings
+
+
+def cache_key(model_id, text, kind="document"):
+    """
+    Content address of an embedding: SHA-256 over (model_id, kind, text).
+    Queries and documents are keyed separately since some models embed them differently.
+    """
+    digest = hashlib.sha256()
+    for part in (model_id, kind, text or ""):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk store of float32 vectors in SQLite with size-bounded LRU eviction.
+    Safe to share across threads.
+    """
+
+    def __init__(self, path, max_entries=1_000_000):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_lru ON embeddings (last_access)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT count(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys):
+        """
+        Return {key: vector} for the keys present in the cache.
+        """
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            # SQLite limits the number of bound parameters per statement
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_access = ? WHERE key IN ({marks})",
+                        [time.time()] + chunk,
+                    )
+            self._conn.commit()
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, items):
+        """
+        Store (key, vector) pairs, evicting least recently used entries over max_entries.
+        """
+        now = time.time()
+        rows = [(key, array("f", vector).tobytes(), now) for key, vector in items]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)", rows
+            )
+            self._size += self._conn.total_changes - before
+            overflow = self._size - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_access LIMIT ?)", (overflow,)
+                )
+                self._size -= overflow
+                self.evictions += overflow
+            self._conn.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": self._size,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps any LangChain embedding model; only texts missing from the cache
+    are sent to the underlying model.
+    """
+
+    def __init__(self, model, cache, model_id):
+        self.model = model
+        self.cache = cache
+        self.model_id = model_id
+
+    def embed_documents(self, texts):
+        keys = [cache_key(self.model_id, text) for text in texts]
+        found = self.cache.get_many(keys)
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        if missing:
+            vectors = self.model.embed_documents(list(missing.values()))
+            computed = list(zip(missing.keys(), vectors))
+            self.cache.put_many(computed)
+            found.update(computed)
+        return [found[key] for key in keys]
+
+    def embed_query(self, text):
+        key = cache_key(self.model_id, text, kind="query")
+        found = self.cache.get_many([key])
+        if key in found:
+            return found[key]
+        vector = self.model.embed_query(text)
+        self.cache.put_many([(key, vector)])
+        return vector
+
+    def stats(self):
+        return self.cache.stats()
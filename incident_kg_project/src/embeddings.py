@@ -0,0 +1,112 @@
+from src.config import (
+    NEO4J_DATABASE, INGEST_MAX_RETRIES, OCI_CONFIG_PROFILE,
+    EMBEDDING_PROVIDER, EMBEDDING_MODEL_ID, EMBEDDING_DIMENSIONS,
+    EMBEDDING_BATCH_SIZE, EMBEDDING_WORKERS,
+    EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES,
+)
+from src.ingest import run_batched
+
+DATABASE = NEO4J_DATABASE
+
+# Passages are read in pages of this size (keyset pagination on id), so the
+# full text corpus is never held in memory at once.
+PASSAGE_PAGE_SIZE = 10000
+
+
+_caches = {}
+
+
+def get_embedding_cache(path=EMBEDDING_CACHE_PATH):
+    # One SQLite connection per cache file per process
+    if path not in _caches:
+        from src.embedding_cache import EmbeddingCache
+        _caches[path] = EmbeddingCache(path, max_entries=EMBEDDING_CACHE_MAX_ENTRIES)
+    return _caches[path]
+
+
+def get_embeddings_model(provider=EMBEDDING_PROVIDER, model_id=EMBEDDING_MODEL_ID,
+                         cache_path=EMBEDDING_CACHE_PATH, **kwargs):
+    """
+    Initialize the configured embedding model, wrapped in the persistent embedding
+    cache unless `cache_path` is empty. Any object with LangChain's
+    embed_documents / embed_query interface can be used in its place.
+    Extra keyword arguments are passed to OCIGenAIEmbeddings.
+    """
+    if provider == "fake":
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        model = DeterministicFakeEmbedding(size=EMBEDDING_DIMENSIONS)
+        model_id = f"fake-{EMBEDDING_DIMENSIONS}"
+    else:
+        from langchain_community.embeddings import OCIGenAIEmbeddings
+        from src.config import OCI_COMPARTMENT_ID, OCI_GENAI_ENDPOINT
+        model = OCIGenAIEmbeddings(
+            model_id=model_id,
+            service_endpoint=OCI_GENAI_ENDPOINT,
+            compartment_id=OCI_COMPARTMENT_ID,
+            auth_profile=OCI_CONFIG_PROFILE,
+            **kwargs
+        )
+
+    if not cache_path:
+        return model
+    from src.embedding_cache import CachedEmbeddings
+    return CachedEmbeddings(model, get_embedding_cache(cache_path), model_id)
+
+
+def iter_passages(driver, only_missing=True, page_size=PASSAGE_PAGE_SIZE):
+    """
+    Yield {"id", "text"} for passages (by default only those without an embedding).
+    """
+    where = "AND p.embedding IS NULL " if only_missing else ""
+    query = f"""
+    MATCH (p:Passage)
+    WHERE p.id > $after {where}
+    RETURN p.id AS id, p.text AS text
+    ORDER BY p.id
+    LIMIT $limit
+    """
+    after = ""
+    while True:
+        with driver.session(database=DATABASE) as session:
+            page = session.execute_read(
+                lambda tx: [record.data() for record in tx.run(query, after=after, limit=page_size)]
+            )
+        yield from page
+        if len(page) < page_size:
+            return
+        after = page[-1]["id"]
+
+
+def write_embeddings(tx, rows):
+    tx.run("""
+    UNWIND $rows AS row
+    MATCH (p:Passage {id: row.id})
+    CALL db.create.setNodeVectorProperty(p, 'embedding', row.embedding)
+    SET p.embedded_at = timestamp()
+    """, rows=rows)
+
+
+def create_vector_index(tx, dimensions=EMBEDDING_DIMENSIONS):
+    tx.run(f"""
+        CREATE VECTOR INDEX passage_embeddings IF NOT EXISTS
+        FOR (p:Passage) ON (p.embedding)
+        OPTIONS {{indexConfig: {{
+         `vector.dimensions`: {int(dimensions)},
+         `vector.similarity_function`: 'cosine'
+        }}}}
+    """)
+
+
+def embed_passages(driver, embeddings_model, only_missing=True, batch_size=EMBEDDING_BATCH_SIZE,
+                   workers=EMBEDDING_WORKERS, max_retries=INGEST_MAX_RETRIES):
+    """
+    Pipelined embedding: passages are streamed from the graph in fixed-size batches,
+    up to `workers` embed calls run concurrently (each retried with backoff), and
+    every batch's vectors are written back with a single UNWIND.
+    """
+    def embed(batch):
+        vectors = embeddings_model.embed_documents([p["text"] or "" for p in batch])
+        return [{"id": p["id"], "embedding": v} for p, v in zip(batch, vectors)]
+
+    return run_batched(driver, write_embeddings, iter_passages(driver, only_missing),
+                       batch_size, workers, max_retries, label="embeddings", prepare=embed)
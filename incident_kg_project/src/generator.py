@@ -1,10 +1,12 @@
-import json
+import argparse
 import random
 import uuid
 import os
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from faker import Faker
-from src.config import DATA_DIR, DATA_FILE
+from src.config import DATA_FILE
+from src.data_io import write_incidents
 
 fake = Faker()
 
@@ -15,6 +17,18 @@ NUM_PRODUCTS = 5
 NUM_PEOPLE = 20
 NUM_LABELS = 10
 NUM_CHANNELS = 5
+# Per-issue shape: passages per issue (min, max), labels per issue (max) and the share
+# of issues that clone an earlier one
+PASSAGES_PER_ISSUE = (1, 3)
+MAX_LABELS_PER_ISSUE = 3
+CLONE_RATE = 0.2
+# Passage sources besides short Jira comments: the share of sources that are Slack
+# threads, and the share of Sev1/Sev2 issues that get a (long) postmortem
+SLACK_THREAD_SHARE = 0.3
+POSTMORTEM_RATE = 0.5
+# Clones copy the sources of their original, as cloned Jira issues do; the sources
+# of this many recent issues are kept for that
+CLONE_SOURCE_CACHE = 10000
 OUTPUT_FILE = DATA_FILE
 
 # Enums / Constants
@@ -25,25 +39,37 @@ SEVERITIES = ["Sev1", "Sev2", "Sev3", "Sev4"]
 IMPACTS = ["High", "Medium", "Low"]
 ENV_TYPES = ["Production", "Staging", "Test", "Dev"]
 
+def new_id():
+    # Drawn from `random` (not uuid4) so a seeded run reproduces the same ids
+    return str(uuid.UUID(int=random.getrandbits(128), version=4))
+
+def seed_all(seed):
+    random.seed(seed)
+    Faker.seed(seed)
+
 def generate_reference_data():
-    components = [{"name": f"Component-{i}", "id": str(uuid.uuid4())} for i in range(NUM_COMPONENTS)]
-    products = [{"name": f"Product-{i}", "id": str(uuid.uuid4())} for i in range(NUM_PRODUCTS)]
-    categories = [{"name": f"Category-{i}", "id": str(uuid.uuid4())} for i in range(5)]
-    people = [{"display_name": fake.name(), "email": fake.email(), "account_id": str(uuid.uuid4())} for _ in range(NUM_PEOPLE)]
-    labels = [{"name": word, "id": str(uuid.uuid4())} for word in fake.words(nb=NUM_LABELS, unique=True)]
-    slack_channels = [{"url": f"https://slack.com/archives/{fake.bothify(text='C##########')}", "id": str(uuid.uuid4())} for _ in range(NUM_CHANNELS)]
+    components = [{"name": f"Component-{i}", "id": new_id()} for i in range(NUM_COMPONENTS)]
+    products = [{"name": f"Product-{i}", "id": new_id()} for i in range(NUM_PRODUCTS)]
+    categories = [{"name": f"Category-{i}", "id": new_id()} for i in range(5)]
+    people = [{"display_name": fake.name(), "email": fake.email(), "account_id": new_id()} for _ in range(NUM_PEOPLE)]
+    labels = [{"name": word, "id": new_id()} for word in fake.words(nb=NUM_LABELS, unique=True)]
+    slack_channels = [{"url": f"https://slack.com/archives/{fake.bothify(text='C##########')}", "id": new_id()} for _ in range(NUM_CHANNELS)]
     
     return components, products, categories, people, labels, slack_channels
 
-def generate_issue(components, products, categories, people, labels, slack_channels):
-    created_dt = fake.date_time_between(start_date="-1y", end_date="now")
+def generate_issue(components, products, categories, people, labels, slack_channels, index=0,
+                   passages=PASSAGES_PER_ISSUE, max_labels=MAX_LABELS_PER_ISSUE, end_date=None):
+    # Issues are created within the year before `end_date` (default: now)
+    end_date = end_date or datetime.now()
+    created_dt = fake.date_time_between(start_date=end_date - timedelta(days=365), end_date=end_date)
     updated_dt = created_dt + timedelta(days=random.randint(0, 30))
     event_start = created_dt + timedelta(minutes=random.randint(0, 60))
     event_end = event_start + timedelta(minutes=random.randint(10, 300))
     duration_ms = int((event_end - event_start).total_seconds() * 1000)
     
-    issue_id = str(uuid.uuid4())
-    key = f"INC-{fake.unique.random_int(min=1000, max=9999)}"
+    issue_id = new_id()
+    # Sequential rather than random keys: unique at any scale
+    key = f"INC-{1000 + index}"
     
     issue = {
         "id": issue_id,
@@ -69,47 +95,124 @@ def generate_issue(components, products, categories, people, labels, slack_chann
         "category": random.choice(categories),
         "reporter": random.choice(people),
         "assignee": random.choice(people),
-        "labels": random.sample(labels, k=random.randint(0, 3)),
+        "labels": random.sample(labels, k=random.randint(0, min(max_labels, len(labels)))),
         "slack_channel": random.choice(slack_channels) if random.random() > 0.5 else None,
         "passages": []
     }
     
-    # Generate Passages (for RAG)
-    num_passages = random.randint(1, 3)
+    # Generate Passages (for RAG): Jira comments, Slack threads and postmortems
+    num_passages = random.randint(*passages)
     for _ in range(num_passages):
+        if random.random() < SLACK_THREAD_SHARE:
+            source_type, text = "Slack Thread", slack_thread(people)
+        else:
+            source_type, text = "Jira Comment", fake.paragraph(nb_sentences=3)
         passage = {
-            "id": str(uuid.uuid4()),
-            "source_type": "Jira Comment",
-            "source_id": str(uuid.uuid4()),
-            "text": fake.paragraph(nb_sentences=3),
+            "id": new_id(),
+            "source_type": source_type,
+            "source_id": new_id(),
+            "text": text,
             "created": (created_dt + timedelta(minutes=random.randint(1, 100))).isoformat(),
             "url": issue["url"]
         }
         issue["passages"].append(passage)
+    if issue["severity"] in ("Sev1", "Sev2") and random.random() < POSTMORTEM_RATE:
+        issue["passages"].append({
+            "id": new_id(),
+            "source_type": "Postmortem",
+            "source_id": new_id(),
+            "text": postmortem(),
+            "created": (event_end + timedelta(days=random.randint(1, 5))).isoformat(),
+            "url": issue["url"]
+        })
         
     return issue
 
-def main():
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
+def slack_thread(people):
+    # A few messages, one "Name: text" line each
+    return "\n".join(f"{random.choice(people)['display_name']}: {fake.sentence(nb_words=random.randint(6, 20))}"
+                     for _ in range(random.randint(3, 12)))
+
+def postmortem():
+    sections = ["Summary", "Impact", "Timeline", "Root cause", "Resolution", "Action items"]
+    return "\n\n".join(f"{section}: {fake.paragraph(nb_sentences=random.randint(3, 8))}" for section in sections)
+
+def iter_issues(num_issues, components, products, categories, people, labels, slack_channels,
+                passages=PASSAGES_PER_ISSUE, max_labels=MAX_LABELS_PER_ISSUE, clone_rate=CLONE_RATE,
+                end_date=None):
+    """
+    Yield issues one at a time; only issue keys (and the sources of the last
+    CLONE_SOURCE_CACHE issues) are kept in memory for CLONES links.
+    """
+    keys = []
+    recent_sources = OrderedDict()
+    end_date = end_date or datetime.now()
+    for index in range(num_issues):
+        issue = generate_issue(components, products, categories, people, labels, slack_channels,
+                               index, passages, max_labels, end_date)
+        # Add some links between issues
+        own_sources = list(issue["passages"])
+        if keys and random.random() < clone_rate:
+            issue["clones"] = random.choice(keys) # Simple link for now
+            for source in recent_sources.get(issue["clones"], []):
+                issue["passages"].append(dict(source, id=new_id(), source_id=new_id(), url=issue["url"]))
+        keys.append(issue["key"])
+        recent_sources[issue["key"]] = own_sources
+        if len(recent_sources) > CLONE_SOURCE_CACHE:
+            recent_sources.popitem(last=False)
+        yield issue
+
+def main(output_file=OUTPUT_FILE, num_issues=NUM_ISSUES, seed=None, passages=PASSAGES_PER_ISSUE,
+         max_labels=MAX_LABELS_PER_ISSUE, clone_rate=CLONE_RATE, end_date=None):
+    """
+    Write `num_issues` synthetic issues. With a `seed` and a fixed `end_date`
+    the output is identical on every run.
+    """
+    if seed is not None:
+        seed_all(seed)
+    output_dir = os.path.dirname(output_file)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
         
     components, products, categories, people, labels, slack_channels = generate_reference_data()
     
-    issues = []
-    for _ in range(NUM_ISSUES):
-        issues.append(generate_issue(components, products, categories, people, labels, slack_channels))
-        
-    # Add some links between issues
-    for issue in issues:
-        if random.random() > 0.8:
-            target = random.choice(issues)
-            if target["id"] != issue["id"]:
-                issue["clones"] = target["key"] # Simple link for now
-                
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump(issues, f, indent=2)
+    issues = iter_issues(num_issues, components, products, categories, people, labels, slack_channels,
+                         passages, max_labels, clone_rate, end_date)
+    count = write_incidents(output_file, issues)
         
-    print(f"Generated {len(issues)} issues in {OUTPUT_FILE}")
+    print(f"Generated {count} issues in {output_file}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generate dummy incident data.")
+    parser.add_argument("--output", default=OUTPUT_FILE,
+                        help="output path; .jsonl or .jsonl.gz streams JSON Lines, anything else writes a JSON array "
+                             "(with --shards: the output directory)")
+    parser.add_argument("--num-issues", type=int, default=NUM_ISSUES)
+    parser.add_argument("--seed", type=int, help="make the output reproducible (with --end-date)")
+    parser.add_argument("--end-date", type=datetime.fromisoformat,
+                        help="issues are created in the year before this date (default: now)")
+    parser.add_argument("--passages", type=int, nargs=2, default=PASSAGES_PER_ISSUE, metavar=("MIN", "MAX"),
+                        help="passages per issue")
+    parser.add_argument("--max-labels", type=int, default=MAX_LABELS_PER_ISSUE)
+    parser.add_argument("--clone-rate", type=float, default=CLONE_RATE,
+                        help="share of issues with a CLONES link to an earlier issue")
+    sharded = parser.add_argument_group("sharded, multi-process generation (src/sharded_generator.py)")
+    sharded.add_argument("--shards", type=int, help="write this many JSONL.gz shards into --output")
+    sharded.add_argument("--workers", type=int, help="processes (default: one per CPU)")
+    sharded.add_argument("--component-skew", type=float, default=0.0,
+                         help="Zipf exponent of component popularity (0 = uniform)")
+    sharded.add_argument("--bursts", type=int, default=0, help="number of incident bursts")
+    sharded.add_argument("--burst-share", type=float, default=0.0, help="share of issues created in bursts")
+    sharded.add_argument("--chain-rate", type=float, default=0.0,
+                         help="share of clones that clone the previous clone (CLONES chains)")
+    args = parser.parse_args()
+    if args.shards:
+        from src.sharded_generator import generate_sharded
+        generate_sharded(args.output, args.num_issues, args.shards, args.workers,
+                         seed=args.seed or 0, end_date=args.end_date, passages=tuple(args.passages),
+                         max_labels=args.max_labels, clone_rate=args.clone_rate,
+                         component_skew=args.component_skew, bursts=args.bursts,
+                         burst_share=args.burst_share, chain_rate=args.chain_rate)
+        raise SystemExit
+    main(output_file=args.output, num_issues=args.num_issues, seed=args.seed, passages=tuple(args.passages),
+         max_labels=args.max_labels, clone_rate=args.clone_rate, end_date=args.end_date)
@@ -0,0 +1,214 @@
+"""
+Index advisor driven by the Cypher the RAG pipeline actually runs.
+
+RAGPipeline appends every Text2Cypher query it executes to CYPHER_LOG_PATH
+(see QueryLog). The advisor replays the distinct queries with EXPLAIN (or
+PROFILE), finds label scans filtered on a property, and recommends the missing
+range/text index for each, optionally creating them.
+
+Run from the project root:
+    python -m src.index_advisor [--profile] [--apply]
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from src.config import NEO4J_DATABASE, CYPHER_LOG_PATH, CYPHER_LOG_MAX_BYTES
+
+DATABASE = NEO4J_DATABASE
+
+_SCAN_OPERATORS = ("NodeByLabelScan", "AllNodesScan")
+_LABEL_SCAN = re.compile(r"^(\w+):(\w+)$")
+# `i.status = $p0`, `cache[i.created] >= ...`, `i.summary CONTAINS ...`
+_PREDICATE = re.compile(
+    r"\b(\w+)\.(\w+)\]?\s*(=|<>|<=|>=|<|>|IN\b|STARTS WITH|ENDS WITH|CONTAINS|IS NOT NULL)",
+    re.IGNORECASE,
+)
+_TEXT_OPERATORS = ("ENDS WITH", "CONTAINS")
+
+
+class QueryLog:
+    """
+    Append-only JSONL log of executed Cypher: one {"cypher", "params", "ts"} line
+    per execution, plus any extra fields (the pipeline adds the guard's status,
+    reason, duration_ms and rows). Once the file reaches `max_bytes` it is moved
+    to `path + ".1"` (replacing the previous one) and a new file started.
+    Thread-safe; write errors are swallowed so logging never fails a query.
+    """
+
+    def __init__(self, path=CYPHER_LOG_PATH, max_bytes=CYPHER_LOG_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def record(self, cypher, params=None, **fields):
+        entry = {"cypher": cypher, "params": params or {}, "ts": time.time(), **fields}
+        line = json.dumps(entry, default=str)
+        try:
+            with self._lock:
+                with open(self.path, "a") as f:
+                    f.write(line + "\n")
+                    size = f.tell()
+                if self.max_bytes and size >= self.max_bytes:
+                    os.replace(self.path, self.path + ".1")
+        except OSError:
+            pass
+
+
+def read_query_log(path=CYPHER_LOG_PATH):
+    """
+    Distinct logged queries as {cypher: (count, params of the latest run)}, over
+    the rotated file (if any) and the current one. Queries the Cypher guard
+    rejected never ran and are skipped.
+    """
+    counts, params = Counter(), {}
+    for file in (path + ".1", path):
+        if not os.path.exists(file):
+            continue
+        with open(file, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("status") == "rejected":
+                    continue
+                counts[entry["cypher"]] += 1
+                params[entry["cypher"]] = entry.get("params") or {}
+    return {cypher: (count, params[cypher]) for cypher, count in counts.most_common()}
+
+
+def plan_query(session, cypher, params, profile=False):
+    """
+    Plan of `cypher` as the driver's nested dict. PROFILE executes the query,
+    so it runs in a read transaction.
+    """
+    prefix = "PROFILE " if profile else "EXPLAIN "
+
+    def run(tx):
+        summary = tx.run(prefix + cypher, params).consume()
+        return summary.profile if profile else summary.plan
+
+    return session.execute_read(run)
+
+
+def plan_arguments(op):
+    # Bolt plans carry operator arguments under "args" (HTTP and older drivers: "arguments")
+    return op.get("args") or op.get("arguments") or {}
+
+
+def _walk(plan):
+    yield plan
+    for child in plan.get("children", []):
+        yield from _walk(child)
+
+
+def scanned_predicates(plan):
+    """
+    (label, property, operator) for every property predicate applied to nodes
+    that were found by a label scan, i.e. lookups no index served.
+    """
+    scanned = {}
+    for op in _walk(plan):
+        if op["operatorType"].split("@")[0] in _SCAN_OPERATORS:
+            match = _LABEL_SCAN.match(str(plan_arguments(op).get("Details", "")).strip())
+            if match:
+                scanned[match.group(1)] = match.group(2)
+    found = set()
+    for op in _walk(plan):
+        if not op["operatorType"].startswith("Filter"):
+            continue
+        details = str(plan_arguments(op).get("Details", ""))
+        for var, prop, operator in _PREDICATE.findall(details):
+            if var in scanned:
+                found.add((scanned[var], prop, operator.upper()))
+    return found
+
+
+def db_hits(plan):
+    return sum(op.get("dbHits", 0) for op in _walk(plan))
+
+
+def existing_indexes(session):
+    """
+    {(label, property): {index types}} for node range and text indexes. Only the
+    first property of a composite index counts, since that is what serves a
+    single-property predicate. (Full-text indexes are only used through
+    db.index.fulltext.queryNodes, never for WHERE predicates.)
+    """
+    indexes = {}
+    for r in session.run("SHOW INDEXES YIELD type, entityType, labelsOrTypes, properties "
+                         "WHERE entityType = 'NODE' AND type IN ['RANGE', 'TEXT']"):
+        for label in r["labelsOrTypes"]:
+            indexes.setdefault((label, r["properties"][0]), set()).add(r["type"])
+    return indexes
+
+
+def index_statement(label, prop, kind):
+    name = f"{label.lower()}_{prop.lower()}" + ("_text" if kind == "TEXT" else "")
+    keyword = "TEXT INDEX" if kind == "TEXT" else "INDEX"
+    return f"CREATE {keyword} {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})"
+
+
+def advise(driver, log_path=CYPHER_LOG_PATH, profile=False, apply=False):
+    """
+    Recommend (and with `apply`, create) indexes for the logged queries. Returns
+    {"queries": [...per-query findings...], "recommendations": [...]}.
+    """
+    queries, wanted = [], {}
+    with driver.session(database=DATABASE) as session:
+        indexes = existing_indexes(session)
+        for cypher, (count, params) in read_query_log(log_path).items():
+            finding = {"cypher": cypher, "count": count}
+            try:
+                plan = plan_query(session, cypher, params, profile)
+            except Exception as e:
+                finding["error"] = str(e)
+                queries.append(finding)
+                continue
+            finding["scans"] = sorted(scanned_predicates(plan))
+            if profile:
+                finding["db_hits"] = db_hits(plan)
+            queries.append(finding)
+            for label, prop, operator in finding["scans"]:
+                kind = "TEXT" if operator in _TEXT_OPERATORS else "RANGE"
+                if kind in indexes.get((label, prop), ()):
+                    continue
+                rec = wanted.setdefault((label, prop, kind), {
+                    "label": label, "property": prop, "kind": kind,
+                    "statement": index_statement(label, prop, kind), "queries": 0, "executions": 0,
+                })
+                rec["queries"] += 1
+                rec["executions"] += count
+
+        recommendations = sorted(wanted.values(), key=lambda r: -r["executions"])
+        if apply:
+            for rec in recommendations:
+                session.run(rec["statement"])
+            session.run("CALL db.awaitIndexes(300)")
+    return {"queries": queries, "recommendations": recommendations}
+
+
+if __name__ == "__main__":
+    from src.connection import get_driver
+
+    parser = argparse.ArgumentParser(description="Recommend indexes for the Cypher the pipeline has run.")
+    parser.add_argument("--log", default=CYPHER_LOG_PATH)
+    parser.add_argument("--profile", action="store_true", help="execute queries with PROFILE to report db hits")
+    parser.add_argument("--apply", action="store_true", help="create the recommended indexes")
+    args = parser.parse_args()
+
+    report = advise(get_driver(), args.log, profile=args.profile, apply=args.apply)
+
+    for q in report["queries"]:
+        status = q.get("error") or (", ".join(f"{l}.{p} {o}" for l, p, o in q["scans"]) or "indexed")
+        hits = f", {q['db_hits']} db hits" if "db_hits" in q else ""
+        print(f"[{q['count']}x{hits}] {' '.join(q['cypher'].split())[:100]}\n    scans: {status}")
+    if not report["recommendations"]:
+        print("No missing indexes found.")
+    for rec in report["recommendations"]:
+        action = "Created" if args.apply else "Recommend"
+        print(f"{action}: {rec['statement']}  ({rec['queries']} queries, {rec['executions']} executions)")
@@ -0,0 +1,105 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from src.connection import pool_metrics
+from src.config import NEO4J_DATABASE, INGEST_BATCH_SIZE, INGEST_WORKERS, INGEST_MAX_RETRIES
+
+DATABASE = NEO4J_DATABASE
+
+
+def chunked(rows, size):
+    """
+    Yield lists of at most `size` items from any iterable without materializing it.
+    """
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _with_retries(func, max_retries):
+    # Returns (result, retries used); exponential backoff between attempts.
+    attempt = 0
+    while True:
+        try:
+            return func(), attempt
+        except Exception:
+            attempt += 1
+            if attempt > max_retries:
+                raise
+            time.sleep(min(2 ** attempt * 0.5, 10))
+
+
+def _write_batch(driver, tx_func, batch, max_retries, prepare=None):
+    # Each worker uses its own session; the driver itself is thread-safe.
+    # execute_write already retries transient errors (deadlocks, leader switches),
+    # the outer retries cover everything else. `prepare` (e.g. an embedding call)
+    # runs outside the transaction and is retried on its own, so a failed write
+    # does not redo it.
+    retries = 0
+    if prepare is not None:
+        batch, retries = _with_retries(lambda: prepare(batch), max_retries)
+
+    def write():
+        with driver.session(database=DATABASE) as session:
+            session.execute_write(tx_func, batch)
+
+    _, write_retries = _with_retries(write, max_retries)
+    return retries + write_retries
+
+
+def run_batched(driver, tx_func, rows, batch_size=INGEST_BATCH_SIZE, workers=INGEST_WORKERS,
+                max_retries=INGEST_MAX_RETRIES, label="rows", total=None, prepare=None, batched=False):
+    """
+    Apply `tx_func(tx, batch)` to `rows` in batches of `batch_size`, committing up to
+    `workers` batches concurrently. Each batch is its own transaction, so a failure
+    only rolls back that batch. At most `2 * workers` batches are held in memory.
+    If given, `prepare(batch)` transforms each batch in the worker before it is written.
+    With `batched`, `rows` is already an iterable of batches and is written as is.
+
+    Returns a stats dict with row/batch counts, retries, failures, throughput and the
+    most shared-pool connections seen in use at once (pool_peak_in_use).
+    """
+    stats = {"rows": 0, "batches": 0, "retries": 0, "failed_batches": 0, "failed_rows": 0,
+             "pool_peak_in_use": 0}
+    start = time.perf_counter()
+    batches = rows if batched else chunked(rows, batch_size)
+    in_flight = {}
+
+    def report():
+        elapsed = time.perf_counter() - start
+        rate = stats["rows"] / elapsed if elapsed else 0.0
+        progress = f"{stats['rows']}/{total}" if total else str(stats["rows"])
+        print(f"  {label}: {progress} committed in {stats['batches']} batches ({rate:,.0f}/s)")
+
+    def collect(done):
+        in_use = pool_metrics().get("in_use", 0)
+        stats["pool_peak_in_use"] = max(stats["pool_peak_in_use"], in_use)
+        for future in done:
+            size = in_flight.pop(future)
+            try:
+                stats["retries"] += future.result()
+                stats["rows"] += size
+                stats["batches"] += 1
+                report()
+            except Exception as e:
+                stats["failed_batches"] += 1
+                stats["failed_rows"] += size
+                print(f"  {label}: batch of {size} failed after {max_retries} retries: {e}")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for batch in batches:
+            if len(in_flight) >= workers * 2:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            future = pool.submit(_write_batch, driver, tx_func, batch, max_retries, prepare)
+            in_flight[future] = len(batch)
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["rows_per_second"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
@@ -0,0 +1,215 @@
+"""
+Passage processing between the data file and the graph.
+
+Every entry of an issue's `passages` is a *source* (a Jira comment, a Slack
+thread, a postmortem). source_chunks() splits its text into chunks of at most
+CHUNK_TOKENS estimated tokens (schema_select.estimate_tokens, about 4 characters
+per token), packing whole sentences and repeating the last
+CHUNK_OVERLAP_TOKENS of one chunk at the start of the next so retrieval does not
+lose context at a boundary. A sentence longer than a chunk is split by words.
+
+A chunk's id is the SHA-256 of its whitespace-normalized text, so identical text
+(boilerplate, comments copied into a cloned issue) becomes one Passage with one
+embedding, linked to every Issue and Source it occurs in:
+
+    (:Issue)-[:HAS_SOURCE]->(:Source {id, source_type, source_id, created, url})
+    (:Passage {id, text, token_count})-[:CHUNK_OF {index, start, end}]->(:Source)
+    (:Passage)-[:FROM]->(:Issue)
+
+start/end are character offsets of the chunk in the source text. PassageChunker
+runs the chunking on a process pool (CHUNK_WORKERS), either per ingest batch
+(as a run_batched `prepare`) or over a stream of rows (iter_rows).
+"""
+import hashlib
+import re
+from concurrent.futures import ProcessPoolExecutor
+from src.config import CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS, CHUNK_WORKERS
+from src.ingest import chunked
+from src.schema_select import CHARS_PER_TOKEN, estimate_tokens
+
+# Issues per task sent to a worker process
+CHUNK_TASK_SIZE = 200
+
+_SENTENCE = re.compile(r"[^.!?\n]+(?:[.!?]+|\n+|$)")
+_WORD = re.compile(r"\S+")
+
+
+def chunk_id(text):
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def _spans(text, max_tokens):
+    # (start, end) per sentence without surrounding whitespace; sentences over
+    # max_tokens become words, and words over max_tokens (URLs, stack traces)
+    # pieces of max_tokens
+    step = max_tokens * CHARS_PER_TOKEN
+    for sentence in _SENTENCE.finditer(text):
+        body = sentence.group(0)
+        if not body.strip():
+            continue
+        if estimate_tokens(body.strip()) <= max_tokens:
+            lead = len(body) - len(body.lstrip())
+            yield sentence.start() + lead, sentence.start() + len(body.rstrip())
+            continue
+        for word in _WORD.finditer(body):
+            start, end = word.start() + sentence.start(), word.end() + sentence.start()
+            for piece in range(start, end, step):
+                yield piece, min(piece + step, end)
+
+
+def _units(text, max_tokens):
+    # (start, end, tokens) per span. A unit's tokens include the whitespace up to
+    # the next unit, so the units of a chunk never add up to less than the chunk
+    spans = list(_spans(text, max_tokens))
+    for i, (start, end) in enumerate(spans):
+        stop = spans[i + 1][0] if i + 1 < len(spans) else end
+        yield start, end, estimate_tokens(text[start:stop])
+
+
+def chunk_text(text, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """
+    Split `text` into [(start, end, tokens)] character spans of at most
+    `max_tokens` estimated tokens, consecutive spans sharing up to
+    `overlap_tokens` tokens of whole units. Text that fits is one span.
+    """
+    text = text or ""
+    lead, end = len(text) - len(text.lstrip()), len(text.rstrip())
+    if lead >= end:
+        return []
+    tokens = estimate_tokens(text[lead:end])
+    if tokens <= max_tokens:
+        # Most comments fit in one chunk
+        return [(lead, end, tokens)]
+    units = list(_units(text, max_tokens))
+    spans, first = [], 0
+    while first < len(units):
+        last, tokens = first, 0
+        while last < len(units) and tokens + units[last][2] <= max_tokens:
+            tokens += units[last][2]
+            last += 1
+        last = max(last, first + 1)
+        start, end = units[first][0], units[last - 1][1]
+        spans.append((start, end, estimate_tokens(text[start:end])))
+        if last == len(units):
+            break
+        # Step back over trailing units worth at most overlap_tokens, but always advance
+        back, overlap = last, 0
+        while back - 1 > first and overlap + units[back - 1][2] <= overlap_tokens:
+            back -= 1
+            overlap += units[back][2]
+        first = back
+    return spans
+
+
+def source_chunks(text, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """
+    Chunks of one source text: [{"id", "text", "token_count", "index", "start", "end"}].
+    """
+    text = text or ""
+    out = []
+    for index, (start, end, tokens) in enumerate(chunk_text(text, max_tokens, overlap_tokens)):
+        chunk = text[start:end]
+        out.append({"id": chunk_id(chunk), "text": chunk, "token_count": tokens,
+                    "index": index, "start": start, "end": end})
+    return out
+
+
+def _chunk_task(args):
+    # Runs in a worker process; only the texts cross the process boundary
+    texts, max_tokens, overlap_tokens = args
+    return [source_chunks(text, max_tokens, overlap_tokens) for text in texts]
+
+
+def _texts(rows):
+    return [source.get("text") for row in rows for source in row.get("passages") or []]
+
+
+def _attach(rows, chunk_lists):
+    # Issue rows with each passage source given its chunks, in order
+    chunk_lists = iter(chunk_lists)
+    return [dict(row, passages=[dict(source, chunks=next(chunk_lists)) for source in row.get("passages") or []])
+            for row in rows]
+
+
+def chunk_rows(rows, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """
+    Issue rows with every passage source chunked (in this process).
+    """
+    return _attach(rows, _chunk_task((_texts(rows), max_tokens, overlap_tokens)))
+
+
+class PassageChunker:
+    """
+    Chunks issue rows on a pool of `workers` processes (inline when `workers` <= 1).
+    Only the source texts are sent to the workers and only the chunks come back.
+    Use as a context manager so the pool is shut down.
+    """
+
+    def __init__(self, workers=CHUNK_WORKERS, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+        self.workers = workers
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self._pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __call__(self, rows):
+        """
+        Chunk one batch of rows; thread-safe, so concurrent ingest workers can
+        share the pool through run_batched's `prepare`.
+        """
+        if self._pool is None:
+            return chunk_rows(rows, self.max_tokens, self.overlap_tokens)
+        return _attach(rows, self._submit(rows).result())
+
+    def _submit(self, rows):
+        return self._pool.submit(_chunk_task, (_texts(rows), self.max_tokens, self.overlap_tokens))
+
+    def iter_rows(self, rows, task_size=CHUNK_TASK_SIZE):
+        """
+        Yield chunked rows from any iterable in input order, keeping at most
+        2 * workers tasks in flight.
+        """
+        if self._pool is None:
+            for batch in chunked(rows, task_size):
+                yield from chunk_rows(batch, self.max_tokens, self.overlap_tokens)
+            return
+        pending = []
+        for batch in chunked(rows, task_size):
+            pending.append((batch, self._submit(batch)))
+            if len(pending) >= 2 * self.workers:
+                batch, future = pending.pop(0)
+                yield from _attach(batch, future.result())
+        for batch, future in pending:
+            yield from _attach(batch, future.result())
+
+
+def passage_stats(rows):
+    """
+    Sources, chunks, distinct chunks and their estimated tokens over chunked rows;
+    the distinct counts are what gets stored and embedded.
+    """
+    stats = {"sources": 0, "source_tokens": 0, "chunks": 0, "chunk_tokens": 0,
+             "distinct_chunks": 0, "distinct_tokens": 0}
+    seen = set()
+    for row in rows:
+        for source in row.get("passages") or []:
+            stats["sources"] += 1
+            stats["source_tokens"] += estimate_tokens((source.get("text") or "").strip())
+            for chunk in source["chunks"]:
+                stats["chunks"] += 1
+                stats["chunk_tokens"] += chunk["token_count"]
+                if chunk["id"] not in seen:
+                    seen.add(chunk["id"])
+                    stats["distinct_chunks"] += 1
+                    stats["distinct_tokens"] += chunk["token_count"]
+    return stats
@@ -1,58 +1,109 @@
+import json
 import os
-from langchain_community.graphs import Neo4jGraph
-from langchain_community.chains.graph_qa.cypher import GraphCypherQAChain
-from langchain_community.chat_models import ChatOCIGenAI
-from langchain_core.prompts import PromptTemplate
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from src.config import (
     NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD, NEO4J_DATABASE,
-    OCI_CONFIG_PROFILE, OCI_COMPARTMENT_ID, OCI_GENAI_ENDPOINT
+    OCI_CONFIG_PROFILE, VECTOR_BACKEND, SCHEMA_SNAPSHOT_FILE, RETRIEVAL_MODE,
+    ANSWER_CACHE_ENABLED, ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_SECONDS,
+    ANSWER_CACHE_SEMANTIC, ANSWER_CACHE_SIMILARITY, GRAPH_VERSION_CHECK_SECONDS,
+    LLM_PROVIDER, STUB_LLM_LATENCY_MS, CYPHER_CACHE_ENABLED, CYPHER_CACHE_MAX_ENTRIES,
+    CYPHER_LOG_PATH, SCHEMA_PRUNING_ENABLED, SCHEMA_TOKEN_BUDGET, GUARD_ENABLED,
 )
+from src.tracing import get_tracer, current_span, llm_callbacks
 
 URI = NEO4J_URI
 USERNAME = NEO4J_USERNAME
 PASSWORD = NEO4J_PASSWORD
 DATABASE = NEO4J_DATABASE
 AUTH_TYPE = "API_KEY"
+ISSUE_KEY_PATTERN = re.compile(r"\bINC-\d+\b", re.IGNORECASE)
+# Bookkeeping labels kept out of the Text2Cypher schema
+EXCLUDED_TYPES = ["GraphMeta"]
+# query() reports failures as answers starting with one of these instead of raising
+ERROR_PREFIXES = ("Error processing query:", "Vector search failed:")
 
-COMPARTMENT_ID = OCI_COMPARTMENT_ID
-ENDPOINT = OCI_GENAI_ENDPOINT
 
-print("OCI Compartment:", OCI_COMPARTMENT_ID)
-print("OCI Endpoint:", OCI_GENAI_ENDPOINT)
-print("OCI Config Profile:", OCI_CONFIG_PROFILE)
+def is_error_response(response):
+    return isinstance(response, str) and response.startswith(ERROR_PREFIXES)
+
+# LangChain and the OCI SDK are imported inside the functions below, so importing
+# this module is cheap and the heavy imports happen on the startup threads.
 
 def get_llm(temperature=0):
     """
-    Initialize OCI Gen AI Chat Model.
+    Initialize OCI Gen AI Chat Model (or the offline stub with LLM_PROVIDER=fake).
     """
+    if LLM_PROVIDER == "fake":
+        from src.stub_llm import StubChatModel
+        return StubChatModel(latency_ms=STUB_LLM_LATENCY_MS)
+    from langchain_community.chat_models import ChatOCIGenAI
+    from src.config import OCI_COMPARTMENT_ID, OCI_GENAI_ENDPOINT
+
+    print("OCI Compartment:", OCI_COMPARTMENT_ID)
+    print("OCI Endpoint:", OCI_GENAI_ENDPOINT)
+    print("OCI Config Profile:", OCI_CONFIG_PROFILE)
     return ChatOCIGenAI(
         model_id="ocid1.generativeaimodel.oc1.us-chicago-1.amaaaaaask7dceyasebknceb4ekbiaiisjtu3fj5i7s4io3ignvg4ip2uyma", 
         provider="openai",
-        service_endpoint=ENDPOINT,
-        compartment_id=COMPARTMENT_ID,
+        service_endpoint=OCI_GENAI_ENDPOINT,
+        compartment_id=OCI_COMPARTMENT_ID,
         model_kwargs={"temperature": temperature, "max_tokens": 512}
     )
 
 def get_graph():
     """
-    Initialize Neo4j Graph connection.
+    Neo4j Graph on the shared driver (src/connection.py); its queries are routed
+    as reads. The schema is loaded separately by load_schema.
     """
-    return Neo4jGraph(
-        url=URI,
-        username=USERNAME,
-        password=PASSWORD,
-        database=DATABASE
-    )
+    from src.connection import get_graph as get_shared_graph
+
+    return get_shared_graph(DATABASE)
+
+def read_graph_version(graph):
+    rows = graph.query("MATCH (m:GraphMeta {id: 'graph'}) RETURN m.version AS version")
+    return rows[0]["version"] if rows else None
+
+def load_schema(graph, snapshot_file=SCHEMA_SNAPSHOT_FILE):
+    """
+    Load the graph schema from the persisted snapshot if it was taken at the current
+    graph version; otherwise introspect (refresh_schema) and save a new snapshot.
+    Returns "snapshot" or "introspected".
+    """
+    version = read_graph_version(graph)
+    if version is not None and snapshot_file and os.path.exists(snapshot_file):
+        with open(snapshot_file, "r") as f:
+            snapshot = json.load(f)
+        if snapshot.get("version") == version:
+            graph.schema = snapshot["schema"]
+            graph.structured_schema = snapshot["structured_schema"]
+            return "snapshot"
+
+    graph.refresh_schema()
+    if version is not None and snapshot_file:
+        os.makedirs(os.path.dirname(snapshot_file), exist_ok=True)
+        with open(snapshot_file, "w") as f:
+            json.dump({"version": version, "schema": graph.schema,
+                       "structured_schema": graph.structured_schema}, f)
+    return "introspected"
 
 def get_cypher_qa_chain(llm, graph, verbose=True, top_k=10):
     """
     Create Graph Cypher QA Chain.
     """
+    from langchain_community.chains.graph_qa.cypher import GraphCypherQAChain
+    from langchain_core.prompts import PromptTemplate
+    from src.rollups import ROLLUP_PROMPT_HINT
+    from src.timeline import TIMELINE_PROMPT_HINT
     
     cypher_generation_template = """Task:Generate Cypher statement to query a graph database.
 Instructions:
 Use only the provided relationship types and properties in the schema.
 Do not use any other relationship types or properties that are not provided.
+""" + ROLLUP_PROMPT_HINT + """
+""" + TIMELINE_PROMPT_HINT + """
 Schema:
 {schema}
 Note: Do not include any explanations or apologies in your responses.
@@ -72,26 +123,30 @@ The question is:
         verbose=verbose,
         cypher_prompt=CYPHER_GENERATION_PROMPT,
         top_k=top_k,
+        exclude_types=EXCLUDED_TYPES,
         allow_dangerous_requests=True
     )
 
-def get_vector_store():
+def get_embeddings():
     """
-    Initialize Neo4j Vector Store.
+    Query-side embedding model: the same model (and on-disk cache) the builder
+    used for the passages.
+    """
+    from src.embeddings import get_embeddings_model
+    return get_embeddings_model(truncate="NONE", auth_type=AUTH_TYPE)
+
+def get_vector_store(embeddings=None):
+    """
+    Initialize Neo4j Vector Store, moved onto the shared driver once it has
+    checked the index.
     """
     from langchain_community.vectorstores import Neo4jVector
-    from langchain_community.embeddings import OCIGenAIEmbeddings
+    from src.connection import adopt_shared_driver
     
-    embeddings = OCIGenAIEmbeddings(
-        model_id="cohere.embed-multilingual-v3.0",
-        service_endpoint=ENDPOINT,
-        truncate="NONE",
-        compartment_id=COMPARTMENT_ID,
-        auth_profile=OCI_CONFIG_PROFILE,
-        auth_type=AUTH_TYPE
-    )
+    if embeddings is None:
+        embeddings = get_embeddings()
     
-    return Neo4jVector.from_existing_graph(
+    return adopt_shared_driver(Neo4jVector.from_existing_graph(
         embedding=embeddings,
         url=URI,
         username=USERNAME,
@@ -100,37 +155,567 @@ def get_vector_store():
         node_label="Passage",
         text_node_properties=["text"],
         embedding_node_property="embedding",
-    )
+    ))
+
+def get_local_vector_index():
+    """
+    Load the in-process vector index exported from the graph by the builder.
+    """
+    from src.vector_index import LocalVectorIndex
+
+    index = LocalVectorIndex()
+    if not index.exists():
+        raise RuntimeError("Local vector index not found. Run the builder (or python -m src.vector_index) first.")
+    return index.load()
 
 class RAGPipeline:
     def __init__(self):
-        self.llm = get_llm()
-        self.graph = get_graph()
-        # Refresh schema
-        self.graph.refresh_schema()
-        self.chain = get_cypher_qa_chain(self.llm, self.graph)
+        # The LLM client, the graph connection + schema and the vector store are
+        # built concurrently on background threads, so __init__ returns at once.
+        # Each piece is awaited only when a query first needs it; per-phase
+        # durations are recorded in startup_timings.
+        self.startup_timings = {}
+        self.answer_cache = None
+        if ANSWER_CACHE_ENABLED:
+            from src.answer_cache import AnswerCache
+            self.answer_cache = AnswerCache(
+                max_entries=ANSWER_CACHE_MAX_ENTRIES,
+                ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+                similarity_threshold=ANSWER_CACHE_SIMILARITY,
+            )
+        self.cypher_cache = None
+        if CYPHER_CACHE_ENABLED:
+            from src.cypher_cache import CypherPlanCache
+            self.cypher_cache = CypherPlanCache(max_entries=CYPHER_CACHE_MAX_ENTRIES)
+        self.query_log = None
+        if CYPHER_LOG_PATH:
+            from src.index_advisor import QueryLog
+            self.query_log = QueryLog(CYPHER_LOG_PATH)
+        self._graph_version = None
+        self._graph_version_checked = 0.0
+        self._chain = None
+        self.schema_selector = None
+        self.cypher_guard = None
+        self._chain_lock = threading.Lock()
+        self._hybrid_retriever = None
+
+        self._started = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="rag-startup")
+        self._llm = self._start(executor, "llm", get_llm)
+        self._graph = self._start(executor, "graph", self._init_graph)
+        self._vectors = self._start(executor, "vector store", self._init_vectors)
+        executor.shutdown(wait=False)
+
+    def _start(self, executor, name, func):
+        def run():
+            start = time.perf_counter()
+            try:
+                return func()
+            finally:
+                self.startup_timings[name] = time.perf_counter() - start
+
+        def report(future):
+            if future.exception() is not None:
+                print(f"Startup step '{name}' failed: {future.exception()}")
+
+        future = executor.submit(run)
+        future.add_done_callback(report)
+        return future
+
+    def _init_graph(self):
+        start = time.perf_counter()
+        graph = get_graph()
+        self.startup_timings["graph connect"] = time.perf_counter() - start
+        start = time.perf_counter()
+        source = load_schema(graph)
+        self.startup_timings[f"schema ({source})"] = time.perf_counter() - start
+        return graph
+
+    def _init_vectors(self):
+        vectors = {"embeddings": None, "vector_store": None, "local_index": None}
         try:
-            self.vector_store = get_vector_store()
-            print("Vector store initialized.")
+            vectors["embeddings"] = get_embeddings()
+            if self.answer_cache is not None and ANSWER_CACHE_SEMANTIC:
+                self.answer_cache.embeddings = vectors["embeddings"]
+            if VECTOR_BACKEND == "local":
+                vectors["local_index"] = get_local_vector_index()
+                print(f"Local vector index loaded ({len(vectors['local_index'].ids)} passages).")
+            else:
+                vectors["vector_store"] = get_vector_store(vectors["embeddings"])
+                print("Vector store initialized.")
         except Exception as e:
             print(f"Vector store initialization failed: {e}")
-            self.vector_store = None
+            vectors["vector_store"] = vectors["local_index"] = None
+        return vectors
 
-    def query(self, question: str):
+    @property
+    def llm(self):
+        return self._llm.result()
+
+    @property
+    def graph(self):
+        return self._graph.result()
+
+    @property
+    def chain(self):
+        if self._chain is None:
+            with self._chain_lock:
+                if self._chain is None:
+                    start = time.perf_counter()
+                    chain = get_cypher_qa_chain(self.llm, self.graph)
+                    if SCHEMA_PRUNING_ENABLED:
+                        from src.schema_select import SchemaSelector
+                        self.schema_selector = SchemaSelector(
+                            self.graph.get_structured_schema, EXCLUDED_TYPES, SCHEMA_TOKEN_BUDGET)
+                    if GUARD_ENABLED:
+                        from src.cypher_guard import CypherGuard
+                        from src.connection import is_shared_graph
+                        driver = self.graph.driver if is_shared_graph(self.graph) else None
+                        self.cypher_guard = CypherGuard(driver, DATABASE)
+                    self._chain = chain
+                    self.startup_timings["chain"] = time.perf_counter() - start
+        return self._chain
+
+    @property
+    def embeddings(self):
+        return self._vectors.result()["embeddings"]
+
+    @property
+    def vector_store(self):
+        return self._vectors.result()["vector_store"]
+
+    @property
+    def local_index(self):
+        return self._vectors.result()["local_index"]
+
+    def ready(self):
+        return all(f.done() for f in (self._llm, self._graph, self._vectors))
+
+    def startup_errors(self):
+        """
+        {step: exception} for background startup steps that finished with an error.
+        """
+        steps = {"llm": self._llm, "graph": self._graph, "vector store": self._vectors}
+        return {name: f.exception() for name, f in steps.items() if f.done() and f.exception() is not None}
+
+    def wait_until_ready(self):
+        """
+        Block until every startup piece is built; returns startup_timings with a
+        "total" wall-clock entry.
+        """
+        for future in (self._llm, self._graph, self._vectors):
+            future.exception()
+        self.chain
+        self.startup_timings.setdefault("total", time.perf_counter() - self._started)
+        return self.startup_timings
+
+    def graph_version(self):
+        """
+        Version stamp written by the builder after each ingest, re-read at most
+        every GRAPH_VERSION_CHECK_SECONDS.
+        """
+        now = time.monotonic()
+        if now - self._graph_version_checked >= GRAPH_VERSION_CHECK_SECONDS:
+            self._graph_version = read_graph_version(self.graph)
+            self._graph_version_checked = now
+        return self._graph_version
+
+    def hybrid_search(self, question: str):
+        """
+        Vector hits expanded through the incident graph in one query (src/retriever.py).
+        """
+        from src.retriever import HybridRetriever, format_context
+
+        if self._hybrid_retriever is None:
+            self._hybrid_retriever = HybridRetriever(self.graph, self.embeddings, self.local_index)
+        with get_tracer().span("retrieve.hybrid") as span:
+            rows = self._hybrid_retriever.retrieve(question)
+            span.set(rows=len(rows))
+        return {"query": question, "result": format_context(rows), "context": rows}
+
+    def precomputed_similar(self, question: str):
+        """
+        "Similar to INC-1234" answered from SIMILAR_TO edges (src/similarity.py);
+        None when the question names no issue or the edges have not been built.
+        """
+        from src.similarity import similar_issues
+
+        match = ISSUE_KEY_PATTERN.search(question)
+        if not match:
+            return None
+        with get_tracer().span("retrieve.similar_to", key=match.group(0).upper()) as span:
+            rows = similar_issues(self.graph, match.group(0).upper())
+            span.set(rows=len(rows))
+        if not rows:
+            return None
+        lines = [f"[{r['key']}] {r['summary']} ({r['severity']}, {r['status']}) score={r['score']:.3f}"
+                 for r in rows]
+        return {"query": question, "result": "\n".join(lines), "context": rows}
+
+    def local_similarity_search(self, question: str, k=3):
+        """
+        Search the in-process index, then fetch only the matching passages from Neo4j.
+        """
+        tracer = get_tracer()
+        with tracer.span("embed.query"):
+            vector = self.embeddings.embed_query(question)
+        with tracer.span("vector.search", backend="local", k=k):
+            hits = self.local_index.search(vector, k)
+        rows = self.graph.query(
+            "MATCH (p:Passage) WHERE p.id IN $ids RETURN p.id AS id, p.text AS text",
+            {"ids": [pid for pid, _ in hits]}
+        )
+        texts = {row["id"]: row["text"] for row in rows}
+        return [texts[pid] for pid, _ in hits if pid in texts]
+
+    def generate_cypher(self, question: str):
+        """
+        Cypher-generation step of the chain (LLM call) on its own, with the schema
+        pruned to what the question refers to when SCHEMA_PRUNING_ENABLED.
+        """
+        from langchain_community.chains.graph_qa.cypher import extract_cypher
+
+        with get_tracer().span("cypher.generate") as span:
+            schema = self.chain.graph_schema
+            if self.schema_selector is not None:
+                from src.schema_select import estimate_tokens
+                schema = self.schema_selector.select(question)
+                span.set(schema_tokens=estimate_tokens(schema), schema_tokens_full=self.schema_selector.full_tokens)
+            output = self.chain.cypher_generation_chain.invoke(
+                {"question": question, "schema": schema},
+                config={"callbacks": llm_callbacks(span)},
+            )
+            cypher = extract_cypher(output if isinstance(output, str) else output["text"])
+            span.set(cypher=cypher)
+        return cypher
+
+    def answer_from_context(self, question: str, context):
+        """
+        Answer-synthesis step of the chain (LLM call) on its own.
+        """
+        with get_tracer().span("answer.synthesize", context_rows=len(context)) as span:
+            output = self.chain.qa_chain.invoke({"question": question, "context": context},
+                                                config={"callbacks": llm_callbacks(span)})
+        return output if isinstance(output, str) else output[self.chain.qa_chain.output_key]
+
+    def guard_cypher(self, cypher: str, params, span):
+        """
+        (Cypher to run, timeout) after the Cypher guard, which may rewrite it;
+        rejections are logged and re-raised as QueryRejected.
+        """
+        if self.cypher_guard is None:
+            return cypher, None
+        from src.cypher_guard import QueryRejected
+        try:
+            guarded, info = self.cypher_guard.check(cypher, params)
+        except QueryRejected as e:
+            span.set(rejected=str(e))
+            self.log_cypher(cypher, params, status="rejected", reason=str(e))
+            raise
+        span.set(rewrites=info["rewrites"] or None, estimated_rows=info["estimated_rows"])
+        return guarded, self.cypher_guard.timeout_seconds
+
+    def log_cypher(self, cypher: str, params, **fields):
+        if self.query_log is not None:
+            self.query_log.record(cypher, params, **fields)
+
+    def _execution_failed(self, error, cypher, params, start):
+        # Log a failed execution; server-side timeouts become QueryTimedOut
+        from src.cypher_guard import QueryTimedOut, is_timeout
+        duration_ms = (time.perf_counter() - start) * 1000
+        if self.cypher_guard is not None and is_timeout(error):
+            self.cypher_guard.timed_out += 1
+            self.log_cypher(cypher, params, status="timeout", duration_ms=duration_ms)
+            return QueryTimedOut(f"query cancelled after {self.cypher_guard.timeout_seconds:g}s")
+        self.log_cypher(cypher, params, status="error", reason=str(error), duration_ms=duration_ms)
+        return error
+
+    def run_cypher(self, cypher: str, params=None):
+        """
+        Execute generated Cypher behind the Cypher guard, logging it with its
+        status and duration for the index advisor. On the shared Neo4j graph the
+        query runs with the guard's transaction timeout and the span gets Neo4j's
+        own result_available_after / result_consumed_after timings, whether or
+        not tracing is on.
+        """
+        from src.connection import is_shared_graph
+
+        with get_tracer().span("neo4j.execute", cypher=cypher) as span:
+            cypher, timeout = self.guard_cypher(cypher, params, span)
+            start = time.perf_counter()
+            try:
+                if not is_shared_graph(self.graph):
+                    rows = self.graph.query(cypher, params or {})
+                else:
+                    rows, summary = self.graph.read(cypher, params, timeout)
+                    span.set(result_available_after_ms=summary.result_available_after,
+                             result_consumed_after_ms=summary.result_consumed_after)
+            except Exception as e:
+                raise self._execution_failed(e, cypher, params, start) from e
+            self.log_cypher(cypher, params, status="ok", rows=len(rows),
+                            duration_ms=(time.perf_counter() - start) * 1000)
+            span.set(rows=len(rows))
+            return rows
+
+    def stream_cypher(self, cypher: str, params=None, limit=None):
+        """
+        Rows of generated Cypher as Neo4j streams them (at most `limit`), behind the
+        Cypher guard and logged like run_cypher. Streaming stops at the guard's
+        timeout even if the server has not cancelled the query yet. Graphs without
+        a driver (stand-ins) are queried in one go.
+        """
+        from src.connection import is_shared_graph
+
+        with get_tracer().span("neo4j.execute", cypher=cypher, streamed=True) as span:
+            cypher, timeout = self.guard_cypher(cypher, params, span)
+            start = time.perf_counter()
+            if not is_shared_graph(self.graph):
+                rows = iter(self.graph.query(cypher, params or {}))
+            else:
+                rows = self.graph.stream(cypher, params, timeout, fetch_size=limit or 100)
+            count = 0
+            try:
+                for row in rows:
+                    if count == 0:
+                        span.set(first_row_ms=(time.perf_counter() - start) * 1000)
+                    if timeout is not None and time.perf_counter() - start > timeout:
+                        raise TimeoutError(cypher)
+                    yield row
+                    count += 1
+                    if limit is not None and count >= limit:
+                        break
+            except Exception as e:
+                if isinstance(e, TimeoutError):
+                    # Same outcome as a server-side cancellation
+                    from src.cypher_guard import QueryTimedOut
+                    self.cypher_guard.timed_out += 1
+                    self.log_cypher(cypher, params, status="timeout", rows=count,
+                                    duration_ms=(time.perf_counter() - start) * 1000)
+                    raise QueryTimedOut(f"query cancelled after {timeout:g}s") from e
+                raise self._execution_failed(e, cypher, params, start) from e
+            finally:
+                if hasattr(rows, "close"):
+                    rows.close()
+                span.set(rows=count)
+            self.log_cypher(cypher, params, status="ok", rows=count,
+                            duration_ms=(time.perf_counter() - start) * 1000)
+
+    def stream_answer(self, question: str, context):
+        """
+        answer_from_context, yielding answer text chunks as the LLM produces them.
+        """
+        with get_tracer().span("answer.synthesize", context_rows=len(context), streamed=True) as span:
+            qa_chain = self.chain.qa_chain
+            for chunk in qa_chain.stream({"question": question, "context": context},
+                                         config={"callbacks": llm_callbacks(span)}):
+                text = chunk if isinstance(chunk, str) else chunk.get(qa_chain.output_key, "")
+                if text:
+                    yield text
+
+    def stream_cypher_qa(self, question: str):
+        """
+        cypher_qa as events: ("cypher", statement), ("row", dict) per result row,
+        ("token", text) per answer chunk and finally ("answer", {"query", "result"}).
+        A cached plan the server refuses before returning a row is dropped and
+        regenerated, so a second "cypher" event can follow the first.
+        """
+        from src.cypher_cache import templatize, parameterize, is_stale_plan
+
+        top_k = self.chain.top_k
+        template, params, cypher, context = None, {}, None, []
+        if self.cypher_cache is not None:
+            template, params = templatize(question)
+            cypher = self.cypher_cache.get(template)
+            current_span().set(cypher_cache_hit=cypher is not None)
+        if cypher is not None:
+            yield "cypher", cypher
+            try:
+                for row in self.stream_cypher(cypher, params, top_k):
+                    context.append(row)
+                    yield "row", row
+            except Exception as e:
+                if context or not is_stale_plan(e):
+                    raise
+                self.cypher_cache.discard(template)
+                cypher = None
+
+        if cypher is None:
+            generated = self.generate_cypher(question)
+            cypher = parameterize(generated, params) if self.cypher_cache is not None else None
+            cacheable = cypher is not None
+            if not cacheable:
+                if self.cypher_cache is not None:
+                    self.cypher_cache.uncacheable += 1
+                cypher, params = generated, {}
+            yield "cypher", cypher
+            for row in self.stream_cypher(cypher, params, top_k):
+                context.append(row)
+                yield "row", row
+            if cacheable:
+                self.cypher_cache.put(template, cypher)
+
+        answer = []
+        for text in self.stream_answer(question, context):
+            answer.append(text)
+            yield "token", text
+        yield "answer", {"query": question, "result": "".join(answer)}
+
+    def cypher_qa(self, question: str):
+        """
+        Text2Cypher QA with a plan cache: questions whose template (question with
+        literals replaced) has been seen reuse the stored parameterized Cypher and
+        skip Cypher generation; Neo4j reuses its plan for the parameterized query.
+        Returns the same {"query", "result"} shape as GraphCypherQAChain.
+        """
+        if self.cypher_cache is None:
+            chain = self.chain  # also builds the schema selector and the Cypher guard
+            if self.schema_selector is not None or self.cypher_guard is not None:
+                # The chain would send the full schema and run its Cypher unguarded;
+                # run its steps here instead
+                context = self.run_cypher(self.generate_cypher(question))[: chain.top_k]
+                return {"query": question, "result": self.answer_from_context(question, context)}
+            with get_tracer().span("chain") as span:
+                return chain.invoke({"query": question}, config={"callbacks": llm_callbacks(span)})
+
+        from src.cypher_cache import templatize, parameterize, is_stale_plan
+        template, params = templatize(question)
+        cypher = self.cypher_cache.get(template)
+        current_span().set(cypher_cache_hit=cypher is not None)
+        if cypher is not None:
+            try:
+                context = self.run_cypher(cypher, params)[: self.chain.top_k]
+            except Exception as e:
+                # Stale plan (e.g. schema changed): drop it and regenerate. Timeouts,
+                # rejections and connection errors would fail the new plan too
+                if not is_stale_plan(e):
+                    raise
+                self.cypher_cache.discard(template)
+                cypher = None
+
+        if cypher is None:
+            generated = self.generate_cypher(question)
+            cypher = parameterize(generated, params)
+            if cypher is None:
+                self.cypher_cache.uncacheable += 1
+                context = self.run_cypher(generated)[: self.chain.top_k]
+            else:
+                context = self.run_cypher(cypher, params)[: self.chain.top_k]
+                self.cypher_cache.put(template, cypher)
+
+        return {"query": question, "result": self.answer_from_context(question, context)}
+
+    def wants_vectors(self, question: str):
         # Simple routing logic: check if question asks for "similar" or "description"
         # Ideally, use an Agent or RouterChain
-        if self.vector_store and ("similar" in question.lower() or "passage" in question.lower()):
+        lowered = question.lower()
+        return ("similar" in lowered or "passage" in lowered) and bool(self.vector_store or self.local_index)
+
+    def vector_answer(self, question: str):
+        precomputed = self.precomputed_similar(question) if "similar" in question.lower() else None
+        if precomputed is not None:
+            return precomputed
+        if RETRIEVAL_MODE == "hybrid":
+            return self.hybrid_search(question)
+        if self.local_index:
+            return "\n\n".join(self.local_similarity_search(question, k=3))
+        with get_tracer().span("vector.search", backend="neo4j", k=3):
+            docs = self.vector_store.similarity_search(question, k=3)
+        return "\n\n".join([d.page_content for d in docs])
+
+    def _cache_lookup(self, question, span):
+        """
+        (use_cache, graph version, cached answer or None). A failed lookup (e.g.
+        Neo4j unreachable while reading the version) skips the cache for this
+        question instead of failing it.
+        """
+        if self.answer_cache is None:
+            return False, None, None
+        try:
+            version = self.graph_version()
+            cached = self.answer_cache.get(question, version)
+        except Exception as e:
+            span.set(answer_cache_error=str(e))
+            return False, None, None
+        span.set(answer_cache_hit=cached is not None)
+        return True, version, cached
+
+    def query(self, question: str):
+        with get_tracer().span("query", question=question) as span:
+            return self._query(question, span)
+
+    def stream_query(self, question: str):
+        """
+        query() as a generator of (kind, value) events, so callers can show progress
+        long before the answer is complete:
+
+            ("cypher", statement)   generated (or cached) Cypher
+            ("row", dict)           each result row as Neo4j returns it (up to top_k)
+            ("token", text)         each answer chunk as the LLM produces it
+            ("answer", response)    the complete response, as query() would return it
+            ("error", message)      instead of "answer" when the question failed
+
+        Cached answers and vector-route answers arrive as a single "answer" event.
+        The trace spans stay open across yields, so don't interleave other traced
+        work with consuming the generator.
+        """
+        with get_tracer().span("query", question=question, streamed=True) as span:
+            use_cache, version, cached = self._cache_lookup(question, span)
+            if cached is not None:
+                yield "answer", cached
+                return
+            start = time.perf_counter()
+
+            response = None
+            if self.wants_vectors(question):
+                span.set(route="vector")
+                try:
+                    response = self.vector_answer(question)
+                except Exception as e:
+                    span.set(error=str(e))
+                    yield "error", f"Vector search failed: {e}"
+                    return
+                yield "answer", response
+            else:
+                span.set(route="cypher")
+                try:
+                    for kind, value in self.stream_cypher_qa(question):
+                        if kind == "answer":
+                            response = value
+                        yield kind, value
+                except Exception as e:
+                    span.set(error=str(e))
+                    yield "error", f"Error processing query: {e}"
+                    return
+
+            if use_cache:
+                self.answer_cache.put(question, response, time.perf_counter() - start, version)
+
+    def _query(self, question, span):
+        use_cache, version, cached = self._cache_lookup(question, span)
+        if cached is not None:
+            return cached
+        start = time.perf_counter()
+
+        if self.wants_vectors(question):
             print("Using Vector Search...")
+            span.set(route="vector")
             try:
-                docs = self.vector_store.similarity_search(question, k=3)
-                return "\n\n".join([d.page_content for d in docs])
+                response = self.vector_answer(question)
             except Exception as e:
+                span.set(error=str(e))
                 return f"Vector search failed: {e}"
-        
-        try:
-            return self.chain.invoke({"query": question})
-        except Exception as e:
-            return f"Error processing query: {e}"
+        else:
+            span.set(route="cypher")
+            try:
+                response = self.cypher_qa(question)
+            except Exception as e:
+                span.set(error=str(e))
+                return f"Error processing query: {e}"
+
+        # Errors above return early, so only real answers are cached
+        if use_cache:
+            self.answer_cache.put(question, response, time.perf_counter() - start, version)
+        return response
 
 if __name__ == "__main__":
     # Test run
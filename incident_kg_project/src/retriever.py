@@ -0,0 +1,99 @@
+from src.config import HYBRID_TOP_K, HYBRID_HOP_DEPTH, HYBRID_FANOUT
+from src.tracing import get_tracer
+
+# Head of the query: either the Neo4j vector index or ids already ranked by the
+# in-process index (src/vector_index.py). Both yield `passage` and `score`.
+_VECTOR_INDEX_HEAD = """
+CALL db.index.vector.queryNodes('passage_embeddings', $k, $embedding) YIELD node AS passage, score
+"""
+_LOCAL_HITS_HEAD = """
+UNWIND $hits AS hit
+MATCH (passage:Passage {id: hit.id})
+WITH passage, hit.score AS score
+"""
+
+# Neighbourhood of each hit, every collection capped at $fanout so the cost per
+# hit is bounded regardless of how dense the graph is.
+_EXPAND = """
+MATCH (passage)-[:FROM]->(issue:Issue)
+RETURN passage.id AS passage_id, passage.text AS text, score,
+       issue {{.key, .summary, .status, .severity, .created}} AS issue,
+       COLLECT {{ MATCH (issue)-[:HAS_COMPONENT]->(c:Component) RETURN c.name LIMIT $fanout }} AS components,
+       COLLECT {{ MATCH (issue)-[:HAS_PRODUCT]->(p:Product) RETURN p.name LIMIT $fanout }} AS products,
+       COLLECT {{ MATCH (issue)-[r:ASSIGNED_TO|REPORTED_BY]->(per:Person)
+                 RETURN {{name: per.display_name, role: type(r)}} LIMIT $fanout }} AS people,
+       COLLECT {{ MATCH (passage)-[:CHUNK_OF]->(s:Source)<-[:HAS_SOURCE]-(issue)
+                 RETURN DISTINCT s.source_type LIMIT $fanout }} AS sources,
+       {related}
+ORDER BY score DESC
+"""
+_RELATED = """COLLECT {{ MATCH (issue)-[:CLONES*1..{depth}]-(other:Issue) WHERE other <> issue
+                 RETURN DISTINCT other.key + ': ' + other.summary LIMIT $fanout }} AS related_issues"""
+
+
+def build_query(local=False, depth=HYBRID_HOP_DEPTH):
+    """
+    Cypher for one-round-trip hybrid retrieval; `depth` bounds the CLONES hops
+    (0 skips them). Variable-length bounds can't be parameters, hence the format.
+    """
+    depth = int(depth)
+    related = _RELATED.format(depth=depth) if depth > 0 else "[] AS related_issues"
+    head = _LOCAL_HITS_HEAD if local else _VECTOR_INDEX_HEAD
+    return head + _EXPAND.format(related=related)
+
+
+class HybridRetriever:
+    """
+    Vector search over Passage embeddings expanded through the incident graph
+    (Issue, Source, Component, Product, Person and CLONES neighbours) in a single
+    query. A passage shared by several issues yields one row per issue.
+    """
+
+    def __init__(self, graph, embeddings, local_index=None, k=HYBRID_TOP_K,
+                 depth=HYBRID_HOP_DEPTH, fanout=HYBRID_FANOUT):
+        self.graph = graph
+        self.embeddings = embeddings
+        self.local_index = local_index
+        self.k = k
+        self.fanout = fanout
+        self.query = build_query(local=local_index is not None, depth=depth)
+
+    def retrieve(self, question):
+        tracer = get_tracer()
+        with tracer.span("embed.query"):
+            vector = self.embeddings.embed_query(question)
+        params = {"fanout": self.fanout}
+        if self.local_index is not None:
+            with tracer.span("vector.search", backend="local", k=self.k):
+                hits = self.local_index.search(vector, self.k)
+            params["hits"] = [{"id": pid, "score": score} for pid, score in hits]
+        else:
+            params.update(k=self.k, embedding=vector)
+        with tracer.span("neo4j.execute", cypher="hybrid retrieval") as span:
+            rows = self.graph.query(self.query, params)
+            span.set(rows=len(rows))
+        return rows
+
+
+def format_context(rows):
+    """
+    Render retrieved rows as plain text for the CLI (or an LLM prompt).
+    """
+    blocks = []
+    for row in rows:
+        issue = row["issue"] or {}
+        lines = [f"[{issue.get('key')}] {issue.get('summary')} "
+                 f"({issue.get('severity')}, {issue.get('status')}) score={row['score']:.3f}",
+                 f"  {row['text']}"]
+        if row.get("sources"):
+            lines.append(f"  Source: {', '.join(row['sources'])}")
+        if row["components"] or row["products"]:
+            lines.append(f"  Components: {', '.join(row['components']) or '-'}; "
+                         f"Products: {', '.join(row['products']) or '-'}")
+        if row["people"]:
+            people = ", ".join(f"{p['name']} ({p['role'].lower()})" for p in row["people"])
+            lines.append(f"  People: {people}")
+        if row["related_issues"]:
+            lines.append(f"  Related: {'; '.join(row['related_issues'])}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
@@ -0,0 +1,173 @@
+from src.builder import DATABASE
+from src.config import INGEST_BATCH_SIZE, INGEST_WORKERS, INGEST_MAX_RETRIES
+from src.ingest import run_batched, chunked
+
+# Precomputed aggregates so analytics questions ("average duration of Sev1 incidents in
+# Product-2", "incident count by component last quarter") read a few Rollup nodes
+# instead of scanning every Issue. One Rollup per (dimension node, severity, month):
+#   (:Component|Product|Category)-[:HAS_ROLLUP]->(:Rollup {dimension, name, severity, month,
+#       issue_count, open_count, total_duration_ms, timed_count, avg_duration_ms})
+# (dimension, label, relationship from Issue)
+ROLLUP_DIMENSIONS = [
+    ("component", "Component", "HAS_COMPONENT"),
+    ("product", "Product", "HAS_PRODUCT"),
+    ("category", "Category", "HAS_CATEGORY"),
+]
+OPEN_STATUSES = ["Open", "In Progress"]
+# Month bucket of an issue, "YYYY-MM"
+MONTH = "substring(toString(i.created), 0, 7)"
+
+_AGGREGATES = """
+count(i) AS issue_count,
+sum(CASE WHEN i.status IN $open_statuses THEN 1 ELSE 0 END) AS open_count,
+sum(i.event_duration_ms) AS total_duration_ms,
+count(i.event_duration_ms) AS timed_count
+"""
+
+# Shown to the Cypher-generation LLM next to the schema (braces doubled for the prompt template)
+ROLLUP_PROMPT_HINT = """For counts, open counts or event durations per component, product, category,
+severity or month, read the precomputed Rollup nodes instead of aggregating Issue nodes:
+one Rollup per (dimension, name, severity, month) with dimension in ['component', 'product',
+'category'], month formatted 'YYYY-MM'. Sum issue_count/open_count/total_duration_ms/timed_count
+over the matching Rollups; an average duration is sum(total_duration_ms) * 1.0 / sum(timed_count).
+Example: MATCH (r:Rollup {{dimension: 'product', name: 'Product-2', severity: 'Sev1'}})
+RETURN sum(r.total_duration_ms) * 1.0 / sum(r.timed_count) AS avg_duration_ms"""
+
+
+def rollup_id(dimension, node_id, severity, month):
+    return f"{dimension}:{node_id}:{severity}:{month}"
+
+
+def _rollup_writer(label):
+    """
+    Upsert Rollup nodes under `label` dimension nodes from aggregate rows; buckets
+    whose issues are all gone are deleted. (`label` comes from ROLLUP_DIMENSIONS.)
+    """
+    upsert = f"""
+    UNWIND $rows AS row
+    WITH row WHERE row.issue_count > 0
+    MATCH (d:{label} {{id: row.node_id}})
+    MERGE (r:Rollup {{id: row.id}})
+    SET r.dimension = row.dimension,
+        r.name = d.name,
+        r.severity = row.severity,
+        r.month = row.month,
+        r.issue_count = row.issue_count,
+        r.open_count = row.open_count,
+        r.total_duration_ms = row.total_duration_ms,
+        r.timed_count = row.timed_count,
+        r.avg_duration_ms = CASE WHEN row.timed_count > 0
+                                 THEN row.total_duration_ms * 1.0 / row.timed_count END
+    MERGE (d)-[:HAS_ROLLUP]->(r)
+    """
+    def tx_func(tx, rows):
+        tx.run(upsert, rows=rows)
+        tx.run("""
+        UNWIND $rows AS row
+        WITH row WHERE row.issue_count = 0
+        MATCH (r:Rollup {id: row.id})
+        DETACH DELETE r
+        """, rows=rows)
+    return tx_func
+
+
+def _rollup_rows(records, dimension):
+    for record in records:
+        row = dict(record, dimension=dimension)
+        row["id"] = rollup_id(dimension, row["node_id"], row["severity"], row["month"])
+        yield row
+
+
+def _aggregate_all(driver, dimension, label, rel):
+    query = f"""
+    MATCH (d:{label})<-[:{rel}]-(i:Issue)
+    RETURN d.id AS node_id, coalesce(i.severity, 'Unknown') AS severity,
+           coalesce({MONTH}, 'Unknown') AS month, {_AGGREGATES}
+    """
+    with driver.session(database=DATABASE) as session:
+        records = session.execute_read(
+            lambda tx: [r.data() for r in tx.run(query, open_statuses=OPEN_STATUSES)]
+        )
+    return list(_rollup_rows(records, dimension))
+
+
+def _aggregate_buckets(driver, dimension, label, rel, buckets):
+    # Recount only the given buckets; a bucket with no issues left comes back with issue_count 0.
+    query = f"""
+    UNWIND $buckets AS b
+    MATCH (d:{label} {{id: b.node_id}})
+    OPTIONAL MATCH (d)<-[:{rel}]-(i:Issue)
+    WHERE coalesce(i.severity, 'Unknown') = b.severity AND coalesce({MONTH}, 'Unknown') = b.month
+    RETURN b.node_id AS node_id, b.severity AS severity, b.month AS month, {_AGGREGATES}
+    """
+    rows = []
+    with driver.session(database=DATABASE) as session:
+        for page in chunked(buckets, INGEST_BATCH_SIZE):
+            records = session.execute_read(
+                lambda tx: [r.data() for r in tx.run(query, buckets=page, open_statuses=OPEN_STATUSES)]
+            )
+            rows.extend(_rollup_rows(records, dimension))
+    # Buckets whose dimension node itself was deleted still need their Rollup removed
+    found = {row["id"] for row in rows}
+    for b in buckets:
+        rid = rollup_id(dimension, b["node_id"], b["severity"], b["month"])
+        if rid not in found:
+            rows.append({"id": rid, "issue_count": 0})
+    return rows
+
+
+def issue_buckets(driver, issue_ids):
+    """
+    Rollup buckets the given issues currently count towards, as
+    {dimension: [{node_id, severity, month}]}. Call before and after changing
+    the issues to know which rollups need refreshing.
+    """
+    buckets = {dimension: set() for dimension, _, _ in ROLLUP_DIMENSIONS}
+    with driver.session(database=DATABASE) as session:
+        for dimension, label, rel in ROLLUP_DIMENSIONS:
+            query = f"""
+            UNWIND $ids AS issue_id
+            MATCH (i:Issue {{id: issue_id}})-[:{rel}]->(d:{label})
+            RETURN DISTINCT d.id AS node_id, coalesce(i.severity, 'Unknown') AS severity,
+                   coalesce({MONTH}, 'Unknown') AS month
+            """
+            for page in chunked(issue_ids, INGEST_BATCH_SIZE):
+                for r in session.run(query, ids=page):
+                    buckets[dimension].add((r["node_id"], r["severity"], r["month"]))
+    return {
+        dimension: [{"node_id": n, "severity": s, "month": m} for n, s, m in sorted(keys)]
+        for dimension, keys in buckets.items()
+    }
+
+
+def merge_buckets(*bucket_maps):
+    merged = {}
+    for bucket_map in bucket_maps:
+        for dimension, buckets in bucket_map.items():
+            seen = merged.setdefault(dimension, {})
+            for b in buckets:
+                seen[(b["node_id"], b["severity"], b["month"])] = b
+    return {dimension: list(seen.values()) for dimension, seen in merged.items()}
+
+
+def refresh_rollups(driver, buckets=None, batch_size=INGEST_BATCH_SIZE, workers=INGEST_WORKERS,
+                    max_retries=INGEST_MAX_RETRIES):
+    """
+    Maintain Rollup nodes. With `buckets` (from issue_buckets / merge_buckets) only
+    those are recounted; without, every Rollup is rebuilt from the Issue nodes.
+    """
+    if buckets is None:
+        with driver.session(database=DATABASE) as session:
+            session.run("MATCH (r:Rollup) DETACH DELETE r")
+    stats = {}
+    for dimension, label, rel in ROLLUP_DIMENSIONS:
+        if buckets is None:
+            rows = _aggregate_all(driver, dimension, label, rel)
+        elif buckets.get(dimension):
+            rows = _aggregate_buckets(driver, dimension, label, rel, buckets[dimension])
+        else:
+            continue
+        stats[dimension] = run_batched(driver, _rollup_writer(label), rows, batch_size, workers,
+                                       max_retries, f"{dimension} rollups", len(rows))
+    return stats
+
@@ -0,0 +1,219 @@
+"""
+Per-question schema pruning for the Text2Cypher prompt.
+
+GraphCypherQAChain puts the whole graph schema into every Cypher-generation
+prompt, so prompt size grows with every label and property added to the graph.
+SchemaSelector precomputes a compact index of the schema once (per schema
+load) and, for each question, keeps only the labels, relationship types and
+properties the question refers to, matched by keyword:
+
+- label and property names split into words ("SlackChannel" -> slack, channel;
+  "event_duration_ms" -> event, duration), plus the synonyms in SYNONYMS;
+- literal patterns such as Component-3 (label name + number), INC-1234 and Sev1.
+
+The hub label (the one with the most relationship types, Issue here) is always
+kept since almost every question goes through it. The result is rendered in
+the same format as the chain's own schema and trimmed to a token budget
+(estimated at 4 characters per token); stats() reports the savings.
+"""
+import re
+import threading
+
+CHARS_PER_TOKEN = 4
+# Properties kept for any selected label so it can be matched and returned
+IDENTITY_PROPERTIES = ("key", "name", "display_name", "id")
+
+# Question words that refer to a schema element without naming it
+SYNONYMS = {
+    "Issue": ["incident", "ticket", "bug", "outage", "problem"],
+    "Person": ["who", "people", "engineer", "assignee", "assigned", "reporter", "reported", "owner"],
+    "SlackChannel": ["slack", "channel"],
+    "Passage": ["comment", "note", "text", "passage", "discussion"],
+    "Source": ["postmortem", "thread", "jira", "source"],
+    "Hour": ["overlap", "overlapped", "overlapping", "concurrent", "simultaneous", "during", "while",
+             "between", "last", "past", "week", "yesterday", "today"],
+    "Rollup": ["average", "avg", "mean", "total", "mttr", "trend", "month", "monthly", "per"],
+    "status": ["open", "closed", "resolved", "progress"],
+    "severity": ["sev", "critical"],
+    "event_duration_ms": ["duration", "long", "mttr", "downtime"],
+    "created": ["when", "date", "recent", "latest", "since", "before", "after"],
+    "env_type": ["production", "staging", "environment"],
+}
+_LITERALS = [
+    (re.compile(r"\bINC-\d+\b", re.I), "Issue", "key"),
+    (re.compile(r"\bSev\d\b", re.I), "Issue", "severity"),
+]
+_NAMED_LITERAL = re.compile(r"\b([A-Za-z]+)-\d+\b")
+# Connective words in relationship types (ASSIGNED_TO, REPORTED_BY) that say nothing on their own
+_STOPWORDS = {"has", "have", "by", "to", "from", "in", "of", "on", "for", "is"}
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def estimate_tokens(text):
+    # Rounded up, so the estimates of consecutive pieces of a text add up to at
+    # least the estimate of the whole (src/passages.py packs chunks on that)
+    return -(-len(text or "") // CHARS_PER_TOKEN)
+
+
+def _words(name):
+    # "SlackChannel" -> {"slack", "channel"}, "event_duration_ms" -> {"event", "duration", "ms"}
+    spaced = re.sub(r"(?<=[a-z0-9])(?=[A-Z])", " ", name).replace("_", " ").lower()
+    return {_stem(w) for w in _WORD.findall(spaced)}
+
+
+def _stem(word):
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def render(node_props, rel_props, relationships):
+    """
+    Schema text in GraphCypherQAChain's format.
+    """
+    def props(items):
+        return ", ".join(f"{p['property']}: {p['type']}" for p in items)
+
+    return "\n".join([
+        "Node properties are the following:",
+        ",".join(f"{label} {{{props(items)}}}" for label, items in node_props.items()),
+        "Relationship properties are the following:",
+        ",".join(f"{rel} {{{props(items)}}}" for rel, items in rel_props.items()),
+        "The relationships are the following:",
+        ",".join(f"(:{r['start']})-[:{r['type']}]->(:{r['end']})" for r in relationships),
+    ])
+
+
+class SchemaSelector:
+    """
+    Question-specific subsets of a Neo4jGraph structured schema.
+    """
+
+    def __init__(self, structured_schema, exclude_types=(), token_budget=600):
+        self.token_budget = token_budget
+        keep = lambda name: name not in exclude_types
+        self.node_props = {k: v for k, v in structured_schema.get("node_props", {}).items() if keep(k)}
+        self.rel_props = {k: v for k, v in structured_schema.get("rel_props", {}).items() if keep(k)}
+        self.relationships = [r for r in structured_schema.get("relationships", [])
+                              if all(keep(r[t]) for t in ("start", "type", "end"))]
+        self.full_schema = render(self.node_props, self.rel_props, self.relationships)
+        self.full_tokens = estimate_tokens(self.full_schema)
+
+        # word -> labels / (label, property) / relationship types it points at
+        self._label_words, self._prop_words, self._rel_words = {}, {}, {}
+        for label in self.node_props:
+            for word in _words(label) | {_stem(s) for s in SYNONYMS.get(label, ())}:
+                self._label_words.setdefault(word, set()).add(label)
+        for label, items in self.node_props.items():
+            for p in items:
+                words = _words(p["property"]) | {_stem(s) for s in SYNONYMS.get(p["property"], ())}
+                for word in words:
+                    self._prop_words.setdefault(word, set()).add((label, p["property"]))
+        for r in self.relationships:
+            for word in _words(r["type"]) - _STOPWORDS:
+                self._rel_words.setdefault(word, set()).add(r["type"])
+        degree = {}
+        for r in self.relationships:
+            for end in (r["start"], r["end"]):
+                degree[end] = degree.get(end, 0) + 1
+        self.hub = max(degree, key=degree.get) if degree else None
+        self._by_lower = {label.lower(): label for label in self.node_props}
+
+        self._lock = threading.Lock()
+        self.questions = 0
+        self.selected_tokens = 0
+
+    def match(self, question):
+        """
+        (label scores, {(label, property)}, {relationship types}) the question refers to.
+        """
+        labels, props, rels = {}, set(), set()
+        for pattern, label, prop in _LITERALS:
+            if pattern.search(question) and label in self.node_props:
+                labels[label] = labels.get(label, 0) + 3
+                props.add((label, prop))
+        for prefix in _NAMED_LITERAL.findall(question):
+            label = self._by_lower.get(prefix.lower())
+            if label is not None:
+                labels[label] = labels.get(label, 0) + 3
+                props.add((label, "name"))
+        for word in {_stem(w) for w in _WORD.findall(question.lower())}:
+            named = self._label_words.get(word, ())
+            for label in named:
+                labels[label] = labels.get(label, 0) + 2
+            for label, prop in self._prop_words.get(word, ()):
+                # "issues" names Issue; it does not make Rollup.issue_count relevant
+                if named and label not in named:
+                    continue
+                labels[label] = labels.get(label, 0) + 1
+                props.add((label, prop))
+            rels |= self._rel_words.get(word, set())
+        return labels, props, rels
+
+    def select(self, question, token_budget=None):
+        """
+        Pruned schema text for `question`, at most `token_budget` tokens (estimated)
+        unless even the hub label alone is larger. Falls back to the full schema
+        when the structured schema is empty.
+        """
+        budget = token_budget or self.token_budget
+        if not self.node_props:
+            return self.full_schema
+        scores, props, rels = self.match(question)
+        for r in self.relationships:
+            if r["type"] in rels:
+                for end in (r["start"], r["end"]):
+                    scores[end] = scores.get(end, 0) + 1
+        if not scores and self.hub is not None:
+            # Nothing matched at all: offer the hub's neighbours by identity only
+            for r in self.relationships:
+                if self.hub in (r["start"], r["end"]):
+                    for end in (r["start"], r["end"]):
+                        scores.setdefault(end, 0)
+        if self.hub is not None:
+            scores[self.hub] = max(scores.values(), default=0) + 1
+        labels = sorted(scores, key=lambda label: -scores[label])
+
+        def build(labels, full_labels):
+            node_props = {}
+            for label in labels:
+                items = self.node_props.get(label, [])
+                if label not in full_labels:
+                    items = [p for p in items
+                             if p["property"] in IDENTITY_PROPERTIES or (label, p["property"]) in props]
+                node_props[label] = items
+            chosen = set(labels)
+            relationships = [r for r in self.relationships if r["start"] in chosen and r["end"] in chosen]
+            rel_types = {r["type"] for r in relationships}
+            rel_props = {k: v for k, v in self.rel_props.items() if k in rel_types}
+            return render(node_props, rel_props, relationships)
+
+        # Add labels by score, then give labels all their properties while the budget allows
+        chosen, text = [], None
+        for label in labels:
+            candidate = build(chosen + [label], set())
+            if text is not None and estimate_tokens(candidate) > budget:
+                break
+            chosen.append(label)
+            text = candidate
+        full = set()
+        for label in [label for label in chosen if scores[label] > 0]:
+            candidate = build(chosen, full | {label})
+            if estimate_tokens(candidate) <= budget:
+                full.add(label)
+                text = candidate
+
+        with self._lock:
+            self.questions += 1
+            self.selected_tokens += estimate_tokens(text)
+        return text
+
+    def stats(self):
+        with self._lock:
+            saved = self.questions * self.full_tokens - self.selected_tokens
+            return {
+                "questions": self.questions,
+                "full_tokens": self.full_tokens,
+                "avg_selected_tokens": self.selected_tokens / self.questions if self.questions else 0.0,
+                "saved_tokens": saved,
+                "saved_pct": saved / (self.questions * self.full_tokens) * 100
+                if self.questions and self.full_tokens else 0.0,
+            }
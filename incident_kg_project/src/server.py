@@ -0,0 +1,177 @@
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.answer_cache import normalize_question
+from src.connection import pool_metrics
+from src.config import SERVER_HOST, SERVER_PORT, SERVER_MAX_CONCURRENCY, SERVER_MAX_PENDING
+from src.pipeline import is_error_response
+
+
+class Overloaded(Exception):
+    pass
+
+
+class QueryServer:
+    """
+    Asyncio HTTP front end sharing one warm RAGPipeline (and so one Neo4j driver
+    pool and LLM client) between many concurrent users.
+
+    - At most `max_concurrency` pipeline queries run at once (on a thread pool,
+      since RAGPipeline.query is blocking).
+    - Identical in-flight questions (after normalization) are coalesced onto a
+      single pipeline call.
+    - Once `max_pending` distinct questions are queued or running, new ones are
+      rejected with 503 instead of piling up.
+
+    Endpoints: POST /query {"question": "..."}, GET /stats, GET /health.
+    """
+
+    def __init__(self, pipeline, max_concurrency=SERVER_MAX_CONCURRENCY, max_pending=SERVER_MAX_PENDING):
+        self.pipeline = pipeline
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="rag-query")
+        self._semaphore = None
+        self._in_flight = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.errors = 0
+
+    async def answer(self, question):
+        key = normalize_question(question)
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            if len(self._in_flight) >= self.max_pending:
+                self.rejected += 1
+                raise Overloaded()
+            task = asyncio.ensure_future(self._run(question))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # shield: a client disconnecting must not cancel a call others are waiting on
+        return await asyncio.shield(task)
+
+    async def _run(self, question):
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self.pipeline.query, question)
+
+    def stats(self):
+        stats = {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "in_flight": len(self._in_flight),
+        }
+        if self.pipeline.answer_cache is not None:
+            stats["answer_cache"] = self.pipeline.answer_cache.stats()
+        if self.pipeline.cypher_cache is not None:
+            stats["cypher_cache"] = self.pipeline.cypher_cache.stats()
+        if self.pipeline.schema_selector is not None:
+            stats["schema_pruning"] = self.pipeline.schema_selector.stats()
+        if self.pipeline.cypher_guard is not None:
+            stats["cypher_guard"] = self.pipeline.cypher_guard.stats()
+        pool = pool_metrics()
+        if pool:
+            stats["neo4j_pool"] = pool
+        return stats
+
+    async def _route(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok", "ready": self.pipeline.ready()}
+        if method == "GET" and path == "/stats":
+            return 200, self.stats()
+        if method == "POST" and path == "/query":
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                payload = None
+            if not isinstance(payload, dict):
+                return 400, {"error": "Body must be a JSON object: {\"question\": \"...\"}"}
+            question = payload.get("question", "")
+            if not isinstance(question, str):
+                return 400, {"error": "question must be a string"}
+            if not question.strip():
+                return 400, {"error": "Missing question"}
+            self.requests += 1
+            start = time.perf_counter()
+            try:
+                response = await self.answer(question)
+            except Overloaded:
+                return 503, {"error": "Server busy, retry later"}
+            except Exception as e:
+                self.errors += 1
+                return 500, {"error": str(e)}
+            if is_error_response(response):
+                # The pipeline reports failures as text; they are still server errors
+                self.errors += 1
+                return 500, {"error": response}
+            answer = response.get("result", response) if isinstance(response, dict) else response
+            return 200, {"answer": answer, "seconds": time.perf_counter() - start}
+        return 404, {"error": "Not found"}
+
+    async def handle_connection(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive; enough for curl and the load-test harness.
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+
+                status, payload = await self._route(method, path, body)
+                data = json.dumps(payload, default=str).encode("utf-8")
+                reason = {200: "OK", 400: "Bad Request", 404: "Not Found",
+                          500: "Internal Server Error", 503: "Service Unavailable"}[status]
+                writer.write(
+                    f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host=SERVER_HOST, port=SERVER_PORT):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def serve(pipeline, host=SERVER_HOST, port=SERVER_PORT, **kwargs):
+    server = await QueryServer(pipeline, **kwargs).start(host, port)
+    print(f"Serving RAG pipeline on http://{host}:{port} (POST /query, GET /stats)")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    from src.pipeline import RAGPipeline
+
+    parser = argparse.ArgumentParser(description="Serve the RAG pipeline over HTTP.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--max-concurrency", type=int, default=SERVER_MAX_CONCURRENCY)
+    parser.add_argument("--max-pending", type=int, default=SERVER_MAX_PENDING)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(RAGPipeline(), args.host, args.port,
+                          max_concurrency=args.max_concurrency, max_pending=args.max_pending))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,243 @@
+"""
+Vectorized, multi-process variant of src/generator.py for load-test scale data.
+
+Issues are produced in NumPy blocks (categorical fields, timestamps and
+relationship picks are sampled for a whole block at once; text is assembled
+from word and company pools drawn from Faker once up front) by a process pool,
+one gzipped JSONL shard per task:
+
+    data/shards/incidents-00003-of-00016.jsonl.gz
+
+Keys are derived from the global issue index (INC-<1000 + index>), so shards
+never collide and CLONES targets in other shards are known without
+coordination. With the same seed the output is identical regardless of the
+number of workers.
+
+Skew options for stress tests:
+- component_skew: Zipf exponent for component popularity (0 = uniform), so a
+  few "hot" components own most issues.
+- bursts / burst_share: share of issues packed into that many short incident
+  windows instead of spread over the year.
+- chain_rate: share of clones that clone the previous clone, forming
+  CLONES chains instead of isolated pairs.
+"""
+import os
+import random
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from faker import Faker
+from src.data_io import write_incidents
+from src.generator import (
+    ISSUE_TYPES, STATUSES, RESOLUTIONS, SEVERITIES, IMPACTS, ENV_TYPES,
+    PASSAGES_PER_ISSUE, MAX_LABELS_PER_ISSUE, CLONE_RATE, seed_all, generate_reference_data,
+)
+
+BLOCK_SIZE = 5000
+WORD_POOL_SIZE = 20000
+COMPANY_POOL_SIZE = 500
+BURST_WIDTH_HOURS = 6
+SHARD_NAME = "incidents-{shard:05d}-of-{shards:05d}.jsonl.gz"
+# gzip level 9 (the write_incidents default) takes longer than generating the rows
+SHARD_COMPRESSLEVEL = 1
+
+
+def build_pools(seed, end_date, bursts=0):
+    """
+    Everything shared by all shards: reference entities, text pools and burst
+    windows. Built once in the parent from `seed`.
+    """
+    seed_all(seed)
+    fake = Faker()
+    components, products, categories, people, labels, slack_channels = generate_reference_data()
+    year_start = end_date - timedelta(days=365)
+    return {
+        "components": components,
+        "products": products,
+        "categories": categories,
+        "people": people,
+        "labels": labels,
+        "slack_channels": slack_channels,
+        "words": np.array(fake.words(nb=WORD_POOL_SIZE)),
+        "companies": np.array([fake.company() for _ in range(COMPANY_POOL_SIZE)]),
+        "start_ts": _ts(year_start),
+        "end_ts": _ts(end_date),
+        "burst_centers": np.sort(np.array([random.uniform(_ts(year_start), _ts(end_date))
+                                           for _ in range(bursts)])),
+    }
+
+
+def _zipf_weights(n, exponent):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _sentences(rng, words, count, min_words, max_words):
+    # `count` sentences of random pool words, capitalized and full-stopped
+    lengths = rng.integers(min_words, max_words + 1, count)
+    picks = words[rng.integers(0, len(words), lengths.sum())]
+    out, pos = [], 0
+    for length in lengths:
+        sentence = " ".join(picks[pos:pos + length])
+        pos += length
+        out.append(sentence[0].upper() + sentence[1:] + ".")
+    return out
+
+
+# Naive datetimes are taken as UTC both ways, so a seed gives the same data in every
+# local timezone (and no DST gaps or repeats)
+def _ts(dt):
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def generate_block(rng, first_index, n, pools, options):
+    """
+    Issues with global indexes first_index .. first_index + n - 1.
+    """
+    components, labels = pools["components"], pools["labels"]
+
+    # Timestamps: spread over the year, or packed into a burst window
+    created = rng.uniform(pools["start_ts"], pools["end_ts"], n)
+    if len(pools["burst_centers"]) and options["burst_share"] > 0:
+        in_burst = rng.random(n) < options["burst_share"]
+        centers = pools["burst_centers"][rng.integers(0, len(pools["burst_centers"]), in_burst.sum())]
+        offsets = np.abs(rng.normal(0, BURST_WIDTH_HOURS * 3600, in_burst.sum()))
+        created[in_burst] = np.minimum(centers + offsets, pools["end_ts"])
+    updated = created + rng.integers(0, 31, n) * 86400.0
+    event_start = created + rng.integers(0, 61, n) * 60.0
+    event_end = event_start + rng.integers(10, 301, n) * 60.0
+
+    pick = lambda values: rng.integers(0, len(values), n)
+    types, statuses, severities = pick(ISSUE_TYPES), pick(STATUSES), pick(SEVERITIES)
+    impacts, envs, resolutions = pick(IMPACTS), pick(ENV_TYPES), pick(RESOLUTIONS)
+    has_resolution = rng.random(n) > 0.3
+    products, categories = pick(pools["products"]), pick(pools["categories"])
+    reporters, assignees = pick(pools["people"]), pick(pools["people"])
+    channels, has_channel = pick(pools["slack_channels"]), rng.random(n) > 0.5
+    companies = pick(pools["companies"])
+
+    weights = _zipf_weights(len(components), options["component_skew"])
+    first_component = rng.choice(len(components), n, p=weights)
+    second_component = rng.choice(len(components), n, p=weights)
+    two_components = (rng.random(n) < 0.5) & (second_component != first_component)
+
+    label_counts = rng.integers(0, min(options["max_labels"], len(labels)) + 1, n)
+    label_order = np.argsort(rng.random((n, len(labels))), axis=1)
+
+    passage_counts = rng.integers(options["passages"][0], options["passages"][1] + 1, n)
+    total_passages = int(passage_counts.sum())
+    passage_texts = _sentences(rng, pools["words"], total_passages * 3, 6, 14)
+    passage_offsets = rng.integers(1, 101, total_passages) * 60.0
+    summaries = _sentences(rng, pools["words"], n, 8, 12)
+
+    indexes = np.arange(first_index, first_index + n)
+    is_clone = (rng.random(n) < options["clone_rate"]) & (indexes > 0)
+    clone_targets = (rng.random(n) * np.maximum(indexes, 1)).astype(np.int64)
+    chained = rng.random(n) < options["chain_rate"]
+    id_bytes = rng.bytes(16 * (n + total_passages * 2))
+
+    def new_id(i):
+        return str(uuid.UUID(bytes=id_bytes[16 * i:16 * i + 16], version=4))
+
+    issues, passage_pos, id_pos, last_clone = [], 0, n, None
+    for row in range(n):
+        index = int(indexes[row])
+        key = f"INC-{1000 + index}"
+        url = f"https://aconex.oracle.com/issue/{key}"
+        issue_components = [components[first_component[row]]]
+        if two_components[row]:
+            issue_components.append(components[second_component[row]])
+        issue = {
+            "id": new_id(row),
+            "key": key,
+            "type": ISSUE_TYPES[types[row]],
+            "status": STATUSES[statuses[row]],
+            "resolution": RESOLUTIONS[resolutions[row]] if has_resolution[row] else None,
+            "severity": SEVERITIES[severities[row]],
+            "impact": IMPACTS[impacts[row]],
+            "env_type": ENV_TYPES[envs[row]],
+            "customer_env": str(pools["companies"][companies[row]]),
+            "event_start": _iso(event_start[row]),
+            "event_end": _iso(event_end[row]),
+            "event_duration_ms": int((event_end[row] - event_start[row]) * 1000),
+            "summary": summaries[row],
+            "created": _iso(created[row]),
+            "updated": _iso(updated[row]),
+            "url": url,
+            "components": issue_components,
+            "product": pools["products"][products[row]],
+            "category": pools["categories"][categories[row]],
+            "reporter": pools["people"][reporters[row]],
+            "assignee": pools["people"][assignees[row]],
+            "labels": [labels[i] for i in label_order[row, :label_counts[row]]],
+            "slack_channel": pools["slack_channels"][channels[row]] if has_channel[row] else None,
+            "passages": [],
+        }
+        for _ in range(passage_counts[row]):
+            issue["passages"].append({
+                "id": new_id(id_pos),
+                "source_type": "Jira Comment",
+                "source_id": new_id(id_pos + 1),
+                "text": " ".join(passage_texts[3 * passage_pos:3 * passage_pos + 3]),
+                "created": _iso(created[row] + passage_offsets[passage_pos]),
+                "url": url,
+            })
+            passage_pos += 1
+            id_pos += 2
+        if is_clone[row]:
+            target = last_clone if chained[row] and last_clone is not None else int(clone_targets[row])
+            issue["clones"] = f"INC-{1000 + target}"
+            last_clone = index
+            if target >= first_index:
+                # Clones copy their original's own sources (when it is in this block), with
+                # ids derived from the original's so the output stays independent of workers
+                original = target - first_index
+                for source in issues[original]["passages"][:passage_counts[original]]:
+                    issue["passages"].append(dict(
+                        source, url=url,
+                        id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"{url}#{source['id']}")),
+                        source_id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"{url}#{source['source_id']}")),
+                    ))
+        issues.append(issue)
+    return issues
+
+
+def _iter_shard(start, end, seed, shard, pools, options):
+    rng = np.random.default_rng([seed, shard])
+    for block_start in range(start, end, BLOCK_SIZE):
+        yield from generate_block(rng, block_start, min(BLOCK_SIZE, end - block_start), pools, options)
+
+
+def write_shard(task):
+    path, start, end, seed, shard, pools, options = task
+    return write_incidents(path, _iter_shard(start, end, seed, shard, pools, options), SHARD_COMPRESSLEVEL)
+
+
+def generate_sharded(output_dir, num_issues, shards=8, workers=None, seed=0, end_date=None,
+                     passages=PASSAGES_PER_ISSUE, max_labels=MAX_LABELS_PER_ISSUE, clone_rate=CLONE_RATE,
+                     component_skew=0.0, bursts=0, burst_share=0.0, chain_rate=0.0):
+    """
+    Write `num_issues` issues as `shards` JSONL.gz files in `output_dir` using
+    `workers` processes (default: one per CPU). Returns the shard paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    pools = build_pools(seed, end_date or datetime.now(), bursts)
+    options = {
+        "passages": tuple(passages), "max_labels": max_labels, "clone_rate": clone_rate,
+        "component_skew": component_skew, "burst_share": burst_share, "chain_rate": chain_rate,
+    }
+    bounds = np.linspace(0, num_issues, shards + 1).astype(int)
+    tasks = [
+        (os.path.join(output_dir, SHARD_NAME.format(shard=shard, shards=shards)),
+         int(bounds[shard]), int(bounds[shard + 1]), seed, shard, pools, options)
+        for shard in range(shards)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        counts = list(pool.map(write_shard, tasks))
+    print(f"Generated {sum(counts)} issues in {shards} shards under {output_dir}")
+    return [task[0] for task in tasks]
@@ -0,0 +1,216 @@
+import hashlib
+import time
+import numpy as np
+from src.config import (
+    NEO4J_DATABASE, INGEST_BATCH_SIZE, INGEST_WORKERS, INGEST_MAX_RETRIES,
+    SIMILARITY_TOP_K, SIMILARITY_BLOCK_SIZE,
+)
+from src.builder import bump_graph_version
+from src.ingest import run_batched
+from src.vector_index import _normalize
+
+DATABASE = NEO4J_DATABASE
+PAGE_SIZE = 5000
+
+
+def fetch_issue_vectors(driver, page_size=PAGE_SIZE):
+    """
+    One vector per Issue: the normalized mean of its passage embeddings.
+    Issues without embedded passages are skipped. Returns (ids, matrix,
+    {id: fingerprint of the embedded passage ids the vector was built from}).
+    """
+    query = """
+    MATCH (i:Issue) WHERE i.id > $after
+    WITH i ORDER BY i.id LIMIT $limit
+    OPTIONAL MATCH (p:Passage)-[:FROM]->(i) WHERE p.embedding IS NOT NULL
+    RETURN i.id AS id, collect(p.embedding) AS embeddings, collect(p.id) AS passages
+    ORDER BY id
+    """
+    ids, vectors, fingerprints, after = [], [], {}, ""
+    while True:
+        with driver.session(database=DATABASE) as session:
+            page = session.execute_read(
+                lambda tx: [r.data() for r in tx.run(query, after=after, limit=page_size)]
+            )
+        for row in page:
+            if row["embeddings"]:
+                ids.append(row["id"])
+                fingerprints[row["id"]] = passage_fingerprint(row["passages"])
+                vectors.append(np.mean(np.asarray(row["embeddings"], dtype=np.float32), axis=0))
+        if len(page) < page_size:
+            break
+        after = page[-1]["id"]
+    if not ids:
+        return [], np.zeros((0, 0), dtype=np.float32), {}
+    return ids, _normalize(np.stack(vectors)), fingerprints
+
+
+def passage_fingerprint(passage_ids):
+    # Changes when a passage is added to or removed from the issue, even one embedded long ago
+    return hashlib.sha1("\n".join(sorted(passage_ids)).encode("utf-8")).hexdigest()
+
+
+def top_k_neighbours(matrix, rows, k, block_size=SIMILARITY_BLOCK_SIZE):
+    """
+    Exact top-k cosine neighbours (self excluded) for `rows` of a normalized matrix,
+    computed block by block so only a (block_size x n) score matrix exists at a time.
+    Yields (row, neighbour positions, scores), best first.
+    """
+    k = min(k, len(matrix) - 1)
+    if k <= 0:
+        return
+    rows = np.asarray(rows)
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        scores = matrix[block] @ matrix.T
+        scores[np.arange(len(block)), block] = -np.inf
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        for row, positions, row_scores in zip(block, top, top_scores):
+            yield int(row), positions, row_scores
+
+
+def _rows_beating_min_score(matrix, changed, min_scores, block_size=SIMILARITY_BLOCK_SIZE):
+    # Rows for which some changed issue now scores above their current k-th neighbour.
+    affected = set()
+    changed = np.asarray(changed)
+    changed_vectors = matrix[changed]
+    for start in range(0, len(matrix), block_size):
+        rows = np.arange(start, min(start + block_size, len(matrix)))
+        scores = matrix[rows] @ changed_vectors.T
+        scores[rows[:, None] == changed[None, :]] = -np.inf
+        affected.update(rows[scores.max(axis=1) > min_scores[rows]].tolist())
+    return affected
+
+
+def write_similarities(tx, rows):
+    tx.run("""
+    UNWIND $rows AS row
+    MATCH (i:Issue {id: row.id})-[old:SIMILAR_TO]->()
+    DELETE old
+    """, rows=rows)
+    tx.run("""
+    UNWIND $rows AS row
+    MATCH (i:Issue {id: row.id})
+    SET i.similar_min_score = row.min_score,
+        i.similar_passages = row.passages
+    WITH i, row
+    UNWIND row.neighbours AS n
+    MATCH (other:Issue {id: n.id})
+    MERGE (i)-[s:SIMILAR_TO]->(other)
+    SET s.score = n.score
+    """, rows=rows)
+
+
+SIMILAR_ISSUES_QUERY = """
+MATCH (:Issue {key: $key})-[s:SIMILAR_TO]->(other:Issue)
+RETURN other.key AS key, other.summary AS summary, other.status AS status,
+       other.severity AS severity, s.score AS score
+ORDER BY score DESC LIMIT $limit
+"""
+
+
+def similar_issues(graph, key, limit=SIMILARITY_TOP_K):
+    """
+    Precomputed neighbours of one issue: a single hop, no embedding call.
+    """
+    return graph.query(SIMILAR_ISSUES_QUERY, {"key": key, "limit": limit})
+
+
+def _incremental_targets(driver, ids, matrix, fingerprints, k):
+    position = {pid: i for i, pid in enumerate(ids)}
+    with driver.session(database=DATABASE) as session:
+        meta = session.run(
+            "MATCH (m:GraphMeta {id: 'similarity'}) RETURN m.watermark AS watermark"
+        ).single()
+        watermark = meta["watermark"] if meta else None
+        if watermark is None:
+            return set(range(len(ids)))
+        changed_ids = {r["id"] for r in session.run("""
+            MATCH (p:Passage)-[:FROM]->(i:Issue)
+            WHERE coalesce(p.embedded_at, 0) > $watermark
+            RETURN DISTINCT i.id AS id
+        """, watermark=watermark)}
+        state = {r["id"]: r for r in session.run("""
+            MATCH (i:Issue) WHERE i.similar_min_score IS NOT NULL
+            RETURN i.id AS id, i.similar_min_score AS min_score, i.similar_passages AS passages,
+                   COUNT { (i)-[:SIMILAR_TO]->() } AS degree
+        """)}
+        # Passages removed from (or already-embedded ones added to) an issue move its
+        # vector without any new embedded_at
+        changed_ids |= {pid for pid, row in state.items() if row["passages"] != fingerprints.get(pid)}
+        # Issues left without embedded passages keep no edges of their own
+        session.run("""
+            UNWIND $ids AS issue_id
+            MATCH (i:Issue {id: issue_id})
+            OPTIONAL MATCH (i)-[s:SIMILAR_TO]->()
+            DELETE s
+            REMOVE i.similar_min_score, i.similar_passages
+        """, ids=[pid for pid in state if pid not in position])
+        changed = [position[pid] for pid in changed_ids if pid in position]
+        pointing_at_changed = {r["id"] for r in session.run("""
+            MATCH (i:Issue)-[:SIMILAR_TO]->(j:Issue) WHERE j.id IN $ids
+            RETURN DISTINCT i.id AS id
+        """, ids=list(changed_ids))}
+
+    expected_degree = min(k, len(ids) - 1)
+    targets = set(changed)
+    min_scores = np.full(len(ids), np.inf, dtype=np.float32)
+    for pid, row in position.items():
+        issue_state = state.get(pid)
+        if issue_state is None or issue_state["degree"] < expected_degree or pid in pointing_at_changed:
+            # new, lost a neighbour (deleted issue), or a neighbour's vector moved
+            targets.add(row)
+        else:
+            min_scores[row] = issue_state["min_score"]
+    if changed:
+        targets |= _rows_beating_min_score(matrix, changed, min_scores)
+    return targets
+
+
+def compute_similarity(driver, k=SIMILARITY_TOP_K, incremental=True, block_size=SIMILARITY_BLOCK_SIZE,
+                       batch_size=INGEST_BATCH_SIZE, workers=INGEST_WORKERS):
+    """
+    Precompute (:Issue)-[:SIMILAR_TO {score}]->(:Issue) edges to each issue's top-k
+    most similar issues (cosine over mean passage embeddings).
+
+    Incremental runs only recompute issues whose vector changed since the last run
+    (a passage embedded, added or removed), issues that a changed vector now
+    outranks or used to rank, and issues missing neighbours; everything else keeps
+    its edges.
+    """
+    started = time.perf_counter()
+    # Watermark taken before reading so passages embedded meanwhile are seen next time
+    with driver.session(database=DATABASE) as session:
+        new_watermark = session.run("RETURN timestamp() AS now").single()["now"]
+    ids, matrix, fingerprints = fetch_issue_vectors(driver)
+    if len(ids) < 2:
+        print("Not enough embedded issues for similarity edges.")
+        return {"issues": len(ids), "recomputed": 0}
+
+    targets = (_incremental_targets(driver, ids, matrix, fingerprints, k) if incremental
+               else set(range(len(ids))))
+    print(f"Computing top-{k} similar issues for {len(targets)} of {len(ids)} issues...")
+
+    def rows():
+        for row, positions, scores in top_k_neighbours(matrix, sorted(targets), k, block_size):
+            yield {
+                "id": ids[row],
+                "min_score": float(scores[-1]),
+                "passages": fingerprints[ids[row]],
+                "neighbours": [{"id": ids[p], "score": float(s)} for p, s in zip(positions, scores)],
+            }
+
+    stats = run_batched(driver, write_similarities, rows(), batch_size, workers,
+                        INGEST_MAX_RETRIES, "SIMILAR_TO", len(targets))
+    with driver.session(database=DATABASE) as session:
+        if not stats["failed_rows"]:
+            session.run("MERGE (m:GraphMeta {id: 'similarity'}) SET m.watermark = $watermark",
+                        watermark=new_watermark)
+        if stats["rows"]:
+            session.execute_write(bump_graph_version)
+    return {"issues": len(ids), "recomputed": len(targets),
+            "seconds": time.perf_counter() - started, "write": stats}
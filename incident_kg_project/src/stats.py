@@ -0,0 +1,14 @@
+"""
+Summary statistics shared by trace summaries (src/tracing.py) and the benchmark
+scripts, so both report the same percentile for the same data.
+"""
+
+
+def percentile(values, p):
+    """
+    Nearest-rank `p`th percentile of `values` (0.0 when empty).
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
@@ -0,0 +1,139 @@
+import re
+import time
+from typing import Any, Iterator, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_QUESTION = re.compile(r"The question is:\s*(.*)$|Question:\s*(.*?)\s*Helpful Answer:", re.S)
+_COMPONENT = re.compile(r"\bComponent-\d+\b")
+_PRODUCT = re.compile(r"\bProduct-\d+\b")
+_ISSUE_KEY = re.compile(r"\bINC-\d+\b")
+_SEVERITY = re.compile(r"\bSev\d\b", re.I)
+_WINDOW = re.compile(r"\b(?:last|past)\s+(?:(\d+)\s+)?(day|week|month)s?\b", re.I)
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Deterministic, offline stand-in for the OCI chat model.
+
+    Cypher-generation prompts get a rule-based Cypher statement for the incident
+    schema (literals are copied from the question, like a real model would);
+    any other prompt gets a short answer echoing the context. `latency_ms`
+    simulates model latency for load tests and benchmarks; when streamed, the
+    first word arrives after a quarter of it and the rest are spread over the
+    remainder.
+    """
+
+    latency_ms: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        text = _respond(messages)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        words = re.findall(r"\S+\s*", _respond(messages))
+        for i, word in enumerate(words):
+            if self.latency_ms:
+                share = 0.25 if i == 0 else 0.75 / max(len(words) - 1, 1)
+                time.sleep(self.latency_ms * share / 1000)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+            if run_manager is not None:
+                run_manager.on_llm_new_token(word, chunk=chunk)
+            yield chunk
+
+
+def _respond(messages):
+    prompt = "\n".join(str(m.content) for m in messages)
+    if "Generate Cypher statement" in prompt:
+        return stub_cypher(_question(prompt))
+    return f"Based on the graph: {_context(prompt)}"
+
+
+def _question(prompt):
+    match = _QUESTION.search(prompt)
+    if not match:
+        return prompt
+    return (match.group(1) or match.group(2) or "").strip()
+
+
+def _context(prompt):
+    match = re.search(r"Information:\s*(.*?)\s*Question:", prompt, re.S)
+    return match.group(1).strip()[:500] if match else "no information"
+
+
+def stub_cypher(question):
+    """
+    Rule-based Text2Cypher over the incident schema.
+    """
+    where = []
+    match = "MATCH (i:Issue)"
+    component = _COMPONENT.search(question)
+    product = _PRODUCT.search(question)
+    key = _ISSUE_KEY.search(question)
+    severity = _SEVERITY.search(question)
+    lowered = question.lower()
+    if not key and any(word in lowered for word in ("average", "duration", "mttr")):
+        return _rollup_cypher(component, product, severity)
+    if key and "overlap" in lowered:
+        return _overlap_cypher(key.group(0))
+    window = _WINDOW.search(question)
+    if window:
+        return _window_cypher(window, severity)
+    if component:
+        match += f"-[:HAS_COMPONENT]->(:Component {{name: '{component.group(0)}'}})"
+    elif product:
+        match += f"-[:HAS_PRODUCT]->(:Product {{name: '{product.group(0)}'}})"
+    if key:
+        where.append(f"i.key = '{key.group(0)}'")
+    if severity:
+        where.append(f"i.severity = '{severity.group(0).capitalize()}'")
+    if "open" in lowered:
+        where.append("i.status = 'Open'")
+    cypher = match + (" WHERE " + " AND ".join(where) if where else "")
+    if "how many" in lowered or "count" in lowered:
+        return cypher + " RETURN count(i) AS count"
+    return cypher + " RETURN i.key AS key, i.summary AS summary, i.severity AS severity LIMIT 10"
+
+
+def _overlap_cypher(key):
+    # Overlap and time-range questions go through the hour buckets (src/timeline.py)
+    return (f"MATCH (x:Issue {{key: '{key}'}})-[:OCCURRED_IN]->(:Hour)<-[:OCCURRED_IN]-(i:Issue) "
+            "WHERE i <> x AND i.event_start < x.event_end AND i.event_end > x.event_start "
+            "RETURN DISTINCT i.key AS key, i.summary AS summary, i.event_start AS event_start LIMIT 10")
+
+
+def _window_cypher(window, severity):
+    count, unit = int(window.group(1) or 1), window.group(2).lower()
+    period = f"P{count}M" if unit == "month" else f"P{count * 7 if unit == 'week' else count}D"
+    since = f"localdatetime() - duration('{period}')"
+    where = [f"i.event_end >= {since}"]
+    if severity:
+        where.append(f"i.severity = '{severity.group(0).capitalize()}'")
+    return (f"MATCH (h:Hour) WHERE h.start >= localdatetime.truncate('hour', {since}) "
+            f"MATCH (h)<-[:OCCURRED_IN]-(i:Issue) WITH DISTINCT i WHERE {' AND '.join(where)} "
+            "RETURN i.key AS key, i.summary AS summary, i.severity AS severity LIMIT 10")
+
+
+def _rollup_cypher(component, product, severity):
+    # Duration questions read the precomputed Rollup nodes (src/rollups.py)
+    props = []
+    if component:
+        props += ["dimension: 'component'", f"name: '{component.group(0)}'"]
+    elif product:
+        props += ["dimension: 'product'", f"name: '{product.group(0)}'"]
+    else:
+        props.append("dimension: 'product'")  # every issue has exactly one product
+    if severity:
+        props.append(f"severity: '{severity.group(0).capitalize()}'")
+    return (f"MATCH (r:Rollup {{{', '.join(props)}}}) "
+            "RETURN sum(r.issue_count) AS issues, "
+            "sum(r.total_duration_ms) * 1.0 / sum(r.timed_count) AS avg_duration_ms")
@@ -0,0 +1,178 @@
+from src.builder import DATABASE, ingest_data, create_issue_links, DIMENSIONS
+from src.config import INGEST_BATCH_SIZE, INGEST_WORKERS, INGEST_MAX_RETRIES
+from src.data_io import content_hash
+from src.ingest import run_batched
+from src.passages import PassageChunker
+from src.rollups import issue_buckets, merge_buckets, refresh_rollups
+from src.timeline import refresh_timeline
+
+# Relationships owned by an Issue row; dropped and re-created when the row changes
+# so that e.g. a removed label or component disappears from the graph.
+ISSUE_OWNED_RELATIONSHIPS = (
+    "HAS_PRODUCT|HAS_CATEGORY|REPORTED_BY|ASSIGNED_TO|HAS_SLACK_CHANNEL|"
+    "HAS_COMPONENT|HAS_LABEL|HAS_SOURCE|CLONES"
+)
+
+
+def fetch_issue_hashes(driver):
+    with driver.session(database=DATABASE) as session:
+        result = session.run("MATCH (i:Issue) RETURN i.id AS id, i.content_hash AS hash")
+        return {record["id"]: record["hash"] for record in result}
+
+
+# Product/Category/Person/... nodes, reached from an Issue
+DIMENSION_LABELS = sorted({label for label, _, _ in DIMENSIONS})
+
+
+def delete_orphan_passages(tx, ids):
+    # Passages among `ids` no longer linked to any issue
+    tx.run("""
+    UNWIND $ids AS pid
+    MATCH (p:Passage {id: pid})
+    WHERE NOT (p)-[:FROM]->()
+    DETACH DELETE p
+    """, ids=ids)
+
+
+def issue_neighbours(tx, ids):
+    """
+    Passage ids and dimension node element ids linked to the given issues, to
+    check for orphans once the issues' links are gone.
+    """
+    record = tx.run(f"""
+    UNWIND $ids AS issue_id
+    MATCH (i:Issue {{id: issue_id}})
+    OPTIONAL MATCH (p:Passage)-[:FROM]->(i)
+    OPTIONAL MATCH (i)-->(d:{"|".join(DIMENSION_LABELS)})
+    RETURN collect(DISTINCT p.id) AS passages, collect(DISTINCT elementId(d)) AS dimensions
+    """, ids=ids).single()
+    return record["passages"], record["dimensions"]
+
+
+def delete_orphan_dimensions(tx, element_ids):
+    # Dimension nodes among `element_ids` no Issue links to any more, with their Rollups
+    tx.run("""
+    UNWIND $ids AS eid
+    MATCH (d) WHERE elementId(d) = eid AND NOT (d)<--(:Issue)
+    OPTIONAL MATCH (d)-[:HAS_ROLLUP]->(r:Rollup)
+    DETACH DELETE r, d
+    """, ids=element_ids)
+
+
+def sync_issues(tx, data):
+    """
+    Upsert changed, chunked Issue rows (each carrying `content_hash`) and reconcile
+    what they own. Passage ids are content hashes, so an edited source yields new
+    Passages (embedded on the next run) while unchanged chunks keep their embedding.
+    Passages and dimension nodes left without an issue are deleted.
+    """
+    ids = [row["id"] for row in data]
+    passages, dimensions = issue_neighbours(tx, ids)
+
+    # Sources no longer attached to the issue
+    tx.run("""
+    UNWIND $data AS row
+    MATCH (:Issue {id: row.id})-[:HAS_SOURCE]->(s:Source)
+    WHERE NOT s.id IN [src IN row.passages | src.id]
+    DETACH DELETE s
+    """, data=data)
+
+    # Chunk links are re-created from the current text
+    tx.run("""
+    UNWIND $data AS row
+    MATCH (:Issue {id: row.id})-[:HAS_SOURCE]->(:Source)<-[c:CHUNK_OF]-(:Passage)
+    DELETE c
+    """, data=data)
+
+    tx.run(f"""
+    UNWIND $data AS row
+    MATCH (i:Issue {{id: row.id}})-[r:{ISSUE_OWNED_RELATIONSHIPS}]->()
+    DELETE r
+    """, data=data)
+
+    tx.run("""
+    UNWIND $ids AS issue_id
+    MATCH (:Passage)-[r:FROM]->(:Issue {id: issue_id})
+    DELETE r
+    """, ids=ids)
+
+    # Also sets content_hash
+    ingest_data(tx, data)
+    delete_orphan_passages(tx, passages)
+    delete_orphan_dimensions(tx, dimensions)
+
+
+def prune_issues(tx, ids):
+    """
+    Delete the given issues with their sources, then the passages and dimension
+    nodes no remaining issue links to.
+    """
+    passages, dimensions = issue_neighbours(tx, ids)
+    tx.run("""
+    UNWIND $ids AS issue_id
+    MATCH (i:Issue {id: issue_id})
+    OPTIONAL MATCH (i)-[:HAS_SOURCE]->(s:Source)
+    DETACH DELETE s, i
+    """, ids=ids)
+    delete_orphan_passages(tx, passages)
+    delete_orphan_dimensions(tx, dimensions)
+
+
+def sync_data(driver, data, batch_size=INGEST_BATCH_SIZE, workers=INGEST_WORKERS,
+              max_retries=INGEST_MAX_RETRIES, prune=False):
+    """
+    Incremental alternative to clear_database + full ingest. `data` may be any
+    re-iterable (e.g. an IncidentStream); only changed rows are kept in memory.
+
+    Each Issue row is hashed; only new or changed rows are written. Changed rows
+    have their passages chunked and their owned relationships and sources
+    reconciled; chunks whose text is new become Passages without an embedding, so
+    generate_embeddings embeds just those. With `prune`, issues absent from `data`
+    are deleted in batches, along with passages and dimension nodes no other
+    issue links to. Rollups are recounted only for the buckets the changed or
+    pruned issues fall in, and only the changed issues are re-linked on the timeline.
+
+    Issues written before content hashes were stored have none, so the first
+    sync on such a graph rewrites every issue once.
+    """
+    existing = fetch_issue_hashes(driver)
+    unhashed = sum(1 for h in existing.values() if h is None)
+    if unhashed:
+        print(f"{unhashed} issues in the graph have no content hash yet; they are rewritten once.")
+    changed = []
+    unchanged = 0
+    for row in data:
+        row_hash = content_hash(row)
+        if existing.get(row["id"]) == row_hash:
+            unchanged += 1
+            continue
+        changed.append(dict(row, content_hash=row_hash))
+
+    print(f"{len(changed)} new or changed issues, {unchanged} unchanged.")
+    stats = {"changed": len(changed), "unchanged": unchanged, "pruned": 0}
+    changed_ids = [row["id"] for row in changed]
+    # Rollup buckets the changed issues counted towards before the update
+    rollup_buckets = [issue_buckets(driver, [i for i in changed_ids if i in existing])]
+
+    if changed:
+        with PassageChunker() as chunker:
+            stats["issues"] = run_batched(driver, sync_issues, changed, batch_size, workers,
+                                          max_retries, "changed issues", len(changed), prepare=chunker)
+        # Unchanged rows may clone a newly added issue, so they need their link too.
+        changed_keys = {row["key"] for row in changed}
+        link_rows = changed + [row for row in data if row.get("clones") in changed_keys]
+        stats["links"] = run_batched(driver, create_issue_links, link_rows, batch_size, workers,
+                                     max_retries, "issue links", len(link_rows))
+
+    if prune:
+        stale = list(set(existing) - {row["id"] for row in data})
+        stats["pruned"] = len(stale)
+        rollup_buckets.append(issue_buckets(driver, stale))
+        stats["prune"] = run_batched(driver, prune_issues, stale, batch_size, workers,
+                                     max_retries, "pruned issues", len(stale))
+        print(f"Pruned {stats['pruned']} issues missing from the export.")
+
+    rollup_buckets.append(issue_buckets(driver, changed_ids))
+    stats["rollups"] = refresh_rollups(driver, merge_buckets(*rollup_buckets), batch_size, workers, max_retries)
+    stats["timeline"] = refresh_timeline(driver, changed_ids, batch_size, workers, max_retries)
+    return stats
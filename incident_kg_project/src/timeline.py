@@ -0,0 +1,136 @@
+from src.builder import DATABASE
+from src.config import INGEST_BATCH_SIZE, INGEST_WORKERS, INGEST_MAX_RETRIES
+from src.connection import read_query
+from src.ingest import run_batched
+
+# Time tree over incident events, so range ("Sev1s last week") and overlap ("what
+# overlapped with INC-1234") questions read a few hour buckets instead of comparing
+# event_start / event_end on every Issue:
+#   (:Day {date})-[:HAS_HOUR]->(:Hour {start, date})<-[:OCCURRED_IN]-(:Issue)
+# An Issue is linked to every hour its [event_start, event_end] interval touches;
+# issues without event_start are not on the timeline. Hour/Day nodes exist for the
+# hours between the earliest and latest event, whether or not anything happened then.
+
+# Hours from the first to the last bucket an issue is linked to (0 for an event within one hour)
+_SPAN_HOURS = ("CASE WHEN coalesce(i.event_end, i.event_start) > localdatetime.truncate('hour', i.event_start) "
+               "THEN duration.inSeconds(localdatetime.truncate('hour', i.event_start), "
+               "coalesce(i.event_end, i.event_start)).hours ELSE 0 END")
+
+# Issues whose event overlaps [$start, $end): seek the hour buckets, then check exact bounds
+RANGE_QUERY = """
+MATCH (h:Hour)
+WHERE h.start >= localdatetime.truncate('hour', $start) AND h.start < $end
+MATCH (h)<-[:OCCURRED_IN]-(i:Issue)
+WITH DISTINCT i
+WHERE i.event_start < $end AND coalesce(i.event_end, i.event_start) >= $start
+RETURN i.key AS key, i.severity AS severity, i.event_start AS event_start, i.event_end AS event_end
+ORDER BY event_start
+"""
+
+# Issues whose event overlaps the event of issue $key
+OVERLAP_QUERY = """
+MATCH (x:Issue {key: $key})-[:OCCURRED_IN]->(:Hour)<-[:OCCURRED_IN]-(i:Issue)
+WHERE i <> x
+WITH DISTINCT x, i
+WHERE i.event_start < coalesce(x.event_end, x.event_start)
+  AND coalesce(i.event_end, i.event_start) > x.event_start
+RETURN i.key AS key, i.severity AS severity, i.event_start AS event_start, i.event_end AS event_end
+ORDER BY event_start
+"""
+
+# Shown to the Cypher-generation LLM next to the schema (braces doubled for the prompt template)
+TIMELINE_PROMPT_HINT = """event_start, event_end, created and updated are LocalDateTime values: compare them with
+localdatetime('2024-05-01T00:00') or localdatetime() - duration('P7D'), never with strings.
+For incidents in a time range or overlapping another incident, go through the hour buckets
+(:Issue)-[:OCCURRED_IN]->(:Hour {{start}}) (one per hour the event spans; (:Day {{date}})-[:HAS_HOUR]->(:Hour))
+instead of filtering every Issue, then check the exact bounds.
+Example: MATCH (h:Hour) WHERE h.start >= localdatetime.truncate('hour', localdatetime() - duration('P7D'))
+MATCH (h)<-[:OCCURRED_IN]-(i:Issue {{severity: 'Sev1'}}) RETURN DISTINCT i.key AS key
+Example: MATCH (x:Issue {{key: 'INC-1234'}})-[:OCCURRED_IN]->(:Hour)<-[:OCCURRED_IN]-(i:Issue)
+WHERE i <> x AND i.event_start < x.event_end AND i.event_end > x.event_start RETURN DISTINCT i.key AS key"""
+
+
+def _event_bounds(driver, issue_ids=None):
+    # Earliest event start and latest event end, over all issues or the given ones
+    where = "i.event_start IS NOT NULL" + ("" if issue_ids is None else " AND i.id IN $ids")
+    rows, _ = read_query(f"""
+    MATCH (i:Issue) WHERE {where}
+    RETURN min(i.event_start) AS first, max(coalesce(i.event_end, i.event_start)) AS last
+    """, {"ids": issue_ids})
+    return rows[0]["first"], rows[0]["last"]
+
+
+def ensure_buckets(tx, first, last):
+    """
+    Create the Day and Hour nodes covering `first` .. `last` (LocalDateTime) that do not exist yet.
+    """
+    tx.run("""
+    WITH localdatetime.truncate('hour', $first) AS first
+    UNWIND range(0, duration.inSeconds(first, $last).hours) AS n
+    WITH first + duration({hours: n}) AS hour
+    MERGE (h:Hour {start: hour})
+    ON CREATE SET h.date = date(hour)
+    MERGE (d:Day {date: date(hour)})
+    MERGE (d)-[:HAS_HOUR]->(h)
+    """, first=first, last=last)
+
+
+def link_issues(tx, ids):
+    """
+    Replace the OCCURRED_IN edges of the given issues with the hours their event spans.
+    The Hour nodes must exist (ensure_buckets).
+    """
+    tx.run("""
+    UNWIND $ids AS issue_id
+    MATCH (:Issue {id: issue_id})-[r:OCCURRED_IN]->()
+    DELETE r
+    """, ids=ids)
+    tx.run(f"""
+    UNWIND $ids AS issue_id
+    MATCH (i:Issue {{id: issue_id}})
+    WHERE i.event_start IS NOT NULL
+    UNWIND range(0, {_SPAN_HOURS}) AS n
+    MATCH (h:Hour {{start: localdatetime.truncate('hour', i.event_start) + duration({{hours: n}})}})
+    CREATE (i)-[:OCCURRED_IN]->(h)
+    """, ids=ids)
+
+
+def refresh_timeline(driver, issue_ids=None, batch_size=INGEST_BATCH_SIZE, workers=INGEST_WORKERS,
+                     max_retries=INGEST_MAX_RETRIES):
+    """
+    Maintain the time tree. With `issue_ids` only those issues are re-linked (ids
+    no longer in the graph are skipped); without, the whole tree is rebuilt, the
+    old links and buckets deleted `batch_size` at a time.
+    """
+    rebuild = issue_ids is None
+    if rebuild:
+        with driver.session(database=DATABASE) as session:
+            session.run(f"MATCH ()-[r:OCCURRED_IN]->() CALL {{ WITH r DELETE r }} "
+                        f"IN TRANSACTIONS OF {int(batch_size)} ROWS").consume()
+            session.run(f"MATCH (n) WHERE n:Hour OR n:Day CALL {{ WITH n DETACH DELETE n }} "
+                        f"IN TRANSACTIONS OF {int(batch_size)} ROWS").consume()
+            issue_ids = [r["id"] for r in session.run("MATCH (i:Issue) RETURN i.id AS id")]
+    if not issue_ids:
+        return {}
+    first, last = _event_bounds(driver, None if rebuild else issue_ids)
+    if first is None:
+        return {}
+    with driver.session(database=DATABASE) as session:
+        session.execute_write(ensure_buckets, first, last)
+    return run_batched(driver, link_issues, issue_ids, batch_size, workers, max_retries,
+                       "timeline links", len(issue_ids))
+
+
+def issues_between(start, end):
+    """
+    Issues whose event overlaps [start, end), as rows ordered by event_start.
+    `start` and `end` are naive datetimes.
+    """
+    return read_query(RANGE_QUERY, {"start": start, "end": end})[0]
+
+
+def overlapping_issues(key):
+    """
+    Issues whose event overlaps the event of issue `key`.
+    """
+    return read_query(OVERLAP_QUERY, {"key": key})[0]
@@ -0,0 +1,292 @@
+"""
+Lightweight per-stage tracing for the RAG pipeline.
+
+    tracer = get_tracer()
+    with tracer.span("neo4j.execute", cypher=cypher) as span:
+        rows = ...
+        span.set(rows=len(rows))
+
+Spans nest through a context variable, so a stage deep inside the retriever
+lands under the pipeline's `query` span without being passed anything. When
+the outermost span of a trace ends, all of its spans go to the exporter:
+TRACE_EXPORTER=jsonl writes one JSON object per span, TRACE_EXPORTER=otlp one
+OTLP/JSON `resourceSpans` document per trace (readable by the OpenTelemetry
+collector's otlpjsonfile receiver). With no exporter, span() hands back a
+shared no-op span and nothing is timed or recorded.
+
+Summarize a trace file (either format) per stage with:
+    python -m src.tracing data/traces.jsonl
+"""
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from src.config import TRACE_EXPORTER, TRACE_FILE
+from src.schema_select import estimate_tokens
+from src.stats import percentile
+
+SERVICE_NAME = "incident-kg-rag"
+
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+class _NoopSpan:
+    recording = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    recording = True
+
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.parent = None
+        self.trace = None
+        self.trace_id = None
+        self.span_id = os.urandom(8).hex()
+        self.start_ns = self.end_ns = 0
+        self.error = None
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.parent = _current.get()
+        if self.parent is None:
+            self.trace_id = os.urandom(16).hex()
+            self.trace = []
+        else:
+            self.trace_id = self.parent.trace_id
+            self.trace = self.parent.trace
+        self.trace.append(self)
+        self._token = _current.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current.reset(self._token)
+        if self.parent is None:
+            try:
+                self.tracer.exporter.export(self.trace)
+            except Exception as e:
+                # Like QueryLog: a trace that cannot be written must not fail the query
+                print(f"Trace export failed: {e}", file=sys.stderr)
+        return False
+
+    @property
+    def duration_ms(self):
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "start_time": self.start_ns / 1e9,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Tracer:
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self):
+        return self.exporter is not None
+
+    def span(self, name, **attributes):
+        if self.exporter is None:
+            return NOOP_SPAN
+        return Span(self, name, attributes)
+
+
+class JsonlExporter:
+    """
+    One JSON object per span, appended to `path`.
+    """
+
+    def __init__(self, path=TRACE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+        with self._lock, open(self.path, "a") as f:
+            f.write(lines)
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": value if isinstance(value, str) else json.dumps(value, default=str)}
+
+
+class OtlpJsonExporter(JsonlExporter):
+    """
+    One OTLP/JSON ExportTraceServiceRequest per trace, one per line.
+    """
+
+    def export(self, spans):
+        otlp_spans = []
+        for span in spans:
+            otlp = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [{"key": k, "value": _otlp_value(v)}
+                               for k, v in span.attributes.items() if v is not None],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent is not None:
+                otlp["parentSpanId"] = span.parent.span_id
+            otlp_spans.append(otlp)
+        request = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": otlp_spans}],
+        }]}
+        with self._lock, open(self.path, "a") as f:
+            f.write(json.dumps(request) + "\n")
+
+
+EXPORTERS = {"jsonl": JsonlExporter, "otlp": OtlpJsonExporter}
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """
+    Process-wide tracer configured from TRACE_EXPORTER / TRACE_FILE.
+    """
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                exporter = EXPORTERS[TRACE_EXPORTER](TRACE_FILE) if TRACE_EXPORTER else None
+                _tracer = Tracer(exporter)
+    return _tracer
+
+
+def current_span():
+    """
+    Innermost open span, or the no-op span outside any trace.
+    """
+    return _current.get() or NOOP_SPAN
+
+
+def set_tracer(tracer):
+    global _tracer
+    _tracer = tracer
+
+
+_token_counter_class = None
+
+
+def llm_callbacks(span):
+    """
+    LangChain callbacks that add prompt/completion token counts to `span`
+    (summed over every LLM call made while it is open). Providers that report
+    no usage get schema_select.estimate_tokens() estimates, flagged with
+    tokens_estimated=True. Empty when the span is not recording.
+    """
+    global _token_counter_class
+    if not span.recording:
+        return []
+    if _token_counter_class is None:
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        class TokenCounter(BaseCallbackHandler):
+            def __init__(self, span):
+                self.span = span
+                self.prompt_tokens = 0
+
+            def _add(self, **counts):
+                for key, value in counts.items():
+                    self.span.attributes[key] = self.span.attributes.get(key, 0) + value
+
+            def on_chat_model_start(self, serialized, messages, **kwargs):
+                self.prompt_tokens = estimate_tokens("".join(str(m.content) for batch in messages for m in batch))
+
+            def on_llm_start(self, serialized, prompts, **kwargs):
+                self.prompt_tokens = estimate_tokens("".join(prompts))
+
+            def on_llm_end(self, response, **kwargs):
+                usage = [getattr(getattr(g, "message", None), "usage_metadata", None)
+                         for gens in response.generations for g in gens]
+                usage = [u for u in usage if u]
+                if usage:
+                    self._add(prompt_tokens=sum(u.get("input_tokens", 0) for u in usage),
+                              completion_tokens=sum(u.get("output_tokens", 0) for u in usage))
+                    return
+                completion = "".join(g.text for gens in response.generations for g in gens)
+                self._add(prompt_tokens=self.prompt_tokens, completion_tokens=estimate_tokens(completion))
+                self.span.attributes["tokens_estimated"] = True
+
+        _token_counter_class = TokenCounter
+    return [_token_counter_class(span)]
+
+
+def _span_durations(entry):
+    # (name, duration_ms) per span of one line: a jsonl span or an OTLP/JSON request
+    if "resourceSpans" not in entry:
+        yield entry["name"], entry["duration_ms"]
+        return
+    for resource in entry["resourceSpans"]:
+        for scope in resource.get("scopeSpans", []):
+            for span in scope.get("spans", []):
+                yield span["name"], (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+
+
+def summarize(path):
+    """
+    Per-stage count, mean and p95 duration from a trace file written by either exporter.
+    """
+    durations = {}
+    with open(path, "r") as f:
+        for line in f:
+            for name, duration_ms in _span_durations(json.loads(line)):
+                durations.setdefault(name, []).append(duration_ms)
+    summary = {}
+    for name, values in durations.items():
+        summary[name] = {
+            "count": len(values),
+            "mean_ms": sum(values) / len(values),
+            "p95_ms": percentile(values, 95),
+        }
+    return summary
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else TRACE_FILE
+    for name, stats in sorted(summarize(path).items(), key=lambda item: -item[1]["mean_ms"]):
+        print(f"{name:<24} {stats['count']:>6}x  mean {stats['mean_ms']:9.2f} ms  p95 {stats['p95_ms']:9.2f} ms")
@@ -0,0 +1,195 @@
+import json
+import os
+import numpy as np
+from src.config import NEO4J_DATABASE, VECTOR_INDEX_DIR, VECTOR_INDEX_FAISS
+from src.ingest import chunked
+
+DATABASE = NEO4J_DATABASE
+PAGE_SIZE = 10000
+
+try:
+    import faiss  # type: ignore
+except ImportError:
+    faiss = None
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def _iter_embeddings(driver, since=None, page_size=PAGE_SIZE):
+    # Keyset-paginated export of (id, embedding, embedded_at) for embedded passages.
+    # `since` is inclusive: passages embedded in the same millisecond as the last
+    # export must not be missed (the caller skips the ones it already has).
+    where = "AND coalesce(p.embedded_at, 0) >= $since " if since is not None else ""
+    query = f"""
+    MATCH (p:Passage)
+    WHERE p.embedding IS NOT NULL AND p.id > $after {where}
+    RETURN p.id AS id, p.embedding AS embedding, coalesce(p.embedded_at, 0) AS embedded_at
+    ORDER BY p.id
+    LIMIT $limit
+    """
+    after = ""
+    while True:
+        with driver.session(database=DATABASE) as session:
+            page = session.execute_read(
+                lambda tx: [r.data() for r in tx.run(query, after=after, since=since, limit=page_size)]
+            )
+        yield from page
+        if len(page) < page_size:
+            return
+        after = page[-1]["id"]
+
+
+def _embedded_ids(driver):
+    with driver.session(database=DATABASE) as session:
+        result = session.run("MATCH (p:Passage) WHERE p.embedding IS NOT NULL RETURN p.id AS id")
+        return {record["id"] for record in result}
+
+
+class LocalVectorIndex:
+    """
+    In-process cosine-similarity index over Passage embeddings.
+
+    Vectors live in a normalized float32 .npy file that is memory-mapped on load,
+    so the exact NumPy scan costs no heap beyond the pages the OS keeps resident.
+    With `use_faiss` (VECTOR_INDEX_FAISS) and FAISS installed, a flat inner-product
+    FAISS index is used for search instead; it is an in-memory copy of every vector.
+    """
+
+    def __init__(self, directory=VECTOR_INDEX_DIR, use_faiss=VECTOR_INDEX_FAISS):
+        self.directory = directory
+        self.vectors_path = os.path.join(directory, "passage_vectors.npy")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.ids = []
+        self.vectors = None
+        self.watermark = 0
+        self.use_faiss = use_faiss
+        self._faiss_index = None
+
+    def exists(self):
+        return os.path.exists(self.vectors_path) and os.path.exists(self.meta_path)
+
+    def load(self):
+        with open(self.meta_path, "r") as f:
+            meta = json.load(f)
+        self.ids = meta["ids"]
+        self.watermark = meta["watermark"]
+        self.vectors = np.load(self.vectors_path, mmap_mode="r")[:len(self.ids)]
+        self._faiss_index = None
+        if self.use_faiss and faiss is not None and len(self.ids):
+            self._faiss_index = faiss.IndexFlatIP(self.vectors.shape[1])
+            self._faiss_index.add(np.ascontiguousarray(self.vectors))
+        return self
+
+    def _open_tmp(self, rows, dimensions):
+        os.makedirs(self.directory, exist_ok=True)
+        return np.lib.format.open_memmap(self.vectors_path + ".tmp.npy", mode="w+",
+                                         dtype=np.float32, shape=(rows, dimensions))
+
+    def _commit(self, out, ids, watermark):
+        # Written to temp files then swapped in, so readers never see a partial index.
+        out.flush()
+        del out
+        os.replace(self.vectors_path + ".tmp.npy", self.vectors_path)
+        with open(self.meta_path + ".tmp", "w") as f:
+            json.dump({"ids": ids, "watermark": watermark}, f)
+        os.replace(self.meta_path + ".tmp", self.meta_path)
+        return self.load()
+
+    def build(self, driver):
+        """
+        Export every embedded passage from the graph into a fresh index,
+        streaming page by page into the memory-mapped file.
+        """
+        with driver.session(database=DATABASE) as session:
+            total = session.run(
+                "MATCH (p:Passage) WHERE p.embedding IS NOT NULL RETURN count(p) AS c"
+            ).single()["c"]
+        if not total:
+            print("No embedded passages found; local vector index not built.")
+            return self
+
+        out, ids, watermark = None, [], 0
+        for batch in chunked(_iter_embeddings(driver), PAGE_SIZE):
+            # Passages embedded after the count are left for the next refresh.
+            batch = batch[:total - len(ids)]
+            if not batch:
+                break
+            matrix = _normalize(np.array([row["embedding"] for row in batch], dtype=np.float32))
+            if out is None:
+                out = self._open_tmp(total, matrix.shape[1])
+            out[len(ids):len(ids) + len(batch)] = matrix
+            ids.extend(row["id"] for row in batch)
+            watermark = max([watermark] + [row["embedded_at"] for row in batch])
+        if out is None:
+            return self
+        print(f"Local vector index built with {len(ids)} passages.")
+        return self._commit(out, ids, watermark)
+
+    def refresh(self, driver):
+        """
+        Incrementally sync with the graph: passages embedded since the last
+        watermark are added or replaced and passages that lost their embedding
+        (deleted, or edited by a sync) are dropped. Returns the number of changes.
+        """
+        if not self.exists():
+            self.build(driver)
+            return len(self.ids)
+        if self.vectors is None:
+            self.load()
+
+        # Rows stamped exactly at the watermark that the index already holds were
+        # exported last time
+        indexed = set(self.ids)
+        changed = [row for row in _iter_embeddings(driver, since=self.watermark)
+                   if not (row["embedded_at"] == self.watermark and row["id"] in indexed)]
+        changed_ids = {row["id"] for row in changed}
+        current = _embedded_ids(driver)
+        keep = [i for i, pid in enumerate(self.ids) if pid in current and pid not in changed_ids]
+        removed = len(indexed - current)
+        if not changed and not removed:
+            return 0
+
+        ids = [self.ids[i] for i in keep] + [row["id"] for row in changed]
+        if not ids:
+            self.ids, self.vectors, self._faiss_index = [], None, None
+            for path in (self.vectors_path, self.meta_path):
+                os.remove(path)
+            return removed
+        dimensions = len(changed[0]["embedding"]) if changed else self.vectors.shape[1]
+        out = self._open_tmp(len(ids), dimensions)
+        for start in range(0, len(keep), PAGE_SIZE):
+            block = keep[start:start + PAGE_SIZE]
+            out[start:start + len(block)] = self.vectors[block]
+        if changed:
+            out[len(keep):] = _normalize(np.array([row["embedding"] for row in changed], dtype=np.float32))
+        watermark = max([self.watermark] + [row["embedded_at"] for row in changed])
+        self._commit(out, ids, watermark)
+        print(f"Local vector index refreshed: {len(changed)} upserted, {removed} removed.")
+        return len(changed) + removed
+
+    def search(self, vector, k=3):
+        """
+        Return [(passage_id, score)] for the `k` nearest passages by cosine similarity.
+        """
+        if not self.ids:
+            return []
+        query = _normalize(np.asarray([vector], dtype=np.float32))
+        k = min(k, len(self.ids))
+        if self._faiss_index is not None:
+            scores, positions = self._faiss_index.search(query, k)
+            return [(self.ids[p], float(s)) for p, s in zip(positions[0], scores[0]) if p >= 0]
+        scores = self.vectors @ query[0]
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[p], float(scores[p])) for p in top]
+
+
+
+if __name__ == "__main__":
+    from src.connection import get_driver
+
+    LocalVectorIndex().refresh(get_driver())
@@ -0,0 +1,34 @@
+from neo4j.exceptions import CypherSyntaxError, ServiceUnavailable
+from src.cypher_cache import templatize, parameterize, is_stale_plan
+from src.cypher_guard import QueryRejected, QueryTimedOut
+
+
+def test_identifier_kinds_get_different_templates():
+    component, _ = templatize("How many issues for Component-3?")
+    product, _ = templatize("How many issues for Product-2?")
+    incident, _ = templatize("How many issues for INC-1234?")
+    assert len({component, product, incident}) == 3
+
+
+def test_same_kind_shares_a_template():
+    first, first_params = templatize("How many issues for Component-3?")
+    second, second_params = templatize("how many issues for Component-7")
+    assert first == second == "how many issues for component-<p0>"
+    assert first_params == {"p0": "Component-3"}
+    assert second_params == {"p0": "Component-7"}
+
+
+def test_parameterize_binds_the_whole_literal():
+    _, params = templatize("How many issues for Product-2?")
+    cypher = "MATCH (i:Issue)-[:HAS_PRODUCT]->(:Product {name: 'Product-2'}) RETURN count(i)"
+    assert parameterize(cypher, params) == (
+        "MATCH (i:Issue)-[:HAS_PRODUCT]->(:Product {name: $p0}) RETURN count(i)"
+    )
+
+
+def test_only_refused_statements_are_stale():
+    assert is_stale_plan(CypherSyntaxError("Invalid input"))
+    assert not is_stale_plan(QueryTimedOut("query cancelled after 10s"))
+    assert not is_stale_plan(QueryRejected("write clause not allowed: CREATE"))
+    assert not is_stale_plan(ServiceUnavailable("connection refused"))
+    assert not is_stale_plan(RuntimeError("boom"))
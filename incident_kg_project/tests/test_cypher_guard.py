@@ -0,0 +1,83 @@
+import pytest
+from src.cypher_guard import CypherGuard, QueryRejected, ensure_limit
+
+
+class FakeSummary:
+    def __init__(self, query_type="r", plan=None):
+        self.query_type = query_type
+        self.plan = plan
+
+
+class FakeTransaction:
+    def __init__(self, summary, runs):
+        self.summary = summary
+        self.runs = runs
+
+    def run(self, query, parameters=None):
+        # As in neo4j 6: Query objects are only accepted by session.run
+        if not isinstance(query, str):
+            raise TypeError("Query object is only supported for session.run")
+        self.runs.append((query, parameters))
+        return self
+
+    def consume(self):
+        return self.summary
+
+
+class FakeDriver:
+    def __init__(self, summary):
+        self.summary = summary
+        self.runs = []
+        self.timeouts = []
+
+    def session(self, database=None):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute_read(self, work):
+        self.timeouts.append(getattr(work, "timeout", None))
+        return work(FakeTransaction(self.summary, self.runs))
+
+
+def test_limit_is_not_commented_out():
+    cypher, added = ensure_limit("MATCH (i) RETURN i // limit comment", 1000)
+    assert added
+    assert cypher == "MATCH (i) RETURN i\nLIMIT 1000"
+
+
+def test_trailing_block_comment_and_semicolon():
+    cypher, _ = ensure_limit("MATCH (i) RETURN i; /* all issues */", 10)
+    assert cypher == "MATCH (i) RETURN i\nLIMIT 10"
+
+
+def test_comment_markers_inside_strings_are_kept():
+    cypher, _ = ensure_limit("MATCH (i {url: 'http://x'}) RETURN i.url AS url, '/* no */' AS s", 5)
+    assert cypher == "MATCH (i {url: 'http://x'}) RETURN i.url AS url, '/* no */' AS s\nLIMIT 5"
+
+
+def test_existing_limit_is_left_alone():
+    assert ensure_limit("MATCH (i) RETURN i LIMIT 3 // top three", 1000) == (
+        "MATCH (i) RETURN i LIMIT 3 // top three", False)
+
+
+def test_check_explains_through_a_transaction_function():
+    driver = FakeDriver(FakeSummary(plan={"args": {"EstimatedRows": 10}, "children": []}))
+    guard = CypherGuard(driver, max_rows=100, timeout_seconds=5)
+    cypher, info = guard.check("MATCH (i:Issue) RETURN i", {"x": 1})
+    assert cypher == "MATCH (i:Issue) RETURN i\nLIMIT 100"
+    assert driver.runs == [("EXPLAIN MATCH (i:Issue) RETURN i\nLIMIT 100", {"x": 1})]
+    assert driver.timeouts == [5]
+    assert info["estimated_rows"] == 10
+
+
+def test_check_rejects_large_plan_estimates():
+    driver = FakeDriver(FakeSummary(plan={"args": {"EstimatedRows": 1e9}, "children": []}))
+    guard = CypherGuard(driver, max_estimated_rows=1000)
+    with pytest.raises(QueryRejected):
+        guard.check("MATCH (a), (b) RETURN a, b")
+    assert guard.stats()["rejected"] == 1